@@ -8,16 +8,51 @@ try:
 except PackageNotFoundError:
     __version__ = "0.0.0"
 
-from .api import MyGasApi
+from .api import MyGasApi, Snapshot
 from .auth import AbstractMyGasAuth, SimpleMyGasAuth
-from .exceptions import MyGasApiError, MyGasApiParseError, MyGasAuthError
+from .cache import AbstractResponseCache, CacheStats, MemoryResponseCache, SqliteResponseCache
+from .codec import AbstractJsonCodec, MsgspecCodec, OrjsonCodec, StdlibJsonCodec
+from .coordinator import AbstractAuthCoordinator, FileLockAuthCoordinator
+from .queries import Indication
+from .exceptions import MyGasApiError, MyGasApiParseError, MyGasAuthError, MyGasTokenError, MyGasCircuitOpenError
+from .rate_limit import RateLimit, RateLimiter
+from .readings import MeterReadingStore, MeterReadings
+from .retry import CircuitBreakerRegistry, RetryPolicy
+from .sync import SyncDelta, SyncEngine
+from .token_store import AbstractTokenStore, JsonFileTokenStore, MemoryTokenStore, SqliteTokenStore
 
 __all__ = [
     "MyGasApi",
+    "Snapshot",
+    "Indication",
     "AbstractMyGasAuth",
     "SimpleMyGasAuth",
     "MyGasApiError",
     "MyGasApiParseError",
     "MyGasAuthError",
+    "MyGasTokenError",
+    "MyGasCircuitOpenError",
+    "RetryPolicy",
+    "CircuitBreakerRegistry",
+    "RateLimit",
+    "RateLimiter",
+    "AbstractResponseCache",
+    "MemoryResponseCache",
+    "SqliteResponseCache",
+    "CacheStats",
+    "SyncEngine",
+    "SyncDelta",
+    "MeterReadingStore",
+    "MeterReadings",
+    "AbstractJsonCodec",
+    "StdlibJsonCodec",
+    "OrjsonCodec",
+    "MsgspecCodec",
+    "AbstractTokenStore",
+    "MemoryTokenStore",
+    "JsonFileTokenStore",
+    "SqliteTokenStore",
+    "AbstractAuthCoordinator",
+    "FileLockAuthCoordinator",
     "__version__",
 ]
@@ -0,0 +1,179 @@
+"""Vectorized consumption analytics over meter readings.
+
+Requires numpy, install aiomygas[analytics].
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any, NamedTuple
+
+from .const import ATTR_UUID, ATTR_CAPACITY, ATTR_AVERAGE_RATE, ATTR_COUNTERS, ATTR_LSPU_INFO_GROUP, \
+    AVERAGE_MONTH_DAYS, DEFAULT_OUTLIER_THRESHOLD, DEFAULT_OUTLIER_MIN_PERIODS
+from .readings import MeterReadings, readings_from_counter, to_float
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+SECONDS_PER_DAY = 86400.0
+
+
+class ConsumptionPeriods(NamedTuple):
+    """Consumption between consecutive readings, one array element per period."""
+    counter: Any  # index into CounterSummary.uuid
+    start: Any
+    end: Any
+    consumption: Any
+    daily_rate: Any
+    rollover: Any
+    average_ratio: Any
+    outlier: Any
+
+
+class CounterSummary(NamedTuple):
+    """Consumption per counter, one array element per counter."""
+    uuid: list[str]
+    capacity: Any
+    average_rate: Any
+    consumption: Any
+    daily_rate: Any
+    periods: Any
+    outliers: Any
+
+
+class ConsumptionAnalysis(NamedTuple):
+    """Result of the analysis in columnar form."""
+    counters: CounterSummary
+    periods: ConsumptionPeriods
+
+
+def _require_numpy() -> None:
+    """Raise RuntimeError if numpy is not installed."""
+    if np is None:
+        raise RuntimeError("Analytics require numpy, install aiomygas[analytics]")
+
+
+def _group_median(values: Any, groups: Any, size: int) -> Any:
+    """Return the median of values in each group, ignoring NaN."""
+    valid = ~np.isnan(values)
+    values, groups = values[valid], groups[valid]
+    order = np.lexsort((values, groups))
+    values, groups = values[order], groups[order]
+    counts = np.bincount(groups, minlength=size)
+    starts = np.cumsum(counts) - counts
+    result = np.full(size, np.nan)
+    has_values = counts > 0
+    low = (starts + (counts - 1) // 2)[has_values]
+    high = (starts + counts // 2)[has_values]
+    result[has_values] = (values[low] + values[high]) / 2
+    return result
+
+
+def collect_counters(infos: Iterable[Mapping[str, Any]]) -> dict[str, Mapping[str, Any]]:
+    """Return the counters of async_get_lspu_info/async_get_els_info results by uuid."""
+    counters = {}
+    for info in infos:
+        for group in info.get(ATTR_LSPU_INFO_GROUP) or [info]:
+            for counter in group.get(ATTR_COUNTERS) or []:
+                if counter.get(ATTR_UUID):
+                    counters[counter[ATTR_UUID]] = counter
+    return counters
+
+
+def analyze_readings(readings: Mapping[str, MeterReadings],
+                     capacity: Mapping[str, Any] | None = None,
+                     average_rate: Mapping[str, Any] | None = None,
+                     outlier_threshold: float = DEFAULT_OUTLIER_THRESHOLD,
+                     outlier_min_periods: int = DEFAULT_OUTLIER_MIN_PERIODS) -> ConsumptionAnalysis:
+    """Analyze readings of many counters at once.
+
+    Consumption of a period is the difference of the sum of all tariff values.
+    A negative difference is treated as a rollover when the counter has a capacity
+    (number of integer digits). average_ratio compares the consumption per average
+    month with the counter's averageRate. Periods whose daily rate has a robust
+    z-score (median/MAD per counter) above outlier_threshold, or whose consumption
+    is still negative, are outliers.
+    """
+    _require_numpy()
+    capacity = capacity or {}
+    average_rate = average_rate or {}
+    uuids = list(readings)
+    size = len(uuids)
+    lengths = np.array([len(readings[uuid]) for uuid in uuids], dtype=np.int64)
+    counter = np.repeat(np.arange(size, dtype=np.int64), lengths)
+
+    def column(name: str) -> Any:
+        """Concatenate a column of all counters without copying each array first."""
+        parts = [np.frombuffer(getattr(readings[uuid], name), dtype=np.float64) for uuid in uuids]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    timestamps = column("timestamps")
+    tariffs = np.stack([column("value_day"), column("value_night"), column("value_middle")])
+    has_value = ~np.isnan(tariffs).all(axis=0)
+    totals = np.where(has_value, np.nansum(tariffs, axis=0), np.nan)
+
+    same = counter[1:] == counter[:-1]
+    period_counter = counter[1:][same]
+    start = timestamps[:-1][same]
+    end = timestamps[1:][same]
+    consumption = (totals[1:] - totals[:-1])[same]
+
+    capacities = np.array([to_float(capacity.get(uuid)) for uuid in uuids])
+    modulus = np.where(capacities > 0, 10.0 ** np.where(capacities > 0, capacities, 0), np.nan)
+    period_modulus = modulus[period_counter]
+    rollover = (consumption < 0) & ~np.isnan(period_modulus) & (consumption + period_modulus >= 0)
+    consumption = np.where(rollover, consumption + period_modulus, consumption)
+
+    days = (end - start) / SECONDS_PER_DAY
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily_rate = np.where(days > 0, consumption / days, np.nan)
+        average_rates = np.array([to_float(average_rate.get(uuid)) for uuid in uuids])
+        period_average = average_rates[period_counter]
+        average_ratio = np.where(period_average > 0, daily_rate * AVERAGE_MONTH_DAYS / period_average, np.nan)
+
+        median = _group_median(daily_rate, period_counter, size)
+        deviation = np.abs(daily_rate - median[period_counter])
+        mad = _group_median(deviation, period_counter, size)
+        score = 0.6745 * deviation / mad[period_counter]
+    periods = np.bincount(period_counter, minlength=size)
+    outlier = (consumption < 0) | ((periods[period_counter] >= outlier_min_periods) & (score > outlier_threshold))
+
+    valid = ~np.isnan(consumption)
+    total_consumption = np.bincount(period_counter[valid], weights=consumption[valid], minlength=size)
+    total_days = np.bincount(period_counter[valid], weights=days[valid], minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_rate = np.where(total_days > 0, total_consumption / total_days, np.nan)
+
+    return ConsumptionAnalysis(
+        CounterSummary(
+            uuid=uuids,
+            capacity=capacities,
+            average_rate=average_rates,
+            consumption=total_consumption,
+            daily_rate=mean_rate,
+            periods=periods,
+            outliers=np.bincount(period_counter[outlier], minlength=size),
+        ),
+        ConsumptionPeriods(
+            counter=period_counter,
+            start=start,
+            end=end,
+            consumption=consumption,
+            daily_rate=daily_rate,
+            rollover=rollover,
+            average_ratio=average_ratio,
+            outlier=outlier,
+        ),
+    )
+
+
+def analyze(infos: Iterable[Mapping[str, Any]], **kwargs: Any) -> ConsumptionAnalysis:
+    """Analyze counters of async_get_lspu_info/async_get_els_info results."""
+    counters = collect_counters(infos)
+    return analyze_readings(
+        {uuid: readings_from_counter(counter) for uuid, counter in counters.items()},
+        {uuid: counter.get(ATTR_CAPACITY) for uuid, counter in counters.items()},
+        {uuid: counter.get(ATTR_AVERAGE_RATE) for uuid, counter in counters.items()},
+        **kwargs,
+    )
@@ -1,58 +1,346 @@
 """MyGas API wrapper."""
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from functools import partial
+from typing import Any, NamedTuple
 
 from . import queries
 from .auth import AbstractMyGasAuth
+from .cache import AbstractResponseCache, CacheEntry, CacheKey, CacheStats
+from .const import LOGGER, DEFAULT_MAX_BATCH_SIZE, DEFAULT_CACHE_TTLS, ATTR_LSPU_ID, ATTR_ELS_ID, \
+    ATTR_LSPU_INFO_GROUP, ATTR_ID, ATTR_ELS, ATTR_ELS_GROUP, ATTR_LSPU, DEFAULT_SNAPSHOT_CONCURRENCY, \
+    DEFAULT_MAX_INDICATION_BATCH_SIZE, SNAPSHOT_INCLUDE, SNAPSHOT_ELS_INFO, SNAPSHOT_LSPU_INFO, SNAPSHOT_CHARGES, \
+    SNAPSHOT_PAYMENTS
+from .exceptions import MyGasApiError
+
+_CACHE_TAG_ATTRS = (ATTR_LSPU_ID, ATTR_ELS_ID)
+
+
+def _cache_tag(name: str, value: Any) -> str:
+    """Return the cache tag of an account variable."""
+    return f"{name}:{value}"
+
+
+class Snapshot(NamedTuple):
+    """Data of all accounts of an identity, by account id, and the errors of single requests."""
+    accounts: dict[str, Any]
+    els_info: dict[int, Any]
+    lspu_info: dict[int, Any]
+    charges: dict[int, Any]
+    payments: dict[int, Any]
+    errors: dict[tuple[str, int], MyGasApiError]
+
+
+def get_snapshot_account_ids(accounts: dict[str, Any]) -> dict[str, list[int]]:
+    """Return the ids of the accounts to fetch for each kind of snapshot data."""
+    els_groups = accounts.get(ATTR_ELS_GROUP) or []
+    lspu_ids = [lspu[ATTR_ID] for lspu in accounts.get(ATTR_LSPU) or []]
+    all_lspu_ids = [lspu[ATTR_ID] for els_group in els_groups for lspu in els_group.get(ATTR_LSPU) or []] + lspu_ids
+    return {
+        SNAPSHOT_ELS_INFO: list(dict.fromkeys(els_group[ATTR_ELS][ATTR_ID] for els_group in els_groups)),
+        SNAPSHOT_LSPU_INFO: list(dict.fromkeys(lspu_ids)),
+        SNAPSHOT_CHARGES: list(dict.fromkeys(all_lspu_ids)),
+        SNAPSHOT_PAYMENTS: list(dict.fromkeys(all_lspu_ids)),
+    }
 
 
 class MyGasApi:
     """Class to communicate with the MyGas API."""
     _auth: AbstractMyGasAuth
 
-    def __init__(self, auth: AbstractMyGasAuth) -> None:
-        """Initialize the API and store the auth."""
+    def __init__(self, auth: AbstractMyGasAuth,
+                 cache: AbstractResponseCache | None = None,
+                 cache_ttls: dict[str, float] | None = None,
+                 stale_if_error: bool = False,
+                 warm_start: bool = False,
+                 stale_ttls: dict[str, float] | None = None,
+                 on_refresh_error: Callable[[queries.BaseQuery, BaseException], None] | None = None) -> None:
+        """Initialize the API and store the auth.
+
+        Read queries with a TTL in cache_ttls (by operation name) are served from cache.
+        For stale_ttls seconds after the TTL (stale-while-revalidate) the cached response
+        is still returned at once while a single background refresh runs.
+        With stale_if_error an expired response is returned if the request fails.
+        With warm_start responses cached before the API was created (e.g. by a previous
+        run in a persistent cache) are returned at once and refreshed in the background.
+        Background refresh errors are passed to on_refresh_error or logged.
+        """
         self._auth = auth
+        self._cache = cache
+        self._cache_ttls = DEFAULT_CACHE_TTLS if cache_ttls is None else cache_ttls
+        self._stale_if_error = stale_if_error
+        self._warm_start = warm_start
+        self._stale_ttls = stale_ttls or {}
+        self._on_refresh_error = on_refresh_error
+        self._started_at = time.time()
+        self._refresh_tasks: dict[CacheKey, asyncio.Task[Any]] = {}
+
+    @property
+    def cache_stats(self) -> CacheStats | None:
+        """Return the response cache statistics."""
+        return self._cache.stats if self._cache is not None else None
+
+    def _get_cache_key(self, query: queries.BaseQuery) -> CacheKey:
+        """Return the cache key of a query."""
+        return self._auth.identity, *query.cache_key
+
+    async def _async_request(self, query: queries.BaseQuery) -> Any:
+        """Make a request, serving read queries from the cache while they are fresh."""
+        ttl = self._cache_ttls.get(query.OPERATION_NAME)
+        if self._cache is None or not ttl or query.IS_MUTATION:
+            return await self._auth.async_request(query)
+        key = self._get_cache_key(query)
+        entry = await self._cache.async_get(key)
+        if entry is not None:
+            if entry.is_fresh():
+                return entry.value
+            if self._is_usable_stale(query, entry):
+                self._start_refresh(query, key, ttl)
+                return entry.value
+        try:
+            return await self._async_fetch(query, key, ttl)
+        except MyGasApiError as err:
+            if entry is None or not self._stale_if_error:
+                raise
+            LOGGER.warning("Using cached %s after error: %s", query.OPERATION_NAME, err)
+            return entry.value
+
+    def _is_usable_stale(self, query: queries.BaseQuery, entry: CacheEntry) -> bool:
+        """Check if an expired response may be returned while it is refreshed in the background."""
+        if self._warm_start and entry.stored_at < self._started_at:
+            return True
+        stale_ttl = self._stale_ttls.get(query.OPERATION_NAME)
+        return bool(stale_ttl) and time.time() < entry.expires_at + stale_ttl
+
+    async def _async_fetch(self, query: queries.BaseQuery, key: CacheKey, ttl: float) -> Any:
+        """Make a request and cache the result."""
+        result = await self._auth.async_request(query)
+        tags = frozenset(
+            _cache_tag(name, value) for name, value in query.variables.items() if name in _CACHE_TAG_ATTRS
+        )
+        await self._cache.async_set(key, result, ttl, tags)
+        return result
+
+    def _start_refresh(self, query: queries.BaseQuery, key: CacheKey, ttl: float) -> None:
+        """Refresh a cached response in the background unless a refresh is already running."""
+        if key in self._refresh_tasks:
+            return
+        task = asyncio.create_task(self._async_fetch(query, key, ttl))
+        self._refresh_tasks[key] = task
+        task.add_done_callback(partial(self._on_refresh_done, query, key))
+
+    def _on_refresh_done(self, query: queries.BaseQuery, key: CacheKey, task: asyncio.Task[Any]) -> None:
+        """Forget a finished background refresh and report its error."""
+        self._refresh_tasks.pop(key, None)
+        if task.cancelled() or (err := task.exception()) is None:
+            return
+        if self._on_refresh_error is not None:
+            self._on_refresh_error(query, err)
+        else:
+            LOGGER.warning("Background refresh of %s failed: %s", query.OPERATION_NAME, err)
+
+    async def async_invalidate_cache(self, operation: str | None = None, lspu_id: int | None = None,
+                                     els_id: int | None = None) -> int:
+        """Remove cached responses of this identity, optionally only for an operation or account."""
+        if self._cache is None:
+            return 0
+        identity = self._auth.identity
+        if lspu_id is None and els_id is None:
+            return await self._cache.async_invalidate(identity, operation)
+        count = 0
+        if lspu_id is not None:
+            count += await self._cache.async_invalidate(identity, operation, _cache_tag(ATTR_LSPU_ID, lspu_id))
+        if els_id is not None:
+            count += await self._cache.async_invalidate(identity, operation, _cache_tag(ATTR_ELS_ID, els_id))
+        return count
 
     async def async_get_client_info(self) -> dict[str, Any]:
         """Get client data."""
         query = queries.ClientV2()
-        return await self._auth.async_request(query)
+        return await self._async_request(query)
+
+    async def async_get_accounts(self, fields: str | Iterable[str] | None = None) -> dict[str, Any]:
+        """Get accounts data, optionally only fields or a preset."""
+        query = queries.Accounts(fields)
+        return await self._async_request(query)
 
-    async def async_get_accounts(self) -> dict[str, Any]:
-        """Get accounts data."""
-        query = queries.Accounts()
-        return await self._auth.async_request(query)
+    async def async_get_els_info(self, els_id: int,
+                                 fields: str | Iterable[str] | None = None) -> dict[str, Any]:
+        """Get information about ELS account, optionally only fields or a preset."""
+        query = queries.ElsInfo(els_id, fields)
+        return await self._async_request(query)
 
-    async def async_get_els_info(self, els_id: int) -> dict[str, Any]:
-        """Get information about ELS account."""
-        query = queries.ElsInfo(els_id)
-        return await self._auth.async_request(query)
+    async def aiter_els_lspu_groups(self, els_id: int,
+                                    fields: str | Iterable[str] | None = None) -> AsyncIterator[dict[str, Any]]:
+        """Yield the lspuInfoGroup entries of an ELS account as soon as each is received.
 
-    async def async_get_lspu_info(self, lspu_id: int) -> dict[str, Any]:
-        """Get information about LSPU account."""
-        query = queries.LspuInfo(lspu_id)
-        return await self._auth.async_request(query)
+        The response is parsed while it is streamed, so memory is bounded by one entry.
+        Responses are not cached.
+        """
+        query = queries.ElsInfo(els_id, fields)
+        async for group in self._auth.aiter_request(query, (query.DATA_NAME, ATTR_LSPU_INFO_GROUP)):
+            yield group
+
+    async def async_get_lspu_info(self, lspu_id: int,
+                                  fields: str | Iterable[str] | None = None) -> dict[str, Any]:
+        """Get information about LSPU account, optionally only fields or a preset."""
+        query = queries.LspuInfo(lspu_id, fields)
+        return await self._async_request(query)
 
     async def async_get_charges(self, lspu_id: int) -> dict[str, Any]:
         """Get charges data for account."""
         query = queries.Charges(lspu_id)
-        return await self._auth.async_request(query)
+        return await self._async_request(query)
 
     async def async_get_payments(self, lspu_id: int) -> dict[str, Any]:
         """Get payments data for account."""
         query = queries.Payments(lspu_id)
-        return await self._auth.async_request(query)
+        return await self._async_request(query)
 
     async def async_get_receipt(self, date_iso_short: str, email: str,
                                 account_id: int, is_els: bool) -> dict[str, Any]:
         """Get receipt data for account."""
         query = queries.Receipt(date_iso_short, email, account_id, is_els)
-        return await self._auth.async_request(query)
+        return await self._async_request(query)
 
     async def async_indication_send(self, lspu_id: int, equipment_uuid: str, value: int | float,
                                     els_id: int | None = None) -> list[dict[str, Any]]:
-        """Send indication for account."""
+        """Send indication for account and invalidate its cached responses."""
         query = queries.IndicationSend(lspu_id, equipment_uuid, value, els_id)
-        return await self._auth.async_request(query)
+        result = await self._auth.async_request(query)
+        # readings of the account have changed
+        await self.async_invalidate_cache(lspu_id=lspu_id, els_id=els_id)
+        if els_id is None:
+            await self.async_invalidate_cache(queries.ElsInfo.OPERATION_NAME)
+        return result
+
+    async def async_indication_send_many(self, indications: Iterable[queries.Indication],
+                                         max_batch_size: int = DEFAULT_MAX_INDICATION_BATCH_SIZE,
+                                         return_exceptions: bool = False) -> list[Any]:
+        """Send readings of many counters in as few mutations as possible.
+
+        Indications with the same els_id are sent together, at most max_batch_size
+        counters per mutation, and invalidate the cached responses of their accounts.
+        Returns the counter result (uuid, sent, message) of each indication in order.
+        Failed mutations raise their error, or return it in place of the results
+        if return_exceptions is set.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        indications = list(indications)
+        # a counter sent twice goes to another mutation so that its results can be told apart
+        chunks: list[list[int]] = []
+        open_chunks: dict[int | None, list[int]] = {}
+        for index, indication in enumerate(indications):
+            chunk = open_chunks.get(indication.els_id)
+            if chunk is None or len(chunk) >= max_batch_size or any(
+                    indications[i].lspu_id == indication.lspu_id and indications[i].uuid == indication.uuid
+                    for i in chunk):
+                chunk = open_chunks[indication.els_id] = []
+                chunks.append(chunk)
+            chunk.append(index)
+        responses = await asyncio.gather(
+            *(self._auth.async_request(queries.IndicationBatchSend([indications[i] for i in chunk]))
+              for chunk in chunks),
+            return_exceptions=True,
+        )
+        results: list[Any] = [None] * len(indications)
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, MyGasApiError):
+                for index in chunk:
+                    results[index] = response
+                continue
+            if isinstance(response, BaseException):
+                raise response
+            for index, result in zip(chunk, response):
+                results[index] = result
+            # readings of the accounts have changed
+            els_id = indications[chunk[0]].els_id
+            for lspu_id in dict.fromkeys(indications[index].lspu_id for index in chunk):
+                await self.async_invalidate_cache(lspu_id=lspu_id)
+            if els_id is None:
+                await self.async_invalidate_cache(queries.ElsInfo.OPERATION_NAME)
+            else:
+                await self.async_invalidate_cache(els_id=els_id)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, MyGasApiError):
+                    raise result
+        return results
+
+    async def async_batch(self, batch: list[queries.BaseQuery],
+                          max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                          return_exceptions: bool = False) -> list[Any]:
+        """Send several read queries in as few requests as possible.
+
+        Queries are fused into documents of at most max_batch_size aliased fields.
+        Results are returned in the order of batch. Failed queries raise their error,
+        or return it in place of the result if return_exceptions is set.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        chunks = [batch[i:i + max_batch_size] for i in range(0, len(batch), max_batch_size)]
+        responses = await asyncio.gather(
+            *(self._auth.async_request(queries.BatchQuery(chunk)) for chunk in chunks),
+            return_exceptions=return_exceptions,
+        )
+        results: list[Any] = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, BaseException):
+                results.extend([response] * len(chunk))
+            else:
+                results.extend(response)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, MyGasApiError):
+                    raise result
+        return results
+
+    async def async_get_snapshot(self, include: Iterable[str] = SNAPSHOT_INCLUDE,
+                                 concurrency: int = DEFAULT_SNAPSHOT_CONCURRENCY) -> Snapshot:
+        """Get the accounts and then the data of every account concurrently.
+
+        include selects els_info (ELS accounts), lspu_info (accounts outside ELS), charges
+        and payments (all accounts). At most concurrency requests run at once. A failed
+        request is stored in errors by (kind, account id) instead of failing the snapshot.
+        """
+        include = set(include)
+        if unknown := include.difference(SNAPSHOT_INCLUDE):
+            raise ValueError(f"Unknown snapshot data {', '.join(sorted(unknown))}")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        accounts = await self.async_get_accounts()
+        account_ids = get_snapshot_account_ids(accounts)
+        methods = {
+            SNAPSHOT_ELS_INFO: self.async_get_els_info,
+            SNAPSHOT_LSPU_INFO: self.async_get_lspu_info,
+            SNAPSHOT_CHARGES: self.async_get_charges,
+            SNAPSHOT_PAYMENTS: self.async_get_payments,
+        }
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(method: Callable[[int], Any], account_id: int) -> Any:
+            """Fetch the data of an account, returning its error."""
+            async with semaphore:
+                try:
+                    return await method(account_id)
+                except MyGasApiError as err:
+                    return err
+
+        calls = [
+            (kind, method, account_id)
+            for kind, method in methods.items() if kind in include
+            for account_id in account_ids[kind]
+        ]
+        results = await asyncio.gather(*(fetch(method, account_id) for _, method, account_id in calls))
+        snapshot = Snapshot(accounts, {}, {}, {}, {}, {})
+        for (kind, _, account_id), result in zip(calls, results):
+            if isinstance(result, MyGasApiError):
+                LOGGER.debug("Unable to get %s of %s: %s", kind, account_id, result)
+                snapshot.errors[kind, account_id] = result
+            else:
+                getattr(snapshot, kind)[account_id] = result
+        return snapshot
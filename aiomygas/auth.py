@@ -4,16 +4,27 @@ from __future__ import annotations
 import asyncio
 import time
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from functools import partial
 from typing import Any, cast
 
-from aiohttp import ClientError, ClientSession, hdrs
+from aiohttp import ClientError, ClientResponseError, ClientSession, hdrs
 
 from . import queries
 from .const import LOGGER, CLOCK_OUT_OF_SYNC_MAX_SEC, HEADER_TOKEN, CLIENT_SESSION_LIFETIME, \
     DEFAULT_ENDPOINT, DEFAULT_HOST, DEFAULT_ORIGIN, DEFAULT_REFERER, DEFAULT_MOBILE_BROWSER, ATTR_EXPIRES_AT, \
-    ATTR_TOKEN, ATTR_BROWSER
+    ATTR_TOKEN, ATTR_BROWSER, DEFAULT_TOKEN_REFRESH_MARGIN, AUTH_ERROR_STATUSES, ATTR_ERRORS, ATTR_OK, ATTR_ERROR, \
+    ATTR_DATA, PERSISTED_QUERY_NOT_FOUND, PERSISTED_QUERY_NOT_SUPPORTED, CONTENT_TYPE_JSON, \
+    DEFAULT_TOKEN_REFRESH_RETRY_DELAY
+from .codec import AbstractJsonCodec, get_default_codec
+from .coordinator import AbstractAuthCoordinator
 from .device_info import DEVICE_INFO
-from .exceptions import MyGasAuthError, MyGasApiError, MyGasApiParseError
+from .exceptions import MyGasAuthError, MyGasApiError, MyGasApiParseError, MyGasTokenError
+from .queries.base import check_graphql_errors, get_persisted_query_error
+from .rate_limit import RateLimiter
+from .retry import CircuitBreakerRegistry, RetryPolicy, is_transient_error
+from .streaming import JsonStreamParser
+from .token_store import AbstractTokenStore, MemoryTokenStore
 
 
 class AbstractMyGasAuth(ABC):
@@ -22,12 +33,28 @@ class AbstractMyGasAuth(ABC):
     _endpoint: str
     _headers: dict[str, str]
 
-    def __init__(self, session: ClientSession):
+    def __init__(self, session: ClientSession, *,
+                 retry_policy: RetryPolicy | None = None,
+                 circuit_breakers: CircuitBreakerRegistry | None = None,
+                 rate_limiter: RateLimiter | None = None,
+                 coalesce: bool = True,
+                 persisted_queries: bool = False,
+                 codec: AbstractJsonCodec | None = None):
         """Initialize the auth."""
         self._session = session
         self._endpoint = DEFAULT_ENDPOINT
+        self._retry_policy = retry_policy
+        self._circuit_breakers = circuit_breakers
+        self._rate_limiter = rate_limiter
+        self._coalesce = coalesce
+        self._codec = codec or get_default_codec()
+        self._inflight: dict[tuple[str, str, str], asyncio.Task[Any]] = {}
+        # None until the first response tells whether the server supports persisted queries
+        self._persisted_queries = persisted_queries
+        self._persisted_queries_supported: bool | None = None
 
         self._headers = {
+            hdrs.CONTENT_TYPE: CONTENT_TYPE_JSON,
             hdrs.HOST: DEFAULT_HOST,
             hdrs.USER_AGENT: DEVICE_INFO[ATTR_BROWSER]
         }
@@ -37,66 +64,313 @@ class AbstractMyGasAuth(ABC):
                 hdrs.REFERER: DEFAULT_REFERER,
             })
 
+    @property
+    def identity(self) -> str:
+        """Return the identity the requests are made for."""
+        return ""
+
     @abstractmethod
     async def async_get_token(self) -> str:
         """Return a valid access token."""
 
+    async def async_invalidate_token(self, token: str) -> None:
+        """Forget a token that was rejected by the server."""
+
     async def async_request(self, query: queries.BaseQuery) -> Any:
-        """Make a request with token authorization."""
-        headers = {**self._headers, HEADER_TOKEN: await self.async_get_token()}
-        payload = query.to_json()
+        """Make a request with token authorization.
+
+        Concurrent identical read queries share one network call and one parsed result.
+        """
+        if not self._coalesce or query.IS_MUTATION:
+            return await self._async_request(query)
+        key = (self.identity, *query.cache_key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._async_request(query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_inflight_done(key, t))
+        else:
+            LOGGER.debug("Joining in-flight request %s", query.OPERATION_NAME)
+        # shield the shared request so that a cancelled caller does not abort it for others
+        return await asyncio.shield(task)
+
+    def _on_inflight_done(self, key: tuple[str, str, str], task: asyncio.Task[Any]) -> None:
+        """Forget a finished in-flight request."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # mark the exception as retrieved when every caller was cancelled
+            task.exception()
+
+    async def _async_request(self, query: queries.BaseQuery) -> Any:
+        """Make a request, signing in again once if the token is rejected."""
+        token = await self.async_get_token()
+        try:
+            return await self._async_request_with_token(query, token)
+        except MyGasTokenError as err:
+            LOGGER.debug("Token rejected (%s), signing in again", err)
+            await self.async_invalidate_token(token)
+            return await self._async_request_with_token(query, await self.async_get_token())
+
+    async def _async_post(self, query: queries.BaseQuery, headers: dict[str, str]) -> Any:
+        """Post the query and return the decoded response.
+
+        In persisted query mode only the query hash is sent. The full text is sent
+        when the server does not know the hash or does not support persisted queries.
+        """
+        if not self._persisted_queries or self._persisted_queries_supported is False:
+            return await self._async_post_payload(query.to_bytes(codec=self._codec), headers)
+        try:
+            r = await self._async_post_payload(
+                query.to_bytes(persisted=True, include_query=False, codec=self._codec), headers
+            )
+        except ClientResponseError as err:
+            if self._persisted_queries_supported is not None or err.status != 400:
+                raise
+            # the probe was rejected, so the server does not understand persisted queries
+            error = PERSISTED_QUERY_NOT_SUPPORTED
+        else:
+            error = get_persisted_query_error(r)
+            if error is None and self._persisted_queries_supported is None:
+                if self._is_token_error(r):
+                    # the rejected token tells nothing about the support, the replay probes again
+                    return r
+                if self._is_rejected_probe(r):
+                    error = PERSISTED_QUERY_NOT_SUPPORTED
+            if error is None:
+                self._persisted_queries_supported = True
+                return r
+        if error == PERSISTED_QUERY_NOT_FOUND:
+            self._persisted_queries_supported = True
+            LOGGER.debug("Registering persisted query %s", query.OPERATION_NAME)
+            return await self._async_post_payload(query.to_bytes(persisted=True, codec=self._codec), headers)
+        LOGGER.debug("Persisted queries are not supported, sending full queries")
+        self._persisted_queries_supported = False
+        return await self._async_post_payload(query.to_bytes(codec=self._codec), headers)
+
+    @staticmethod
+    def _is_token_error(response: Any) -> bool:
+        """Check if top-level GraphQL errors of a response reject the token."""
+        if not isinstance(response, dict):
+            return False
+        try:
+            check_graphql_errors(response)
+        except MyGasTokenError:
+            return True
+        return False
+
+    @classmethod
+    def _is_rejected_probe(cls, response: Any) -> bool:
+        """Check if a hash-only request failed for a reason other than the token."""
+        return (
+                isinstance(response, dict) and response.get(ATTR_DATA) is None
+                and not cls._is_token_error(response)
+        )
+
+    async def _async_post_payload(self, payload: bytes, headers: dict[str, str]) -> Any:
+        """Post the encoded payload and return the decoded response."""
         LOGGER.debug("Request with payload =%s, headers=%s", payload, headers)
+        async with self._session.post(
+            self._endpoint, data=payload, headers=headers, raise_for_status=True,
+        ) as resp:
+            body = await resp.read()
         try:
-            async with self._session.post(
-                self._endpoint, json=payload, headers=headers, raise_for_status=True,
-            ) as resp:
-                r = await resp.json()
-                LOGGER.debug("Response: %s", r)
-                return query.parse(r)
+            r = self._codec.loads(body)
+        except ValueError as err:
+            raise MyGasApiParseError(f"Invalid JSON response: {err}") from err
+        LOGGER.debug("Response: %s", r)
+        return r
+
+    async def _async_send(self, query: queries.BaseQuery, headers: dict[str, str]) -> Any:
+        """Post the query applying the retry policy and the circuit breaker."""
+        breaker = self._circuit_breakers.get(self._endpoint) if self._circuit_breakers is not None else None
+        attempt = 1
+        while True:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.async_acquire(self.identity, query.OPERATION_NAME)
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                response = await self._async_post(query, headers)
+            except (ClientError, asyncio.TimeoutError) as err:
+                if breaker is not None:
+                    if is_transient_error(err):
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                policy = self._retry_policy
+                if (policy is None or attempt >= policy.max_attempts
+                        or not policy.is_retryable(err, query.IS_MUTATION)):
+                    raise
+                delay = policy.get_delay(attempt, err)
+                LOGGER.debug("Request %s failed (%s), retrying in %.2f s", query.OPERATION_NAME, err, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+            except BaseException:
+                if breaker is not None:
+                    breaker.record_release()
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return response
+
+    async def _async_request_with_token(self, query: queries.BaseQuery, token: str) -> Any:
+        """Make a request with the given token."""
+        headers = {**self._headers, HEADER_TOKEN: token}
+        try:
+            r = await self._async_send(query, headers)
+        except ClientResponseError as err:
+            if err.status in AUTH_ERROR_STATUSES:
+                raise MyGasTokenError(f"Token rejected: {err}") from err
+            raise MyGasApiError(f"HTTP request failed: {err}") from err
         except ClientError as err:
             raise MyGasApiError(f"HTTP request failed: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise MyGasApiError("HTTP request timed out") from err
+        return query.parse(r)
+
+    async def aiter_request(self, query: queries.BaseQuery, path: tuple[str, ...]) -> AsyncIterator[Any]:
+        """Make a request and yield the items of the array at path in the operation result.
+
+        The response is parsed incrementally while it is received, so only one item is
+        held in memory. The full query is sent, requests are not coalesced or retried,
+        and the token is renewed once if it is rejected before the first item.
+        """
+        token = await self.async_get_token()
+        received = False
+        try:
+            async for item in self._aiter_request_with_token(query, path, token):
+                received = True
+                yield item
+        except MyGasTokenError as err:
+            if received:
+                raise
+            LOGGER.debug("Token rejected (%s), signing in again", err)
+            await self.async_invalidate_token(token)
+            async for item in self._aiter_request_with_token(query, path, await self.async_get_token()):
+                yield item
+
+    async def _aiter_request_with_token(self, query: queries.BaseQuery, path: tuple[str, ...],
+                                        token: str) -> AsyncIterator[Any]:
+        """Stream the items of the array at path with the given token."""
+        headers = {**self._headers, HEADER_TOKEN: token}
+        operation_path = (ATTR_DATA, query.OPERATION_NAME)
+        items_path = (*operation_path, *path, None)
+        parser = JsonStreamParser(
+            (items_path, (ATTR_ERRORS,), (*operation_path, ATTR_OK), (*operation_path, ATTR_ERROR)), self._codec
+        )
+        status: dict[str, Any] = {}
+        checked = False
+
+        def check() -> None:
+            """Raise the errors of the response."""
+            query.check_response({
+                ATTR_ERRORS: status.get(ATTR_ERRORS),
+                ATTR_DATA: {query.OPERATION_NAME: {ATTR_OK: status.get(ATTR_OK), ATTR_ERROR: status.get(ATTR_ERROR)}},
+            })
+
+        breaker = self._circuit_breakers.get(self._endpoint) if self._circuit_breakers is not None else None
+        if self._rate_limiter is not None:
+            await self._rate_limiter.async_acquire(self.identity, query.OPERATION_NAME)
+        if breaker is not None:
+            breaker.before_request()
+        try:
+            async with self._session.post(
+                self._endpoint, data=query.to_bytes(codec=self._codec), headers=headers, raise_for_status=True,
+            ) as resp:
+                async for chunk in resp.content.iter_any():
+                    for value_path, value in parser.feed(chunk):
+                        if len(value_path) != len(items_path):
+                            status[value_path[-1]] = value
+                            continue
+                        if not checked and ATTR_OK in status:
+                            check()
+                            checked = True
+                        yield value
+            parser.close()
+        except (ClientError, asyncio.TimeoutError) as err:
+            if breaker is not None:
+                if is_transient_error(err):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if isinstance(err, ClientResponseError) and err.status in AUTH_ERROR_STATUSES:
+                raise MyGasTokenError(f"Token rejected: {err}") from err
+            if isinstance(err, ClientError):
+                raise MyGasApiError(f"HTTP request failed: {err}") from err
+            raise MyGasApiError("HTTP request timed out") from err
+        except BaseException:
+            if breaker is not None:
+                breaker.record_release()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        check()
 
 
 class SimpleMyGasAuth(AbstractMyGasAuth):
-    """Simple implementation of AbstractMyGasAuth."""
+    """Simple implementation of AbstractMyGasAuth.
+
+    A coordinator requires a token store shared between the processes, such as
+    JsonFileTokenStore or SqliteTokenStore on a common path, so that the processes
+    waiting for the sign-in lock reuse the token saved by the one holding it.
+    """
     _identifier: str
     _password: str
 
     def __init__(self,
                  identifier: str,
                  password: str,
-                 session: ClientSession) -> None:
+                 session: ClientSession,
+                 token_store: AbstractTokenStore | None = None,
+                 coordinator: AbstractAuthCoordinator | None = None,
+                 refresh_margin: float = DEFAULT_TOKEN_REFRESH_MARGIN,
+                 **kwargs: Any) -> None:
         """Initialize the auth."""
-        super().__init__(session)
+        if not 0 <= refresh_margin < CLIENT_SESSION_LIFETIME - CLOCK_OUT_OF_SYNC_MAX_SEC:
+            raise ValueError(
+                f"refresh_margin must be at least 0 and less than {CLIENT_SESSION_LIFETIME - CLOCK_OUT_OF_SYNC_MAX_SEC}"
+            )
+        if coordinator is not None and (token_store is None or isinstance(token_store, MemoryTokenStore)):
+            raise ValueError("coordinator requires a token store shared between processes")
+        super().__init__(session, **kwargs)
         self._identifier = identifier
         self._password = password
         self._token: dict[str, Any] = {}
-        self._lock = asyncio.Lock()
+        self._token_store = token_store
+        self._coordinator = coordinator
+        self._refresh_margin = refresh_margin
+        self._refresh_task: asyncio.Task[dict[str, Any]] | None = None
+        # monotonic time of the last failed background refresh
+        self._refresh_failed_at: float | None = None
+
+    @property
+    def identity(self) -> str:
+        """Return the identity the requests are made for."""
+        return self._identifier
 
     async def _async_token_request(self) -> dict[str, Any]:
         """Make a token request."""
         LOGGER.debug("Token request for %s", self._identifier)
         query = queries.SignIn(self._identifier, self._password)
-        payload = query.to_json()
         try:
-            async with self._session.post(
-                self._endpoint, json=payload, headers=self._headers, raise_for_status=True,
-            ) as resp:
-                r = await resp.json()
-                LOGGER.debug("Response: %s", r)
-                try:
-                    response = query.parse(r)
-                    token = response[ATTR_TOKEN]
-                    expires_at = time.time() + CLIENT_SESSION_LIFETIME
-                    LOGGER.debug("Token request finished token = %s expires at %s", token, expires_at)
-                    return {
-                        ATTR_TOKEN: token,
-                        ATTR_EXPIRES_AT: expires_at
-                    }
-                except MyGasApiError as e:
-                    raise MyGasAuthError(e) from e
+            r = await self._async_send(query, self._headers)
         except ClientError as err:
             raise MyGasAuthError(f"Token request failed: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise MyGasAuthError("Token request timed out") from err
+        try:
+            response = query.parse(r)
+        except MyGasApiError as e:
+            raise MyGasAuthError(e) from e
+        token = response[ATTR_TOKEN]
+        expires_at = time.time() + CLIENT_SESSION_LIFETIME
+        LOGGER.debug("Token request finished token = %s expires at %s", token, expires_at)
+        return {
+            ATTR_TOKEN: token,
+            ATTR_EXPIRES_AT: expires_at
+        }
 
     @staticmethod
     def _is_valid_token(token: dict[str, Any]) -> bool:
@@ -113,10 +387,106 @@ class SimpleMyGasAuth(AbstractMyGasAuth):
                 < time.time() + CLOCK_OUT_OF_SYNC_MAX_SEC
         )
 
+    def _is_usable_token(self, token: dict[str, Any] | None) -> bool:
+        """Check if token is valid and not expired."""
+        return self._is_valid_token(token) and not self._is_expired_token(token)
+
+    def _is_fresh_token(self, token: dict[str, Any] | None) -> bool:
+        """Check if token is usable and does not need a refresh yet."""
+        return (
+                self._is_usable_token(token)
+                and cast(float, token[ATTR_EXPIRES_AT]) - self._refresh_margin > time.time()
+        )
+
+    async def _async_load_token(self, fresh: bool = False) -> dict[str, Any] | None:
+        """Load a usable token from the token store, with fresh only one that does not need a refresh."""
+        if self._token_store is None:
+            return None
+        token = await self._token_store.async_load(self._identifier)
+        if not (self._is_fresh_token(token) if fresh else self._is_usable_token(token)):
+            return None
+        LOGGER.debug("Loaded token for %s from store", self._identifier)
+        return token
+
+    async def _async_save_token(self, token: dict[str, Any]) -> None:
+        """Save token to the token store."""
+        if self._token_store is not None:
+            await self._token_store.async_save(self._identifier, token)
+
+    async def _async_refresh_token(self, background: bool = False) -> dict[str, Any]:
+        """Load the token from the store or sign in.
+
+        A background refresh only reuses a stored token that does not need a refresh itself.
+        """
+        token = await self._async_load_token(fresh=background)
+        if token is not None:
+            return token
+        if self._coordinator is None:
+            token = await self._async_token_request()
+            await self._async_save_token(token)
+            return token
+        async with self._coordinator.async_lock(self._identifier):
+            # another process may have signed in while we were waiting for the lock
+            token = await self._async_load_token(fresh=background)
+            if token is None:
+                token = await self._async_token_request()
+                await self._async_save_token(token)
+        return token
+
+    async def _async_refresh_and_store_token(self, background: bool = False) -> dict[str, Any]:
+        """Refresh the token and make it current."""
+        token = await self._async_refresh_token(background)
+        self._token = token
+        return token
+
+    def _get_refresh_task(self, background: bool = False) -> asyncio.Task[dict[str, Any]]:
+        """Return the running refresh task or start a new one."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._async_refresh_and_store_token(background))
+            self._refresh_task.add_done_callback(partial(self._on_refresh_done, background))
+        return self._refresh_task
+
+    def _on_refresh_done(self, background: bool, task: asyncio.Task[dict[str, Any]]) -> None:
+        """Retrieve the refresh error, logging it if the refresh was started in the background."""
+        if task.cancelled():
+            return
+        if (err := task.exception()) is None:
+            self._refresh_failed_at = None
+            return
+        if background:
+            self._refresh_failed_at = time.monotonic()
+            LOGGER.warning("Background token refresh for %s failed: %s", self._identifier, err)
+        else:
+            LOGGER.debug("Token refresh for %s failed: %s", self._identifier, err)
+
+    def _start_background_refresh(self) -> None:
+        """Renew the token in the background unless the last background refresh failed recently."""
+        if (self._refresh_failed_at is not None
+                and time.monotonic() - self._refresh_failed_at < DEFAULT_TOKEN_REFRESH_RETRY_DELAY):
+            return
+        self._get_refresh_task(background=True)
+
+    async def async_invalidate_token(self, token: str) -> None:
+        """Forget a token that was rejected by the server."""
+        if self._token.get(ATTR_TOKEN) == token:
+            self._token = {}
+        if self._token_store is not None:
+            stored_token = await self._token_store.async_load(self._identifier)
+            if stored_token and stored_token.get(ATTR_TOKEN) == token:
+                await self._token_store.async_delete(self._identifier)
+
     async def async_get_token(self) -> str:
         """Get access token."""
-        async with self._lock:
-            if not self._is_valid_token(self._token) or self._is_expired_token(self._token):
-                self._token = await self._async_token_request()
+        token = self._token
+        if self._is_usable_token(token):
+            if not self._is_fresh_token(token):
+                # renew in the background, the current token is still accepted
+                self._start_background_refresh()
+            return token[ATTR_TOKEN]
 
-        return self._token[ATTR_TOKEN]
+        # shield the shared refresh so that a cancelled caller does not abort it for others
+        token = await asyncio.shield(self._get_refresh_task())
+        if not self._is_fresh_token(token):
+            # a stored token close to expiry is used while it is renewed
+            self._start_background_refresh()
+        return token[ATTR_TOKEN]
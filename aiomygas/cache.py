@@ -0,0 +1,309 @@
+"""Response caches for MyGas API."""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .codec import AbstractJsonCodec, get_default_codec
+from .const import LOGGER, DEFAULT_CACHE_MAX_SIZE, DEFAULT_DISK_CACHE_MAX_BYTES
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+_DECOMPRESS_ERRORS: tuple[type[Exception], ...] = (zlib.error,) if zstandard is None \
+    else (zlib.error, zstandard.ZstdError)
+
+CacheKey = tuple[str, str, str]
+
+
+class CacheEntry(NamedTuple):
+    """Cached response with its storage time, expiration time and tags."""
+    value: Any
+    stored_at: float
+    expires_at: float
+    tags: frozenset[str] = frozenset()
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        """Check if the entry has not expired yet."""
+        return (time.time() if now is None else now) < self.expires_at
+
+
+@dataclass
+class CacheStats:
+    """Cache statistics."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Return the share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class AbstractResponseCache(ABC):
+    """Abstract class to cache responses by (identity, operation name, variables).
+
+    Expired entries are kept until they are evicted, so that callers may still
+    use them when the backend is unavailable.
+    """
+    stats: CacheStats
+
+    @abstractmethod
+    async def async_get(self, key: CacheKey) -> CacheEntry | None:
+        """Return the entry for key, fresh or expired, and count a hit or a miss."""
+
+    @abstractmethod
+    async def async_set(self, key: CacheKey, value: Any, ttl: float, tags: frozenset[str] = frozenset()) -> None:
+        """Store value for key for ttl seconds."""
+
+    @abstractmethod
+    async def async_invalidate(self, identity: str | None = None, operation: str | None = None,
+                               tag: str | None = None) -> int:
+        """Remove the entries matching all given conditions and return their number."""
+
+
+class MemoryResponseCache(AbstractResponseCache):
+    """Response cache that keeps at most max_size entries in memory, evicting the least recently used."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_MAX_SIZE) -> None:
+        """Initialize the cache."""
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._max_size = max_size
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self._entries)
+
+    async def async_get(self, key: CacheKey) -> CacheEntry | None:
+        """Return the entry for key, fresh or expired, and count a hit or a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry.is_fresh():
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+        return entry
+
+    async def async_set(self, key: CacheKey, value: Any, ttl: float, tags: frozenset[str] = frozenset()) -> None:
+        """Store value for key for ttl seconds."""
+        now = time.time()
+        self._entries[key] = CacheEntry(value, now, now + ttl, tags)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def async_invalidate(self, identity: str | None = None, operation: str | None = None,
+                               tag: str | None = None) -> int:
+        """Remove the entries matching all given conditions and return their number."""
+        keys = [
+            key for key, entry in self._entries.items()
+            if (identity is None or key[0] == identity)
+            and (operation is None or key[1] == operation)
+            and (tag is None or tag in entry.tags)
+        ]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+
+class SqliteResponseCache(AbstractResponseCache):
+    """Response cache that keeps compressed responses in a SQLite database.
+
+    Responses are compressed with zstd if zstandard is installed, with zlib
+    otherwise. The least recently used entries are evicted when the total size
+    of compressed responses exceeds max_bytes.
+    """
+
+    def __init__(self, path: str | os.PathLike[str],
+                 max_bytes: int = DEFAULT_DISK_CACHE_MAX_BYTES,
+                 codec: AbstractJsonCodec | None = None) -> None:
+        """Initialize the cache."""
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._codec = codec or get_default_codec()
+        self._compression = "zstd" if zstandard is not None else "zlib"
+        self._lock = asyncio.Lock()
+        self._initialized = False
+        self.stats = CacheStats()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection and create the schema if needed."""
+        if not self._initialized:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "identity TEXT NOT NULL, operation TEXT NOT NULL, variables TEXT NOT NULL, "
+                "value BLOB NOT NULL, compression TEXT NOT NULL, size INTEGER NOT NULL, "
+                "stored_at REAL NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "tags TEXT NOT NULL, PRIMARY KEY (identity, operation, variables))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            # running total of the compressed sizes, seeded once and kept up to date by triggers
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses_size ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO responses_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN "
+                "UPDATE responses_size SET total = total + NEW.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN "
+                "UPDATE responses_size SET total = total - OLD.size + NEW.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN "
+                "UPDATE responses_size SET total = total - OLD.size; END"
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _compress(self, data: bytes) -> bytes:
+        """Compress data."""
+        if self._compression == "zstd":
+            return zstandard.ZstdCompressor().compress(data)
+        return zlib.compress(data)
+
+    @staticmethod
+    def _decompress(data: bytes, compression: str) -> bytes | None:
+        """Decompress data, return None if the compression is not supported."""
+        if compression == "zstd":
+            return zstandard.ZstdDecompressor().decompress(data) if zstandard is not None else None
+        if compression == "zlib":
+            return zlib.decompress(data)
+        return None
+
+    def _get(self, key: CacheKey) -> CacheEntry | None:
+        """Return the entry for key."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, compression, stored_at, expires_at, tags FROM responses "
+                "WHERE identity = ? AND operation = ? AND variables = ?", key
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE responses SET accessed_at = ? "
+                    "WHERE identity = ? AND operation = ? AND variables = ?", (time.time(), *key)
+                )
+        conn.close()
+        if row is None:
+            return None
+        value, compression, stored_at, expires_at, tags = row
+        try:
+            data = self._decompress(value, compression)
+            if data is None:
+                return None
+            return CacheEntry(self._codec.loads(data), stored_at, expires_at, frozenset(tags.split()))
+        except (ValueError, *_DECOMPRESS_ERRORS) as err:
+            LOGGER.warning("Unable to decode cached response %s: %s", key[1], err)
+            return None
+
+    def _set(self, key: CacheKey, value: Any, ttl: float, tags: frozenset[str]) -> int:
+        """Store value for key and return the number of evicted entries."""
+        blob = self._compress(self._codec.dumps(value))
+        now = time.time()
+        evicted = 0
+        with self._connect() as conn:
+            # an upsert fires the update trigger, REPLACE would skip the delete trigger
+            conn.execute(
+                "INSERT INTO responses (identity, operation, variables, value, compression, size, "
+                "stored_at, expires_at, accessed_at, tags) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (identity, operation, variables) DO UPDATE SET value = excluded.value, "
+                "compression = excluded.compression, size = excluded.size, stored_at = excluded.stored_at, "
+                "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at, tags = excluded.tags",
+                (*key, blob, self._compression, len(blob), now, now + ttl, now, f" {' '.join(sorted(tags))} "),
+            )
+            total = conn.execute("SELECT total FROM responses_size").fetchone()[0]
+            if total > self._max_bytes:
+                # the entry just stored is kept even if it exceeds max_bytes alone
+                rows = conn.execute(
+                    "SELECT rowid, size FROM responses "
+                    "WHERE NOT (identity = ? AND operation = ? AND variables = ?) ORDER BY accessed_at, rowid", key
+                )
+                rowids = []
+                for rowid, size in rows:
+                    if total <= self._max_bytes:
+                        break
+                    rowids.append((rowid,))
+                    total -= size
+                rows.close()
+                conn.executemany("DELETE FROM responses WHERE rowid = ?", rowids)
+                evicted = len(rowids)
+        conn.close()
+        return evicted
+
+    def _invalidate(self, identity: str | None, operation: str | None, tag: str | None) -> int:
+        """Remove the entries matching all given conditions."""
+        conditions = []
+        params: list[str] = []
+        if identity is not None:
+            conditions.append("identity = ?")
+            params.append(identity)
+        if operation is not None:
+            conditions.append("operation = ?")
+            params.append(operation)
+        if tag is not None:
+            conditions.append("instr(tags, ?) > 0")
+            params.append(f" {tag} ")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            count = conn.execute(f"DELETE FROM responses{where}", params).rowcount
+        conn.close()
+        return count
+
+    async def async_get(self, key: CacheKey) -> CacheEntry | None:
+        """Return the entry for key, fresh or expired, and count a hit or a miss."""
+        async with self._lock:
+            try:
+                entry = await asyncio.to_thread(self._get, key)
+            except (OSError, sqlite3.Error) as err:
+                LOGGER.warning("Unable to read response cache %s: %s", self._path, err)
+                entry = None
+        if entry is not None and entry.is_fresh():
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+        return entry
+
+    async def async_set(self, key: CacheKey, value: Any, ttl: float, tags: frozenset[str] = frozenset()) -> None:
+        """Store value for key for ttl seconds."""
+        async with self._lock:
+            try:
+                self.stats.evictions += await asyncio.to_thread(self._set, key, value, ttl, tags)
+            except (OSError, sqlite3.Error) as err:
+                LOGGER.warning("Unable to write response cache %s: %s", self._path, err)
+
+    async def async_invalidate(self, identity: str | None = None, operation: str | None = None,
+                               tag: str | None = None) -> int:
+        """Remove the entries matching all given conditions and return their number."""
+        async with self._lock:
+            try:
+                return await asyncio.to_thread(self._invalidate, identity, operation, tag)
+            except (OSError, sqlite3.Error) as err:
+                LOGGER.warning("Unable to write response cache %s: %s", self._path, err)
+                return 0
@@ -2,25 +2,108 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import io
+import json
 import logging
+import sys
+from collections.abc import Awaitable, Callable, Collection, Iterable
+from contextlib import redirect_stdout
+from contextvars import ContextVar
 from datetime import datetime
+from functools import partial
 from pprint import pprint
-from typing import Any
+from typing import Any, TextIO, TypeVar
 
 from aiohttp import ClientSession
 
 from . import __version__
-from .api import MyGasApi
+from .api import MyGasApi, get_snapshot_account_ids
 from .auth import SimpleMyGasAuth
-from .const import LOG_LEVELS
+from .const import LOG_LEVELS, DEFAULT_CLI_CONCURRENCY, SNAPSHOT_ELS_INFO, SNAPSHOT_LSPU_INFO, SNAPSHOT_CHARGES, \
+    SNAPSHOT_PAYMENTS
+from .retry import RetryPolicy
+
+_T = TypeVar("_T")
+# output buffer of the current task and the limit of concurrent requests
+_OUTPUT: ContextVar[io.StringIO | None] = ContextVar("output", default=None)
+_LIMIT: ContextVar[asyncio.Semaphore | None] = ContextVar("limit", default=None)
+
+
+class _OrderedStdout:
+    """Stdout that writes to the output buffer of the current task, if any."""
+
+    def __init__(self, stream: TextIO) -> None:
+        """Initialize with the real stream."""
+        self._stream = stream
+
+    def write(self, text: str) -> int:
+        """Write text to the buffer of the current task or to the stream."""
+        return (_OUTPUT.get() or self._stream).write(text)
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the stream."""
+        return getattr(self._stream, name)
+
+
+async def limited(aw: Awaitable[_T]) -> _T:
+    """Await aw holding one of the --concurrency slots."""
+    semaphore = _LIMIT.get()
+    if semaphore is None:
+        return await aw
+    async with semaphore:
+        return await aw
+
+
+async def run_ordered(jobs: Iterable[Callable[[], Awaitable[Any]]], limit: bool = True,
+                      interactive: Collection[int] = ()) -> list[Any]:
+    """Run jobs concurrently and print their output in the order of jobs.
+
+    The output of a job is buffered and printed once all jobs before it have finished.
+    With limit each job holds one of the --concurrency slots, so only jobs that make
+    requests themselves should be limited. Jobs with an index in interactive may prompt:
+    they run unbuffered when all output before them has been printed.
+    """
+    jobs = list(jobs)
+    buffers = [io.StringIO() for _ in jobs]
+
+    async def run(job: Callable[[], Awaitable[Any]], buffer: io.StringIO) -> Any:
+        """Run a job writing to its buffer."""
+        _OUTPUT.set(buffer)
+        return await (limited(job()) if limit else job())
+
+    stdout = sys.stdout if isinstance(sys.stdout, _OrderedStdout) else _OrderedStdout(sys.stdout)
+    with redirect_stdout(stdout):
+        tasks = [
+            None if index in interactive else asyncio.create_task(run(job, buffer))
+            for index, (job, buffer) in enumerate(zip(jobs, buffers))
+        ]
+        results = []
+        try:
+            for job, task, buffer in zip(jobs, tasks, buffers):
+                if task is None:
+                    results.append(await job())
+                    continue
+                try:
+                    results.append(await task)
+                finally:
+                    sys.stdout.write(buffer.getvalue())
+        finally:
+            for task in tasks:
+                if task is not None:
+                    task.cancel()
+    return results
 
 
 def get_arguments() -> argparse.Namespace:
     """Get parsed passed in arguments."""
     parser = argparse.ArgumentParser(description="Command line tool for MyGas API")
     # username and password are required positional arguments for the API
-    parser.add_argument('identifier', help="User identifier (email) for MyGas API")
-    parser.add_argument('password', help="password for MyGas API")
+    parser.add_argument('identifier', nargs='?', help="User identifier (email) for MyGas API")
+    parser.add_argument('password', nargs='?', help="password for MyGas API")
+    # batch reads identifiers and passwords from a file instead
+    parser.add_argument('--batch', metavar='FILE',
+                        help="read 'identifier password' lines from FILE ('-' for stdin) and print JSON lines")
     # client_info is an optional argument to get client info
     parser.add_argument('--client', action='store_true', help="get client info")
     # accounts is an optional argument to get accounts
@@ -35,12 +118,21 @@ def get_arguments() -> argparse.Namespace:
     parser.add_argument('--info', action='store_true', help="get info")
     # send is an optional argument to send reading
     parser.add_argument('--send', action='store_true', help="send reading")
+    # concurrency is the maximum number of requests at once
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CLI_CONCURRENCY, metavar='N',
+                        help=f"maximum number of concurrent requests (default {DEFAULT_CLI_CONCURRENCY})")
     # -v is a flag that can be used multiple times to increase the verbosity level
     parser.add_argument('-v', '--verbose', action='count', default=0, help="increase verbosity level")
     # -V is a flag that prints the version number
     parser.add_argument("-V", "--version", action="version", version=__version__)
 
     arguments = parser.parse_args()
+    if arguments.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if arguments.batch is None and (arguments.identifier is None or arguments.password is None):
+        parser.error("identifier and password are required without --batch")
+    if arguments.batch is not None and (arguments.identifier is not None or arguments.receipt or arguments.send):
+        parser.error("--batch can not be used with identifier, password, --receipt or --send")
 
     return arguments
 
@@ -52,44 +144,169 @@ async def cli() -> None:
     # Setup logging and the log level according to the "-v" option
     logging.basicConfig(level=LOG_LEVELS.get(args.verbose, logging.INFO))
 
+    if args.batch is not None:
+        await run_batch(args)
+        return
+
     identifier = args.identifier
     password = args.password
 
     # create session
     async with ClientSession() as session:
         # create auth and api
-        auth = SimpleMyGasAuth(identifier, password, session)
+        auth = SimpleMyGasAuth(identifier, password, session, retry_policy=RetryPolicy())
         api = MyGasApi(auth)
+        _LIMIT.set(asyncio.Semaphore(args.concurrency))
+
+        # independent requests run concurrently, output is printed in this order
+        jobs: list[Callable[[], Awaitable[Any]]] = []
+        interactive: list[int] = []
 
         # get client info for identifier
         if args.client:
-            await get_client_info(api, identifier)
+            jobs.append(lambda: limited(get_client_info(api, identifier)))
 
         # get accounts for identifier
         if args.accounts or args.charges or args.payments or args.receipt or args.info or args.send:
-            print(f"Accounts for {identifier}:")
-            _accounts = await api.async_get_accounts()
-            pprint(_accounts)
+            accounts_task = asyncio.create_task(limited(api.async_get_accounts()))
+
+            async def print_accounts() -> None:
+                """Print the accounts."""
+                print(f"Accounts for {identifier}:")
+                pprint(await accounts_task)
+
+            async def with_accounts(func: Callable[[MyGasApi, str, dict[str, Any]], Awaitable[None]]) -> None:
+                """Run a command for the accounts once they are received."""
+                await func(api, identifier, await accounts_task)
+
+            jobs.append(print_accounts)
 
             # get charges for each account
             if args.charges:
-                await get_charges(api, identifier, _accounts)
+                jobs.append(partial(with_accounts, get_charges))
 
             # get payments for each account
             if args.payments:
-                await get_payments(api, identifier, _accounts)
+                jobs.append(partial(with_accounts, get_payments))
 
             # get receipts for each account
             if args.receipt:
-                await get_receipts(api, identifier, _accounts)
+                interactive.append(len(jobs))
+                jobs.append(partial(with_accounts, get_receipts))
 
             # get info for each account
             if args.info:
-                await get_info(api, identifier, _accounts)
+                jobs.append(partial(with_accounts, get_info))
 
             # send reading for each account
             if args.send:
-                await send_readings(api, identifier, _accounts)
+                interactive.append(len(jobs))
+                jobs.append(partial(with_accounts, send_readings))
+
+        await run_ordered(jobs, limit=False, interactive=interactive)
+
+
+def read_credentials(lines: Iterable[str]) -> list[tuple[str, str]]:
+    """Read identifier and password pairs, one per line separated by whitespace.
+
+    Empty lines and lines starting with # are skipped.
+    """
+    credentials = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split(None, 1)
+        if len(parts) != 2:
+            raise ValueError(f"Line {number}: expected identifier and password")
+        credentials.append((parts[0], parts[1]))
+    return credentials
+
+
+def print_json_line(identifier: str, operation: str, **fields: Any) -> None:
+    """Print the result of an operation for an identity as a JSON line."""
+    print(json.dumps({"identifier": identifier, "operation": operation, **fields}, ensure_ascii=False, default=str),
+          flush=True)
+
+
+async def process_identity(session: ClientSession, identifier: str, password: str,
+                           args: argparse.Namespace) -> None:
+    """Fetch the data of an identity and print a JSON line per operation as soon as it is complete.
+
+    Every request holds one of the --concurrency slots.
+    """
+    auth = SimpleMyGasAuth(identifier, password, session, retry_policy=RetryPolicy())
+    api = MyGasApi(auth)
+    methods = {
+        SNAPSHOT_ELS_INFO: api.async_get_els_info,
+        SNAPSHOT_LSPU_INFO: api.async_get_lspu_info,
+        SNAPSHOT_CHARGES: api.async_get_charges,
+        SNAPSHOT_PAYMENTS: api.async_get_payments,
+    }
+    include = [
+        kind for kind, enabled in (
+            (SNAPSHOT_ELS_INFO, args.info),
+            (SNAPSHOT_LSPU_INFO, args.info),
+            (SNAPSHOT_CHARGES, args.charges),
+            (SNAPSHOT_PAYMENTS, args.payments),
+        ) if enabled
+    ]
+
+    async def get_client() -> None:
+        """Print the client info."""
+        try:
+            print_json_line(identifier, "client", data=await limited(api.async_get_client_info()))
+        except Exception as err:
+            print_json_line(identifier, "client", error=str(err) or type(err).__name__)
+
+    async def get_data(kind: str, account_ids: list[int]) -> None:
+        """Print the data of the accounts of a kind with the errors of single accounts."""
+        results = await asyncio.gather(
+            *(limited(methods[kind](account_id)) for account_id in account_ids), return_exceptions=True
+        )
+        data, errors = {}, {}
+        for account_id, result in zip(account_ids, results):
+            if isinstance(result, Exception):
+                errors[account_id] = str(result) or type(result).__name__
+            else:
+                data[account_id] = result
+        print_json_line(identifier, kind, data=data, **({"errors": errors} if errors else {}))
+
+    async def get_accounts() -> None:
+        """Print the accounts and then the data of every account."""
+        try:
+            accounts = await limited(api.async_get_accounts())
+        except Exception as err:
+            print_json_line(identifier, "accounts", error=str(err) or type(err).__name__)
+            return
+        print_json_line(identifier, "accounts", data=accounts)
+        account_ids = get_snapshot_account_ids(accounts)
+        await asyncio.gather(*(get_data(kind, account_ids[kind]) for kind in include))
+
+    await asyncio.gather(*((get_client(),) if args.client else ()), get_accounts())
+
+
+async def run_batch(args: argparse.Namespace) -> None:
+    """Process the identities of a credentials file concurrently over one session.
+
+    At most --concurrency requests run at once over all identities. A failure is
+    printed as an error line of its identity and does not stop the others.
+    """
+    if args.batch == "-":
+        credentials = read_credentials(sys.stdin)
+    else:
+        with open(args.batch, encoding="utf-8") as f:
+            credentials = read_credentials(f)
+    _LIMIT.set(asyncio.Semaphore(args.concurrency))
+
+    async with ClientSession() as session:
+        async def process(identifier: str, password: str) -> None:
+            try:
+                await process_identity(session, identifier, password, args)
+            except Exception as err:
+                print_json_line(identifier, "batch", error=str(err) or type(err).__name__)
+
+        await asyncio.gather(*(process(identifier, password) for identifier, password in credentials))
 
 
 async def send_readings(api: MyGasApi, identifier: str, accounts: dict[str, Any]) -> None:
@@ -166,7 +383,7 @@ async def get_info(api: MyGasApi, identifier: str, accounts: dict[str, Any]) ->
 async def get_lspu_info(api: MyGasApi, accounts: dict[str, Any]) -> None:
     """Get info for each lspu account."""
     if accounts.get("lspu"):
-        for lspu in accounts["lspu"]:
+        async def get_account_info(lspu: dict[str, Any]) -> None:
             print(f"Info for {lspu['id']} ({lspu['account']}):")
             if lspu.get('alias'):
                 print(f"Alias: {lspu['alias']}")
@@ -175,6 +392,8 @@ async def get_lspu_info(api: MyGasApi, accounts: dict[str, Any]) -> None:
                 pprint(_info)
             except Exception as e:
                 print(f"Error getting info for {lspu['id']}: {e}")
+
+        await run_ordered(partial(get_account_info, lspu) for lspu in accounts["lspu"])
     else:
         print(f"Account does not have 'lspu' in accounts info")
 
@@ -182,7 +401,7 @@ async def get_lspu_info(api: MyGasApi, accounts: dict[str, Any]) -> None:
 async def get_els_info(api: MyGasApi, accounts: dict[str, Any]) -> None:
     """Get info for each els account."""
     if accounts.get("elsGroup"):
-        for els_group in accounts["elsGroup"]:
+        async def get_account_info(els_group: dict[str, Any]) -> None:
             print(f"Info for {els_group['els']['id']} ({els_group['els']['jntAccountNum']}):")
             if els_group['els']['alias']:
                 print(f"Alias: {els_group['els']['alias']}")
@@ -191,6 +410,8 @@ async def get_els_info(api: MyGasApi, accounts: dict[str, Any]) -> None:
                 pprint(_info)
             except Exception as e:
                 print(f"Error getting info for {els_group['els']['id']}: {e}")
+
+        await run_ordered(partial(get_account_info, els_group) for els_group in accounts["elsGroup"])
     else:
         print(f"Account does not have 'elsGroup' in accounts info")
 
@@ -206,7 +427,7 @@ async def get_receipts(api: MyGasApi, identifier: str, accounts: dict[str, Any])
     else:
         email = None
     if accounts.get("elsGroup"):
-        for els_group in accounts["elsGroup"]:
+        async def get_els_receipt(els_group: dict[str, Any]) -> None:
             print(f"Receipt for {els_group['els']['id']} ({els_group['els']['jntAccountNum']}):")
             if els_group['els']['alias']:
                 print(f"Alias: {els_group['els']['alias']}")
@@ -215,8 +436,10 @@ async def get_receipts(api: MyGasApi, identifier: str, accounts: dict[str, Any])
                 pprint(_receipt)
             except Exception as e:
                 print(f"Error getting receipt for {els_group['els']['id']}: {e}")
+
+        await run_ordered(partial(get_els_receipt, els_group) for els_group in accounts["elsGroup"])
     elif accounts.get("lspu"):
-        for lspu in accounts["lspu"]:
+        async def get_lspu_receipt(lspu: dict[str, Any]) -> None:
             print(f"Receipt for {lspu['id']} ({lspu['account']}):")
             if lspu['alias']:
                 print(f"Alias: {lspu['alias']}")
@@ -225,6 +448,8 @@ async def get_receipts(api: MyGasApi, identifier: str, accounts: dict[str, Any])
                 pprint(_receipt)
             except Exception as e:
                 print(f"Error getting receipt for {lspu['id']}: {e}")
+
+        await run_ordered(partial(get_lspu_receipt, lspu) for lspu in accounts["lspu"])
     else:
         print(f"Account does not have 'elsGroup' or 'lspu' in accounts info")
 
@@ -233,9 +458,11 @@ async def get_payments(api: MyGasApi, identifier: str, accounts: dict[str, Any])
     """Get payments for each account."""
     print(f"Payments for {identifier}:")
     if accounts.get("elsGroup"):
-        for els_group in accounts["elsGroup"]:
+        async def get_els_payments(els_group: dict[str, Any]) -> None:
             print(f"Payments for {els_group['els']['id']} ({els_group['els']['alias']}):")
             await get_payments_lspu(api, els_group["lspu"])
+
+        await run_ordered((partial(get_els_payments, els_group) for els_group in accounts["elsGroup"]), limit=False)
     elif accounts.get("lspu"):
         await get_payments_lspu(api, accounts["lspu"])
     else:
@@ -243,7 +470,7 @@ async def get_payments(api: MyGasApi, identifier: str, accounts: dict[str, Any])
 
 
 async def get_payments_lspu(api: MyGasApi, lspu_list: list | None) -> None:
-    for lspu in lspu_list:
+    async def get_account_payments(lspu: dict[str, Any]) -> None:
         try:
             _payments = await api.async_get_payments(lspu["id"])
             print(f"Payments for {lspu['account']}:")
@@ -251,14 +478,18 @@ async def get_payments_lspu(api: MyGasApi, lspu_list: list | None) -> None:
         except Exception as e:
             print(f"Error getting payments for {lspu['account']}: {e}")
 
+    await run_ordered(partial(get_account_payments, lspu) for lspu in lspu_list)
+
 
 async def get_charges(api: MyGasApi, identifier: str, accounts: dict[str, Any]) -> None:
     """Get charges for each account."""
     print(f"Charges for {identifier}:")
     if accounts.get("elsGroup"):
-        for els_group in accounts["elsGroup"]:
+        async def get_els_charges(els_group: dict[str, Any]) -> None:
             print(f"Charges for {els_group['els']['id']} ({els_group['els']['alias']}):")
             await get_charges_lspu(api, els_group["lspu"])
+
+        await run_ordered((partial(get_els_charges, els_group) for els_group in accounts["elsGroup"]), limit=False)
     elif accounts.get("lspu"):
         await get_charges_lspu(api, accounts["lspu"])
     else:
@@ -266,7 +497,7 @@ async def get_charges(api: MyGasApi, identifier: str, accounts: dict[str, Any])
 
 
 async def get_charges_lspu(api: MyGasApi, lspu_list: list) -> None:
-    for lspu in lspu_list:
+    async def get_account_charges(lspu: dict[str, Any]) -> None:
         try:
             _charges = await api.async_get_charges(lspu["id"])
             print(f"Charges for {lspu['account']}:")
@@ -274,6 +505,8 @@ async def get_charges_lspu(api: MyGasApi, lspu_list: list) -> None:
         except Exception as e:
             print(f"Error getting charges for {lspu['account']}: {e}")
 
+    await run_ordered(partial(get_account_charges, lspu) for lspu in lspu_list)
+
 
 async def get_client_info(api: MyGasApi, identifier: str) -> None:
     """Get client info for identifier."""
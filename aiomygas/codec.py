@@ -0,0 +1,92 @@
+"""JSON codecs for MyGas API requests and responses."""
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore[assignment]
+
+
+class AbstractJsonCodec(ABC):
+    """Abstract class to encode request bodies and decode response bodies."""
+    name: str
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Encode obj to JSON bytes."""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON bytes, raise ValueError on invalid input."""
+
+
+class StdlibJsonCodec(AbstractJsonCodec):
+    """Codec based on the json module from the standard library."""
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode obj to JSON bytes."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON bytes, raise ValueError on invalid input."""
+        return json.loads(data)
+
+
+class OrjsonCodec(AbstractJsonCodec):
+    """Codec based on orjson."""
+    name = "orjson"
+
+    def __init__(self) -> None:
+        """Initialize the codec."""
+        if orjson is None:
+            raise RuntimeError("OrjsonCodec requires orjson, install aiomygas[speedups]")
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode obj to JSON bytes."""
+        return orjson.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON bytes, raise ValueError on invalid input."""
+        return orjson.loads(data)
+
+
+class MsgspecCodec(AbstractJsonCodec):
+    """Codec based on msgspec."""
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        """Initialize the codec."""
+        if msgspec is None:
+            raise RuntimeError("MsgspecCodec requires msgspec")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode obj to JSON bytes."""
+        return self._encoder.encode(obj)
+
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON bytes, raise ValueError on invalid input."""
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as err:
+            raise ValueError(str(err)) from err
+
+
+def get_default_codec() -> AbstractJsonCodec:
+    """Return the fastest available codec."""
+    if orjson is not None:
+        return OrjsonCodec()
+    if msgspec is not None:
+        return MsgspecCodec()
+    return StdlibJsonCodec()
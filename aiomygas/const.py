@@ -15,6 +15,8 @@ LOG_LEVELS = {
 }
 
 CLIENT_SESSION_LIFETIME = 525600
+DEFAULT_TOKEN_REFRESH_MARGIN = 3600
+DEFAULT_TOKEN_REFRESH_RETRY_DELAY = 60
 
 DEFAULT_HOST = "xn--80afnfom.xn--80ahmohdapg.xn--80asehdb"
 DEFAULT_ENDPOINT = f"https://{DEFAULT_HOST}/abr-lka-backend"
@@ -22,7 +24,40 @@ DEFAULT_ORIGIN = f"https://{DEFAULT_HOST}"
 DEFAULT_REFERER = f"https://{DEFAULT_HOST}/"
 DEFAULT_MOBILE_BROWSER = "App"
 CLOCK_OUT_OF_SYNC_MAX_SEC = 20
+DEFAULT_LOCK_POLL_INTERVAL = 0.1
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_BASE_DELAY = 0.5
+DEFAULT_RETRY_MAX_DELAY = 30.0
+DEFAULT_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RECOVERY_TIMEOUT = 30.0
+DEFAULT_MAX_BATCH_SIZE = 10
+DEFAULT_MAX_INDICATION_BATCH_SIZE = 20
+DEFAULT_SNAPSHOT_CONCURRENCY = 4
+DEFAULT_CLI_CONCURRENCY = 4
+DEFAULT_CACHE_MAX_SIZE = 1024
+DEFAULT_DISK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_TTLS = {
+    "clientV2": 3600.0,
+    "accountsN": 3600.0,
+    "elsInfo": 600.0,
+    "lspuInfo": 600.0,
+    "clientCharges": 3600.0,
+    "paymentsByLspu": 3600.0,
+}
 HEADER_TOKEN: Final = "token"
+CONTENT_TYPE_JSON = "application/json"
+AUTH_ERROR_STATUSES = (401, 403)
+AUTH_ERROR_CODES = ("UNAUTHENTICATED", "UNAUTHORIZED", "FORBIDDEN")
+AUTH_ERROR_MARKERS = (
+    "unauthorized",
+    "unauthenticated",
+    "not authorized",
+    "invalid token",
+    "token expired",
+    "необходима авторизация",
+    "требуется авторизация",
+)
 
 MOBILE_APP_NAME = "mobile"
 DESKTOP_APP_NAME = "desktop"
@@ -39,6 +74,23 @@ DEFAULT_DEVICE_INFO = {
     "system": "Android"
 }
 ATTR_ERROR = "error"
+ATTR_ERRORS = "errors"
+ATTR_MESSAGE = "message"
+ATTR_EXTENSIONS = "extensions"
+ATTR_CODE = "code"
+ATTR_PATH = "path"
+ATTR_PERSISTED_QUERY = "persistedQuery"
+ATTR_VERSION = "version"
+ATTR_SHA256_HASH = "sha256Hash"
+PERSISTED_QUERY_VERSION = 1
+PERSISTED_QUERY_NOT_FOUND = "PERSISTED_QUERY_NOT_FOUND"
+PERSISTED_QUERY_NOT_SUPPORTED = "PERSISTED_QUERY_NOT_SUPPORTED"
+PERSISTED_QUERY_ERRORS = {
+    "PersistedQueryNotFound": PERSISTED_QUERY_NOT_FOUND,
+    "PersistedQueryNotSupported": PERSISTED_QUERY_NOT_SUPPORTED,
+    PERSISTED_QUERY_NOT_FOUND: PERSISTED_QUERY_NOT_FOUND,
+    PERSISTED_QUERY_NOT_SUPPORTED: PERSISTED_QUERY_NOT_SUPPORTED,
+}
 ATTR_OK = "ok"
 ATTR_DATA = "data"
 ATTR_VARIABLES = "variables"
@@ -59,3 +111,35 @@ ATTR_DATE_ISO_SHORT = 'dateIsoShort'
 ATTR_EMAIL = 'email'
 ATTR_IS_ELS = 'isEls'
 ATTR_ID = 'id'
+ATTR_DATE = "date"
+ATTR_PAYMENT_ID = "paymentId"
+ATTR_AMOUNT_KOP = "amountKop"
+ATTR_SOURCE = "source"
+ATTR_SERVICE_NAME = "serviceName"
+ATTR_SERVICE_UUID = "serviceUuid"
+ATTR_UUID = "uuid"
+ATTR_COUNTERS = "counters"
+ATTR_LSPU_INFO_GROUP = "lspuInfoGroup"
+ATTR_VALUES = "values"
+ATTR_DATE_DT = "dateDt"
+ATTR_VALUE_DAY = "valueDay"
+ATTR_VALUE_NIGHT = "valueNight"
+ATTR_VALUE_MIDDLE = "valueMiddle"
+ATTR_CAPACITY = "capacity"
+ATTR_AVERAGE_RATE = "averageRate"
+ATTR_ELS_GROUP = "elsGroup"
+ATTR_ELS = "els"
+ATTR_LSPU = "lspu"
+
+SYNC_KIND_PAYMENTS = "payments"
+SYNC_KIND_CHARGES = "charges"
+SNAPSHOT_ELS_INFO = "els_info"
+SNAPSHOT_LSPU_INFO = "lspu_info"
+SNAPSHOT_CHARGES = "charges"
+SNAPSHOT_PAYMENTS = "payments"
+SNAPSHOT_INCLUDE = (SNAPSHOT_ELS_INFO, SNAPSHOT_LSPU_INFO, SNAPSHOT_CHARGES, SNAPSHOT_PAYMENTS)
+READINGS_FILE_SUFFIX = ".readings"
+
+AVERAGE_MONTH_DAYS = 365.25 / 12
+DEFAULT_OUTLIER_THRESHOLD = 3.5
+DEFAULT_OUTLIER_MIN_PERIODS = 3
@@ -0,0 +1,67 @@
+"""Cross-process coordination of MyGas API sign-in."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+from .const import LOGGER, DEFAULT_LOCK_POLL_INTERVAL
+
+
+class AbstractAuthCoordinator(ABC):
+    """Abstract class to single-flight sign-in between processes."""
+
+    @abstractmethod
+    def async_lock(self, identifier: str) -> AbstractAsyncContextManager[None]:
+        """Return an async context manager that holds the sign-in lock for identifier."""
+
+
+class FileLockAuthCoordinator(AbstractAuthCoordinator):
+    """Coordinator that uses advisory file locks in a shared directory.
+
+    Only one process per identifier holds the lock at a time. Used together with a
+    shared token store, the other processes wait for the lock and then reuse the token
+    saved by the process that signed in.
+    """
+
+    def __init__(self, lock_dir: str | os.PathLike[str],
+                 poll_interval: float = DEFAULT_LOCK_POLL_INTERVAL) -> None:
+        """Initialize the coordinator."""
+        if fcntl is None:
+            raise RuntimeError("FileLockAuthCoordinator requires fcntl (POSIX only)")
+        self._lock_dir = Path(lock_dir)
+        self._poll_interval = poll_interval
+
+    def _lock_path(self, identifier: str) -> Path:
+        """Return the lock file path for identifier."""
+        digest = hashlib.sha256(identifier.encode("utf-8")).hexdigest()
+        return self._lock_dir / f"{digest}.lock"
+
+    @asynccontextmanager
+    async def async_lock(self, identifier: str) -> AsyncIterator[None]:
+        """Hold the sign-in lock for identifier."""
+        self._lock_dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._lock_path(identifier), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(self._poll_interval)
+            LOGGER.debug("Acquired sign-in lock for %s", identifier)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
@@ -12,3 +12,11 @@ class MyGasApiParseError(MyGasApiError):
 
 class MyGasAuthError(MyGasApiError):
     """Base class for aiomygas auth errors"""
+
+
+class MyGasTokenError(MyGasAuthError):
+    """Exception class for tokens rejected by the server"""
+
+
+class MyGasCircuitOpenError(MyGasApiError):
+    """Exception class for requests rejected by an open circuit breaker"""
@@ -0,0 +1,608 @@
+"""Typed response models for MyGas API.
+
+Models are optional: ``MyGasApi`` methods return plain dicts, which can be
+converted with ``from_dict``/``from_list``. ``from_bytes``/``list_from_bytes``
+decode JSON bytes into dicts with a codec and then convert them. Heavy sub-trees (counter values, balances,
+payments, acts, ...) are kept as ``LazyList`` and converted on first access.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, field, fields
+from typing import Any, Generic, TypeVar, overload
+
+from .codec import AbstractJsonCodec, get_default_codec
+from .exceptions import MyGasApiParseError
+
+M = TypeVar("M", bound="Model")
+
+_SPECS: dict[type, tuple[tuple[str, str, type[Model] | None, bool, bool], ...]] = {}
+
+
+def _camel(name: str) -> str:
+    """Return the camelCase API key for a snake_case attribute name."""
+    first, *rest = name.split("_")
+    return first + "".join(part.capitalize() for part in rest)
+
+
+def nested(model: type[Model] | str, *, many: bool = False, lazy: bool = False, key: str | None = None) -> Any:
+    """Declare a field holding a nested model, a list of models or a lazy list of models."""
+    return field(default=None, metadata={"model": model, "many": many, "lazy": lazy, "key": key})
+
+
+class LazyList(Sequence, Generic[M]):
+    """List of models converted from raw dicts on first access."""
+    __slots__ = ("_model", "_raw", "_items")
+
+    def __init__(self, model: type[M], raw: list[dict[str, Any]]) -> None:
+        """Initialize the list."""
+        self._model = model
+        self._raw = raw
+        self._items: list[M | None] = [None] * len(raw)
+
+    @overload
+    def __getitem__(self, index: int) -> M: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[M]: ...
+
+    def __getitem__(self, index: int | slice) -> M | list[M]:
+        """Return the model(s) at index, converting them if needed."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._raw)))]
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = self._model.from_dict(self._raw[index])
+        return item
+
+    def __len__(self) -> int:
+        """Return the number of items."""
+        return len(self._raw)
+
+    def __iter__(self) -> Iterator[M]:
+        """Iterate over the models."""
+        for index in range(len(self._raw)):
+            yield self[index]
+
+    def __eq__(self, other: object) -> bool:
+        """Compare with another sequence of models."""
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        """Return the representation without converting the items."""
+        return f"LazyList({self._model.__name__}, {len(self._raw)} items)"
+
+
+class Model:
+    """Base class for response models."""
+    __slots__ = ()
+
+    @classmethod
+    def _spec(cls) -> tuple[tuple[str, str, type[Model] | None, bool, bool], ...]:
+        """Return (attribute, key, model, many, lazy) for every field."""
+        spec = _SPECS.get(cls)
+        if spec is None:
+            items = []
+            for f in fields(cls):  # type: ignore[arg-type]
+                model = f.metadata.get("model")
+                if isinstance(model, str):
+                    model = globals()[model]
+                key = f.metadata.get("key") or _camel(f.name)
+                items.append((f.name, key, model, f.metadata.get("many", False), f.metadata.get("lazy", False)))
+            spec = _SPECS[cls] = tuple(items)
+        return spec
+
+    @classmethod
+    def from_dict(cls: type[M], data: dict[str, Any]) -> M:
+        """Create the model from an API dict."""
+        if not isinstance(data, dict):
+            raise MyGasApiParseError(f"Expected an object for {cls.__name__}")
+        kwargs: dict[str, Any] = {}
+        for name, key, model, many, lazy in cls._spec():
+            value = data.get(key)
+            if model is not None and value is not None:
+                if not many:
+                    value = model.from_dict(value)
+                elif lazy:
+                    value = LazyList(model, value)
+                else:
+                    value = [model.from_dict(item) for item in value]
+            kwargs[name] = value
+        return cls(**kwargs)
+
+    @classmethod
+    def from_list(cls: type[M], data: list[dict[str, Any]]) -> list[M]:
+        """Create models from a list of API dicts."""
+        if not isinstance(data, list):
+            raise MyGasApiParseError(f"Expected a list of {cls.__name__}")
+        return [cls.from_dict(item) for item in data]
+
+    @classmethod
+    def from_bytes(cls: type[M], data: bytes, codec: AbstractJsonCodec | None = None) -> M:
+        """Create the model from JSON bytes decoded to a dict by codec."""
+        return cls.from_dict(_loads(data, codec))
+
+    @classmethod
+    def list_from_bytes(cls: type[M], data: bytes, codec: AbstractJsonCodec | None = None) -> list[M]:
+        """Create models from JSON bytes holding a list, decoded by codec."""
+        return cls.from_list(_loads(data, codec))
+
+
+def _loads(data: bytes, codec: AbstractJsonCodec | None) -> Any:
+    """Decode JSON bytes."""
+    try:
+        return (codec or get_default_codec()).loads(data)
+    except ValueError as err:
+        raise MyGasApiParseError(f"Invalid JSON: {err}") from err
+
+
+# --- Accounts ---
+
+@dataclass(slots=True)
+class ExchangeType(Model):
+    """Provider exchange type."""
+    id: int | None = None
+    code: str | None = None
+    name: str | None = None
+    description: str | None = None
+
+
+@dataclass(slots=True)
+class Provider(Model):
+    """Service provider, setup flags are kept as a dict."""
+    id: int | None = None
+    name: str | None = None
+    exchange_type: ExchangeType | None = nested(ExchangeType)
+    setup: dict[str, Any] | None = None
+
+
+@dataclass(slots=True)
+class PaperReceiptSetting(Model):
+    """Paper receipt setting."""
+    value: int | None = None
+    date_time: str | None = None
+
+
+@dataclass(slots=True)
+class Els(Model):
+    """Unified personal account (ELS)."""
+    id: int | None = None
+    jnt_account_num: str | None = None
+    is_full: bool | None = None
+    alias: str | None = None
+    address: str | None = None
+    epd: dict[str, Any] | None = None
+    params: dict[str, Any] | None = None
+    paper_receipt_setting: PaperReceiptSetting | None = nested(PaperReceiptSetting)
+
+
+@dataclass(slots=True)
+class Lspu(Model):
+    """Personal account of a service provider (LSPU)."""
+    id: int | None = None
+    account: str | None = None
+    is_full: bool | int | None = None
+    alias: str | None = None
+    address: str | None = None
+    provider: Provider | None = nested(Provider)
+    paper_receipt_setting: PaperReceiptSetting | None = nested(PaperReceiptSetting)
+    has_autopay: bool | None = None
+    els_available: bool | None = None
+
+
+@dataclass(slots=True)
+class LspuDublicate(Model):
+    """LSPU account duplicated in an ELS group."""
+    lspu: str | None = None
+    lspu_id: int | None = None
+    provider_id: int | None = None
+    provider_name: str | None = None
+
+
+@dataclass(slots=True)
+class ElsGroup(Model):
+    """ELS account with its LSPU accounts."""
+    els: Els | None = nested(Els)
+    lspu: list[Lspu] | None = nested(Lspu, many=True)
+    lspu_dublicate: list[LspuDublicate] | None = nested(LspuDublicate, many=True)
+
+
+@dataclass(slots=True)
+class Accounts(Model):
+    """Result of accountsN."""
+    els_group: list[ElsGroup] | None = nested(ElsGroup, many=True)
+    lspu: list[Lspu] | None = nested(Lspu, many=True)
+
+
+# --- LSPU info ---
+
+@dataclass(slots=True)
+class Action(Model):
+    """Account action."""
+    type: str | None = None
+    icon_url: str | None = None
+    title: str | None = None
+    description: str | None = None
+    value: Any = None
+    color: Any = None
+
+
+@dataclass(slots=True)
+class Alert(Model):
+    """Account alert."""
+    title: str | None = None
+    description: str | None = None
+
+
+@dataclass(slots=True)
+class ServiceChild(Model):
+    """Service tariff details."""
+    abonent_uuid: str | None = None
+    counter_coefficient: Any = None
+    end_date: str | None = None
+    equipment_uuid: str | None = None
+    name: str | None = None
+    node_uuid: str | None = None
+    norm: Any = None
+    price: Any = None
+    regime_uuid: str | None = None
+    service_uuid: str | None = None
+    start_date: str | None = None
+    tariff: Any = None
+
+
+@dataclass(slots=True)
+class Service(Model):
+    """Account service."""
+    id: int | None = None
+    lspu: str | None = None
+    lspu_id: int | None = None
+    name: str | None = None
+    balance: Any = None
+    provider_id: int | None = None
+    provider_name: str | None = None
+    provider_exchange_name: str | None = None
+    provider_exchange_code: str | None = None
+    provider_exchange_description: str | None = None
+    comission_type: Any = None
+    comission_rate: Any = None
+    comission_amount: Any = None
+    is_insurance: bool | None = None
+    insurance_id: Any = None
+    color: Any = None
+    children: list[ServiceChild] | None = nested(ServiceChild, many=True)
+
+
+@dataclass(slots=True)
+class CounterValue(Model):
+    """Meter reading."""
+    value_day: float | None = None
+    value_middle: float | None = None
+    value_night: float | None = None
+    overlap: bool | None = None
+    rate: Any = None
+    state: str | None = None
+    source: str | None = None
+    date: str | None = None
+    date_dt: str | None = None
+
+
+@dataclass(slots=True)
+class CounterPrice(Model):
+    """Meter tariff prices."""
+    day: Any = None
+    middle: Any = None
+    night: Any = None
+
+
+@dataclass(slots=True)
+class Counter(Model):
+    """Meter with its readings history."""
+    lspu_id: int | None = None
+    name: str | None = None
+    uuid: str | None = None
+    serial_number: str | None = None
+    number_of_rates: int | None = None
+    capacity: Any = None
+    state_int: int | None = None
+    state: str | None = None
+    notification: Any = None
+    average_rate: Any = None
+    months_count: Any = None
+    service_name: str | None = None
+    service_link_id: Any = None
+    need_verification: bool | None = None
+    position: Any = None
+    model: str | None = None
+    measure: str | None = None
+    factory_seal: Any = None
+    equipment_kind: str | None = None
+    meter_type: Any = None
+    check_date: str | None = None
+    tech_support_date: str | None = None
+    seal_date: str | None = None
+    factory_seal_date: str | None = None
+    commissioned_on: str | None = None
+    date: str | None = None
+    check_notification: bool | None = None
+    municipal_resource: Any = None
+    color: Any = None
+    values: LazyList[CounterValue] | None = nested(CounterValue, many=True, lazy=True)
+    tariff: Any = None
+    price: CounterPrice | None = nested(CounterPrice)
+
+
+@dataclass(slots=True)
+class Contract(Model):
+    """Service contract."""
+    active: bool | None = None
+    name: str | None = None
+    number: str | None = None
+    service_name: str | None = None
+    begin_date: str | None = None
+    end_date: str | None = None
+    status: str | None = None
+    contract_kind: str | None = None
+    description: str | None = None
+    uuid: str | None = None
+    service_uuid: str | None = None
+    notification: Any = None
+    color: Any = None
+
+
+@dataclass(slots=True)
+class Equipment(Model):
+    """Gas equipment."""
+    type: str | None = None
+    name: str | None = None
+    uuid: str | None = None
+    serial_number: str | None = None
+    state: str | None = None
+    need_verification: bool | None = None
+    number_of_rates: int | None = None
+    municipal_resource: Any = None
+    meter_type: Any = None
+    state_int: int | None = None
+    position: Any = None
+    model: str | None = None
+    factory_seal: Any = None
+    equipment_kind: str | None = None
+    date: str | None = None
+    check_date: str | None = None
+    tech_support_date: str | None = None
+    seal_date: str | None = None
+    factory_seal_date: str | None = None
+    commissioned_on: str | None = None
+    notification: Any = None
+    color: Any = None
+
+
+@dataclass(slots=True)
+class Ticket(Model):
+    """Customer ticket."""
+    uuid: str | None = None
+    document: Any = None
+    text: str | None = None
+    status: str | None = None
+    date: str | None = None
+    number: str | None = None
+    ticket_type_uuid: str | None = None
+    ticket_subtype_uuid: str | None = None
+    provider_name: str | None = None
+
+
+@dataclass(slots=True)
+class BalanceChild(Model):
+    """Balance details by service."""
+    date: str | None = None
+    name: str | None = None
+    charged_sum: Any = None
+    service_uuid: str | None = None
+
+
+@dataclass(slots=True)
+class Balance(Model):
+    """Monthly balance."""
+    uuid: str | None = None
+    date: str | None = None
+    name: str | None = None
+    balance_start_sum: Any = None
+    balance_end_sum: Any = None
+    charged_sum: Any = None
+    charged_volume: Any = None
+    circulation_sum: Any = None
+    forgiven_debt: Any = None
+    organization_code: str | None = None
+    payment_adjustments: Any = None
+    planned_sum: Any = None
+    privilege_sum: Any = None
+    privilege_volume: Any = None
+    restored_debt: Any = None
+    end_balance_apgp: Any = None
+    prepayment_charged_accum_sum: Any = None
+    debt_sum: Any = None
+    paid_sum: Any = None
+    children: list[BalanceChild] | None = nested(BalanceChild, many=True)
+
+
+@dataclass(slots=True)
+class LspuPayment(Model):
+    """Payment in LSPU info."""
+    uuid: str | None = None
+    date: str | None = None
+    paid_sum: Any = None
+    service_name: str | None = None
+    service_uuid: str | None = None
+    source: str | None = None
+    status: str | None = None
+    internal_code: Any = None
+    transaction_number: Any = None
+    color: Any = None
+    card_number: str | None = None
+    external_code: Any = None
+    approval: Any = None
+
+
+@dataclass(slots=True)
+class ActWork(Model):
+    """Work in an act."""
+    sum: Any = None
+    service_uuid: str | None = None
+    service_name: str | None = None
+    equipment_uuid: str | None = None
+    equipment_name: str | None = None
+
+
+@dataclass(slots=True)
+class Act(Model):
+    """Act of completed works."""
+    uuid: str | None = None
+    name: str | None = None
+    data: str | None = None
+    works: list[ActWork] | None = nested(ActWork, many=True)
+
+
+@dataclass(slots=True)
+class Parameter(Model):
+    """Account parameter."""
+    date: str | None = None
+    name: str | None = None
+    value: Any = None
+
+
+@dataclass(slots=True)
+class Privilege(Model):
+    """Account privilege."""
+    abonent_uuid: str | None = None
+    active: bool | None = None
+    begin_date: str | None = None
+    end_date: str | None = None
+    name: str | None = None
+
+
+@dataclass(slots=True)
+class LspuInfo(Model):
+    """Result of lspuInfo, also an entry of ElsInfo.lspu_info_group."""
+    has_info: bool | None = None
+    has_counters: bool | None = None
+    has_autopay: bool | None = None
+    payment_source_available: bool | None = None
+    insurance_available: bool | None = None
+    is_full: bool | None = None
+    alias: str | None = None
+    account_id: int | None = None
+    account: str | None = None
+    balance: Any = None
+    provider_id: int | None = None
+    provider_name: str | None = None
+    comission_total: Any = None
+    comission_threshold: Any = None
+    actions: list[Action] | None = nested(Action, many=True)
+    alerts: list[Alert] | None = nested(Alert, many=True)
+    services: list[Service] | None = nested(Service, many=True)
+    counters: list[Counter] | None = nested(Counter, many=True)
+    contracts: LazyList[Contract] | None = nested(Contract, many=True, lazy=True)
+    equipments: LazyList[Equipment] | None = nested(Equipment, many=True, lazy=True)
+    tickets: LazyList[Ticket] | None = nested(Ticket, many=True, lazy=True)
+    balances: LazyList[Balance] | None = nested(Balance, many=True, lazy=True)
+    payments: LazyList[LspuPayment] | None = nested(LspuPayment, many=True, lazy=True)
+    acts: LazyList[Act] | None = nested(Act, many=True, lazy=True)
+    parameters: LazyList[Parameter] | None = nested(Parameter, many=True, lazy=True)
+    privileges: LazyList[Privilege] | None = nested(Privilege, many=True, lazy=True)
+
+
+@dataclass(slots=True)
+class ElsInfo(Model):
+    """Result of elsInfo."""
+    els: Els | None = nested(Els)
+    lspu_info_group: list[LspuInfo] | None = nested(LspuInfo, many=True)
+
+
+# --- Charges, payments, receipt, indication ---
+
+@dataclass(slots=True)
+class Charge(Model):
+    """Item of clientCharges."""
+    abonent_uuid: str | None = None
+    recalculation: Any = None
+    recalculation_volume: Any = None
+    total_accounting_period: Any = None
+    service_type: Any = None
+    service_name: str | None = None
+    area: Any = None
+    living_people: Any = None
+    volume: Any = None
+    rate: Any = None
+    privileges: Any = None
+    account: str | None = None
+    date: str | None = None
+    detailed: Any = None
+    owner_service_type: Any = None
+    service_uuid: str | None = None
+    norm: Any = None
+    organization_uuid: str | None = None
+    id: Any = None
+    organization_code: str | None = None
+    bank_bik: str | None = None
+    operating_account_number: str | None = None
+    children: list[Charge] | None = nested("Charge", many=True)
+
+
+@dataclass(slots=True)
+class PaymentDetail(Model):
+    """Payment details."""
+    sbp: bool | None = None
+    email: str | None = None
+    status: str | None = None
+    document_uuid: str | None = None
+    service_uuid: str | None = None
+    provider_name: str | None = None
+    provider_inn: str | None = None
+    id: int | None = None
+    session: str | None = None
+    order: str | None = None
+    type: str | None = None
+    card_number: str | None = None
+    card_brand: str | None = None
+    approval_code: str | None = None
+
+
+@dataclass(slots=True)
+class Payment(Model):
+    """Item of paymentsByLspu."""
+    payment_id: int | None = None
+    amount_kop: int | None = None
+    amount_rub: float | None = None
+    lspu: str | None = None
+    source: str | None = None
+    date: str | None = None
+    fiscalized: bool | None = None
+    sent_to_provider: bool | None = None
+    saved_to_provider: bool | None = None
+    service_name: str | None = None
+    kkt_id: str | None = None
+    detail: PaymentDetail | None = nested(PaymentDetail)
+
+
+@dataclass(slots=True)
+class Receipt(Model):
+    """Result of receipt."""
+    content: str | None = None
+    url: str | None = None
+
+
+@dataclass(slots=True)
+class IndicationCounterResult(Model):
+    """Result of sending a reading for one counter."""
+    uuid: str | None = None
+    sent: bool | None = None
+    message: str | None = None
+
+
+@dataclass(slots=True)
+class IndicationSendResult(Model):
+    """Item of indicationSendV4."""
+    lspu_id: int | None = None
+    counters: list[IndicationCounterResult] | None = nested(IndicationCounterResult, many=True)
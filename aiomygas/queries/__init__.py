@@ -3,10 +3,11 @@ from __future__ import annotations
 
 from .accounts import Accounts
 from .base import BaseQuery
+from .batch import BatchQuery
 from .charges import Charges
 from .client import ClientV2
 from .els_info import ElsInfo
-from .indication_send import IndicationSend
+from .indication_send import Indication, IndicationBatchSend, IndicationSend
 from .lspu_info import LspuInfo
 from .payments import Payments
 from .receipt import Receipt
@@ -14,6 +15,7 @@ from .signin import SignIn
 
 __all__ = [
     "BaseQuery",
+    "BatchQuery",
     "ClientV2",
     "Accounts",
     "ElsInfo",
@@ -23,4 +25,6 @@ __all__ = [
     "Receipt",
     "SignIn",
     "IndicationSend",
+    "IndicationBatchSend",
+    "Indication",
 ]
@@ -1,11 +1,96 @@
 """Base class for GraphQL queries."""
 from __future__ import annotations
 
+import hashlib
+import json
+import re
 from abc import ABC
-from typing import Any
+from functools import lru_cache
+from typing import Any, NamedTuple
 
-from ..const import ATTR_ERROR, ATTR_OK, ATTR_DATA, ATTR_VARIABLES, ATTR_QUERY, ATTR_OPERATION_NAME
-from ..exceptions import MyGasApiParseError, MyGasApiError
+from ..const import ATTR_ERROR, ATTR_OK, ATTR_DATA, ATTR_VARIABLES, ATTR_QUERY, ATTR_OPERATION_NAME, \
+    ATTR_ERRORS, ATTR_MESSAGE, ATTR_EXTENSIONS, ATTR_CODE, AUTH_ERROR_CODES, AUTH_ERROR_MARKERS, \
+    ATTR_PERSISTED_QUERY, ATTR_VERSION, ATTR_SHA256_HASH, PERSISTED_QUERY_VERSION, PERSISTED_QUERY_ERRORS
+from ..codec import AbstractJsonCodec, StdlibJsonCodec
+from ..exceptions import MyGasApiParseError, MyGasApiError, MyGasTokenError
+
+
+_STDLIB_CODEC = StdlibJsonCodec()
+_PUNCTUATOR_SPACE_RE = re.compile(r"\s*([{}():,!=\[\]])\s*")
+
+
+@lru_cache(maxsize=256)
+def minify_query(document: str) -> str:
+    """Return the document without insignificant whitespace.
+
+    Query documents in this package contain no string literals or comments.
+    """
+    return _PUNCTUATOR_SPACE_RE.sub(r"\1", " ".join(document.split()))
+
+
+@lru_cache(maxsize=256)
+def query_hash(document: str) -> str:
+    """Return the SHA-256 hash of the minified query document."""
+    return hashlib.sha256(minify_query(document).encode("utf-8")).hexdigest()
+
+
+class CompiledQuery(NamedTuple):
+    """Compiled query document, its minified text and hash."""
+    text: str
+    minified: str
+    hash: str
+
+
+@lru_cache(maxsize=256)
+def _payload_prefix(operation_name: str, minified: str, hash_: str, persisted: bool, include_query: bool) -> bytes:
+    """Return the encoded static part of a payload, up to the variables value."""
+    static: dict[str, Any] = {ATTR_OPERATION_NAME: operation_name}
+    if include_query:
+        static[ATTR_QUERY] = minified
+    if persisted:
+        static[ATTR_EXTENSIONS] = {
+            ATTR_PERSISTED_QUERY: {
+                ATTR_VERSION: PERSISTED_QUERY_VERSION,
+                ATTR_SHA256_HASH: hash_,
+            }
+        }
+    encoded = json.dumps(static, separators=(",", ":"), ensure_ascii=False)
+    return f'{encoded[:-1]},"{ATTR_VARIABLES}":'.encode("utf-8")
+
+
+def get_persisted_query_error(response: Any) -> str | None:
+    """Return the persisted query error code of a response, if any."""
+    if not isinstance(response, dict) or not isinstance(errors := response.get(ATTR_ERRORS), list):
+        return None
+    for error in errors:
+        if not isinstance(error, dict):
+            continue
+        for value in (error.get(ATTR_MESSAGE), (error.get(ATTR_EXTENSIONS) or {}).get(ATTR_CODE)):
+            if value in PERSISTED_QUERY_ERRORS:
+                return PERSISTED_QUERY_ERRORS[value]
+    return None
+
+
+def is_auth_error_message(message: Any) -> bool:
+    """Check if an error message means that the token was rejected."""
+    if not isinstance(message, str):
+        return False
+    message = message.lower()
+    return any(marker in message for marker in AUTH_ERROR_MARKERS)
+
+
+def check_graphql_errors(response: dict[str, Any]) -> None:
+    """Raise MyGasTokenError if top-level GraphQL errors reject the token."""
+    errors = response.get(ATTR_ERRORS)
+    if not isinstance(errors, list):
+        return
+    for error in errors:
+        if not isinstance(error, dict):
+            continue
+        extensions = error.get(ATTR_EXTENSIONS) or {}
+        message = error.get(ATTR_MESSAGE)
+        if extensions.get(ATTR_CODE) in AUTH_ERROR_CODES or is_auth_error_message(message):
+            raise MyGasTokenError(message or "Token rejected")
 
 
 class BaseQuery(ABC):
@@ -13,31 +98,45 @@ class BaseQuery(ABC):
     OPERATION_NAME: str
     DATA_NAME: str | tuple
     QUERY: str
+    # set by queries whose document is compiled at import time
+    COMPILED: CompiledQuery | None = None
+    IS_MUTATION: bool = False
 
     def __init__(self) -> None:
         """Initialize the query."""
         self.variables: dict[str, Any] = {}
 
+    def check_response(self, response: dict[str, Any]) -> dict[str, Any]:
+        """Return the operation result of a response, raising its errors."""
+        check_graphql_errors(response)
+        operation = (response.get(ATTR_DATA) or {}).get(self.OPERATION_NAME) or {}
+        if operation.get(ATTR_OK, False):
+            return operation
+        error = operation.get(ATTR_ERROR)
+        if is_auth_error_message(error):
+            raise MyGasTokenError(error)
+        raise MyGasApiError(error or "Invalid API response")
+
     def parse(self, response: dict[str, Any]) -> Any:
         """Parse response."""
-        operation = response.get(ATTR_DATA, {}).get(self.OPERATION_NAME, {})
-        ok = operation.get(ATTR_OK, False)
-        error = operation.get(ATTR_ERROR)
-        if ok:
-            if isinstance(self.DATA_NAME, str):
-                data = operation.get(self.DATA_NAME)
-                if data is None:
-                    raise MyGasApiParseError(f"Key {self.DATA_NAME} not found in response")
-            else:
-                data = {}
-                for data_name in self.DATA_NAME:
-                    if data_name in operation:
-                        data[data_name] = operation.get(data_name)
-                    else:
-                        raise MyGasApiParseError(f"Key {data_name} not found in response")
-            return data
+        operation = self.check_response(response)
+        if isinstance(self.DATA_NAME, str):
+            data = operation.get(self.DATA_NAME)
+            if data is None:
+                raise MyGasApiParseError(f"Key {self.DATA_NAME} not found in response")
         else:
-            raise MyGasApiError(error or "Invalid API response")
+            data = {}
+            for data_name in self.DATA_NAME:
+                if data_name in operation:
+                    data[data_name] = operation.get(data_name)
+                else:
+                    raise MyGasApiParseError(f"Key {data_name} not found in response")
+        return data
+
+    @property
+    def cache_key(self) -> tuple[str, str]:
+        """Return the operation name and canonicalized variables."""
+        return self.OPERATION_NAME, json.dumps(self.variables, sort_keys=True, separators=(",", ":"))
 
     def to_json(self) -> dict[str, Any]:
         """Return the payload."""
@@ -46,3 +145,27 @@ class BaseQuery(ABC):
             ATTR_QUERY: self.QUERY,
             ATTR_VARIABLES: self.variables
         }
+
+    @property
+    def compiled(self) -> CompiledQuery:
+        """Return the query document with its minified text and hash.
+
+        Documents other than COMPILED, e.g. projected ones, are minified and hashed on demand.
+        """
+        compiled = self.COMPILED
+        if compiled is not None and compiled.text is self.QUERY:
+            return compiled
+        return CompiledQuery(self.QUERY, minify_query(self.QUERY), query_hash(self.QUERY))
+
+    def to_bytes(self, persisted: bool = False, include_query: bool = True,
+                 codec: AbstractJsonCodec | None = None) -> bytes:
+        """Return the encoded payload with the minified query.
+
+        The static part is encoded once per query document, only the variables
+        are encoded per call with codec.
+        """
+        compiled = self.compiled
+        prefix = _payload_prefix(
+            self.OPERATION_NAME, compiled.minified, compiled.hash, persisted, include_query or not persisted
+        )
+        return prefix + (codec or _STDLIB_CODEC).dumps(self.variables) + b"}"
@@ -0,0 +1,85 @@
+"""GraphQL query that fuses several queries into one document using field aliases."""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+from .base import BaseQuery, check_graphql_errors
+from ..const import ATTR_DATA, ATTR_ERRORS, ATTR_PATH
+from ..exceptions import MyGasApiError
+
+_DOCUMENT_RE = re.compile(
+    r"^\s*(?P<kind>query|mutation)\s+\w+\s*(?:\((?P<definitions>[^)]*)\))?\s*\{(?P<body>.*)}\s*$",
+    re.DOTALL,
+)
+_VARIABLE_RE = re.compile(r"\$(\w+)")
+
+
+def _split_document(document: str) -> tuple[str, list[str], str]:
+    """Split a single-operation document into kind, variable definitions and body."""
+    match = _DOCUMENT_RE.match(document)
+    if match is None:
+        raise ValueError("Unsupported GraphQL document")
+    definitions = [d.strip() for d in (match["definitions"] or "").split(",") if d.strip()]
+    return match["kind"], definitions, match["body"].strip()
+
+
+class BatchQuery(BaseQuery):
+    """GraphQL query that sends several queries in one request.
+
+    Every query becomes an aliased root field (``q0: lspuInfo(...)``) with its
+    variables prefixed by the alias. ``parse`` returns a list with the result of
+    each query's own ``parse`` or the MyGasApiError it raised.
+    """
+    OPERATION_NAME = "batch"
+    DATA_NAME = ATTR_DATA
+
+    def __init__(self, queries: list[BaseQuery]) -> None:
+        """Initialize the query."""
+        if not queries:
+            raise ValueError("Batch must contain at least one query")
+        self.queries = list(queries)
+        self.aliases = [f"q{index}" for index in range(len(self.queries))]
+        definitions: list[str] = []
+        fields: list[str] = []
+        self.variables = {}
+        for alias, query in zip(self.aliases, self.queries):
+            kind, query_definitions, body = _split_document(query.QUERY)
+            if kind != "query" or query.IS_MUTATION:
+                raise ValueError(f"Mutation {query.OPERATION_NAME} can not be batched")
+
+            def rename(match: re.Match[str], prefix: str = alias) -> str:
+                return f"${prefix}_{match[1]}"
+
+            definitions.extend(_VARIABLE_RE.sub(rename, d) for d in query_definitions)
+            fields.append(f"{alias}: {_VARIABLE_RE.sub(rename, body)}")
+            self.variables.update({f"{alias}_{name}": value for name, value in query.variables.items()})
+        header = f"query {self.OPERATION_NAME}({', '.join(definitions)})" if definitions \
+            else f"query {self.OPERATION_NAME}"
+        self.QUERY = f"{header} {{\n" + "\n".join(fields) + "\n}"
+
+    @property
+    def cache_key(self) -> tuple[str, str]:
+        """Return the operation name and canonicalized sub-queries."""
+        return self.OPERATION_NAME, json.dumps([query.cache_key for query in self.queries])
+
+    def parse(self, response: dict[str, Any]) -> list[Any]:
+        """Split the response and parse it with each query."""
+        check_graphql_errors(response)
+        data = response.get(ATTR_DATA) or {}
+        errors = response.get(ATTR_ERRORS) or []
+        results: list[Any] = []
+        for alias, query in zip(self.aliases, self.queries):
+            sub_response: dict[str, Any] = {ATTR_DATA: {query.OPERATION_NAME: data.get(alias)}}
+            sub_errors = [
+                error for error in errors
+                if isinstance(error, dict) and (error.get(ATTR_PATH) or [alias])[0] == alias
+            ]
+            if sub_errors:
+                sub_response[ATTR_ERRORS] = sub_errors
+            try:
+                results.append(query.parse(sub_response))
+            except MyGasApiError as err:
+                results.append(err)
+        return results
@@ -2,68 +2,17 @@
 from __future__ import annotations
 
 from .base import BaseQuery
+from .compiler import compile_query, field
+from .fragments import CHARGE
 from ..const import ATTR_LSPU_ID
 
 
 class Charges(BaseQuery):
     OPERATION_NAME = "clientCharges"
     DATA_NAME = "data"
-    QUERY = """
-query clientCharges($lspuId: Float!) {
-  clientCharges(lspuId: $lspuId) {
-    ok
-    error
-    data {
-      abonentUuid
-      recalculation
-      recalculationVolume
-      totalAccountingPeriod
-      serviceType
-      serviceName
-      area
-      livingPeople
-      volume
-      rate
-      privileges
-      account
-      date
-      detailed
-      ownerServiceType
-      serviceUuid
-      norm
-      organizationUuid
-      id
-      organizationCode
-      bankBik
-      operatingAccountNumber
-      children {
-        abonentUuid
-        recalculation
-        recalculationVolume
-        totalAccountingPeriod
-        serviceType
-        serviceName
-        area
-        livingPeople
-        volume
-        rate
-        privileges
-        account
-        date
-        detailed
-        ownerServiceType
-        serviceUuid
-        norm
-        organizationUuid
-        id
-        organizationCode
-        bankBik
-        operatingAccountNumber
-      }
-    }
-  }
-}
-"""
+    COMPILED = compile_query("clientCharges", field("data", CHARGE, field("children", CHARGE)),
+                             {ATTR_LSPU_ID: "Float!"})
+    QUERY = COMPILED.text
 
     def __init__(self, lspu_id: int) -> None:
         """Initialize."""
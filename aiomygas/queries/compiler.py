@@ -0,0 +1,62 @@
+"""Compiler of GraphQL query documents from field trees."""
+from __future__ import annotations
+
+from .base import CompiledQuery, minify_query, query_hash
+from ..const import ATTR_ERROR, ATTR_OK
+
+Selection = dict[str, "Selection | None"]
+
+
+def merge(*selections: Selection) -> Selection:
+    """Merge selections, sub-selections of fields present in several selections are merged too."""
+    merged: Selection = {}
+    for selection in selections:
+        for key, children in selection.items():
+            current = merged.get(key)
+            if isinstance(current, dict) and isinstance(children, dict):
+                merged[key] = merge(current, children)
+            elif key in merged and (current is None) != (children is None):
+                raise ValueError(f"Field {key} is used both as a leaf and as an object")
+            else:
+                merged[key] = children
+    return merged
+
+
+def fields(*items: str | Selection) -> Selection:
+    """Build a selection from leaf field names and selections (fragments)."""
+    return merge(*({item: None} if isinstance(item, str) else item for item in items))
+
+
+def field(name: str, *items: str | Selection) -> Selection:
+    """Build a selection with one object field."""
+    return {name: fields(*items)}
+
+
+def render_selection(selection: Selection, indent: int = 0) -> str:
+    """Render a selection tree as a document with one field per line."""
+    lines = []
+    for key, children in selection.items():
+        if children is None:
+            lines.append(" " * indent + key)
+        else:
+            lines.append(" " * indent + key + " {")
+            lines.append(render_selection(children, indent + 2))
+            lines.append(" " * indent + "}")
+    return "\n".join(lines)
+
+
+def compile_query(operation_name: str, data: Selection,
+                  variables: dict[str, str] | None = None, mutation: bool = False) -> CompiledQuery:
+    """Compile a single-operation document.
+
+    The root field takes every variable as an argument of the same name and
+    selects ok, error and data. The minified text and hash are cached on compile.
+    """
+    kind = "mutation" if mutation else "query"
+    header = f"{kind} {operation_name}"
+    root = operation_name
+    if variables:
+        header += "(" + ", ".join(f"${name}: {type_}" for name, type_ in variables.items()) + ")"
+        root += "(" + ", ".join(f"{name}: ${name}" for name in variables) + ")"
+    text = "\n" + render_selection({header: {root: fields(ATTR_OK, ATTR_ERROR, data)}}) + "\n"
+    return CompiledQuery(text, minify_query(text), query_hash(text))
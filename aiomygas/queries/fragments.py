@@ -0,0 +1,138 @@
+"""Field trees shared by several GraphQL queries.
+
+The schema type names are not published, so shared trees are expanded inline
+when a query is compiled instead of being sent as GraphQL fragments.
+"""
+from __future__ import annotations
+
+from .compiler import field, fields
+
+PAPER_RECEIPT_SETTING = field("paperReceiptSetting", "value", "dateTime")
+
+PROVIDER_SETUP = field(
+    "setup",
+    "ACCOUNT_ATTACH_HINT", "ALLOW_ACCESS_TYPE_CHARGE", "ALLOW_ACCESS_TYPE_COUNTER", "ALLOW_ACCESS_TYPE_PIN",
+    "ALLOW_INDICATION_SEND", "ALLOW_INDICATION_SEND_LITE", "ALLOW_PAY", "ENABLE_PAYMENT_EXCHANGE",
+    "ALLOW_PAY_APPLE", "ALLOW_PAY_GOOGLE", "ALLOW_PAY_SBP", "COUNTER_CHECK_DATE", "DAYS_BEFORE_CONTRACT_END",
+    "DAYS_BEFORE_EQUIPMENT_CHECK", "ENABLE_AGREEMENT_SECTION", "ENABLE_APPLICATIONS_SECTION",
+    "ENABLE_CALCULATION_SECTION", "ENABLE_INDICATION_SOURCE", "ENABLE_NOTIFICATION_DOCUMENT",
+    "ENABLE_NOTIFICATION_EQUIPMENT", "ENABLE_PAYMENTS_SECTION", "ENABLE_PAYMENT_DETAILS_FULL",
+    "ENABLE_PAYMENT_DETAILS_LITE", "ENABLE_PRINT_INVOICE", "ENABLE_PRIVILEGES_SECTION", "FULL_REQUEST_EMAIL",
+    "IS_DEFAULT_FULL", "MAX_CONSUMPTION", "MESSAGE_AFTER_CONTRACT_END", "MESSAGE_AFTER_EQUIPMENT_CHECK",
+    "MESSAGE_BEFORE_CONTRACT_END", "MESSAGE_BEFORE_EQUIPMENT_CHECK", "SERVICE_UNAVAILABLE", "SUPPORT_EMAIL",
+    "ENABLE_COUNTER_RATE", "ENABLE_PAPER_RECEIPT", "DUBLICATE_PAPER_RECEIPT", "ENABLE_NOTIFICATION_INDICATION",
+    "MESSAGE_INDICATION_SECTION", "SHOW_PAPER_RECEIPT_OFFER", "SHOW_NORMS_AND_RATES", "ALLOW_INDICATION_ZERO",
+    "KKT_PAYMENT_METHOD_TYPE", "KKT_PAYMENT_SUBJECT_TYPE", "PAYMENT_MESSAGE", "ENABLE_PAYMENT_MESSAGE",
+    "ALLOW_AUTOPAY", "CHARGES_INTERVAL_MONTHS_NUMBER", "ALLOW_INDICATION_OVERLAP", "PROVIDER_ALLOW_OFFER_ELS",
+    "ALLOW_INDICATION_CHECK_EXPIRED", "ALLOW_MIR_PAY", "GAS_COUNTER_TARIFF", "ENABLE_PRINT_EPD",
+    "ALLOW_CREATE_AGREEMENT_TICKET", "DEPARTMET_EMAIL", "ALLOW_DOWNLOAD_CHARGES",
+    "ALLOW_INDICATION_DATE_CHANGE", "ENABLE_EQUIPMENTS_DATE", "ENABLE_EQUIPMENTS_SERIAL",
+    "ENABLE_ABONENT_FULLNAME", "ALLOW_TICKET_INSPECTOR_SEND", "RTP_TOPIC_ID", "TICKET_SRC_PROVIDER_OPD",
+)
+
+PROVIDER = field(
+    "provider",
+    "id", "name",
+    field("exchangeType", "id", "code", "name", "description"),
+    PROVIDER_SETUP,
+)
+
+ELS = fields(
+    "id", "jntAccountNum", "isFull", "alias", "address",
+    field("epd", "id", "name", "typePaymentCode", "ENABLE_PAPER_RECEIPT_EPD", "UNITED_PAY_INDICATION_EPD"),
+    field("params", "someField"),
+    PAPER_RECEIPT_SETTING,
+)
+
+LSPU = fields(
+    "id", "account", "isFull", "alias", "address",
+    PROVIDER,
+    PAPER_RECEIPT_SETTING,
+    "hasAutopay", "elsAvailable",
+)
+
+COUNTER_VALUE = fields(
+    "valueDay", "valueMiddle", "valueNight", "overlap", "rate", "state", "source", "date", "dateDt",
+)
+
+COUNTER = fields(
+    "lspuId", "name", "uuid", "serialNumber", "numberOfRates", "capacity", "stateInt", "state", "notification",
+    "averageRate", "monthsCount", "serviceName", "serviceLinkId", "needVerification", "position", "model",
+    "measure", "factorySeal", "equipmentKind", "meterType", "checkDate", "techSupportDate", "sealDate",
+    "factorySealDate", "commissionedOn",
+    field("values", COUNTER_VALUE),
+    "tariff",
+    field("price", "day", "middle", "night"),
+)
+
+LSPU_INFO = fields(
+    "hasInfo", "hasCounters", "hasAutopay", "paymentSourceAvailable", "insuranceAvailable", "isFull", "alias",
+    "accountId", "account", "balance", "providerId", "providerName", "comissionTotal", "comissionThreshold",
+    field("actions", "type", "iconUrl", "title", "description", "value", "color"),
+    field("alerts", "title", "description"),
+    field(
+        "services",
+        "id", "lspu", "lspuId", "name", "balance", "providerId", "providerName", "providerExchangeName",
+        "providerExchangeCode", "providerExchangeDescription", "comissionType", "comissionRate",
+        "comissionAmount", "isInsurance", "insuranceId",
+        field(
+            "children",
+            "abonentUuid", "counterCoefficient", "endDate", "equipmentUuid", "name", "nodeUuid", "norm", "price",
+            "regimeUuid", "serviceUuid", "startDate", "tariff",
+        ),
+    ),
+    field("counters", COUNTER),
+    field(
+        "contracts",
+        "active", "name", "number", "serviceName", "beginDate", "endDate", "status", "contractKind",
+        "description", "uuid", "serviceUuid", "notification",
+    ),
+    field(
+        "equipments",
+        "type", "name", "uuid", "serialNumber", "state", "needVerification", "numberOfRates", "municipalResource",
+        "meterType", "stateInt", "position", "model", "factorySeal", "equipmentKind", "date", "checkDate",
+        "techSupportDate", "sealDate", "factorySealDate", "commissionedOn", "notification", "color",
+    ),
+    field(
+        "tickets",
+        "uuid", "document", "text", "status", "date", "number", "ticketTypeUuid", "ticketSubtypeUuid",
+        "providerName",
+    ),
+    field(
+        "balances",
+        "uuid", "date", "name", "balanceStartSum", "balanceEndSum", "chargedSum", "chargedVolume",
+        "circulationSum", "forgivenDebt", "organizationCode", "paymentAdjustments", "plannedSum", "privilegeSum",
+        "privilegeVolume", "restoredDebt", "endBalanceApgp", "prepaymentChargedAccumSum", "debtSum", "paidSum",
+        field("children", "date", "name", "chargedSum", "serviceUuid"),
+    ),
+    field(
+        "payments",
+        "uuid", "date", "paidSum", "serviceName", "serviceUuid", "source", "status", "internalCode",
+        "transactionNumber", "color", "cardNumber", "externalCode", "approval",
+    ),
+    field(
+        "acts",
+        "uuid", "name", "data",
+        field("works", "sum", "serviceUuid", "serviceName", "equipmentUuid", "equipmentName"),
+    ),
+    field("parameters", "date", "name", "value"),
+    field("privileges", "abonentUuid", "active", "beginDate", "endDate", "name"),
+)
+
+# lspuInfoGroup of elsInfo has a few more fields than lspuInfo
+LSPU_INFO_GROUP = fields(
+    LSPU_INFO,
+    field("services", "color"),
+    field(
+        "counters",
+        "date", "checkNotification", "municipalResource", "color",
+        field("values", "value", "saved", "color", "previousValue"),
+    ),
+    field("contracts", "color"),
+)
+
+CHARGE = fields(
+    "abonentUuid", "recalculation", "recalculationVolume", "totalAccountingPeriod", "serviceType", "serviceName",
+    "area", "livingPeople", "volume", "rate", "privileges", "account", "date", "detailed", "ownerServiceType",
+    "serviceUuid", "norm", "organizationUuid", "id", "organizationCode", "bankBik", "operatingAccountNumber",
+)
@@ -1,9 +1,37 @@
 """GraphQL query for sending indication to MyGas API."""
 from __future__ import annotations
 
+from typing import Any, NamedTuple
+
 from .base import BaseQuery
-from ..const import ATTR_ELS_ID, ATTR_LSPU_ID, ATTR_DEVICE_INFO
+from ..const import ATTR_ELS_ID, ATTR_LSPU_ID, ATTR_DEVICE_INFO, ATTR_UUID, ATTR_COUNTERS
 from ..device_info import DEVICE_INFO
+from ..exceptions import MyGasApiError, MyGasApiParseError
+
+
+class Indication(NamedTuple):
+    """Reading of a counter to send."""
+    lspu_id: int
+    uuid: str
+    value_day: int | float
+    value_night: int | float | None = None
+    value_middle: int | float | None = None
+    els_id: int | None = None
+
+
+def _counter_input(uuid: str, value_day: int | float, value_night: int | float | None = None,
+                   value_middle: int | float | None = None) -> dict[str, Any]:
+    """Return the input of a counter reading."""
+    return {
+        "uuid": uuid,
+        "serviceId": 0.0,  # необязательный параметр (по умолчанию 0)
+        "valueDay": value_day,
+        "valueNight": value_night,
+        "valueMiddle": value_middle,
+        "overlapDay": False,
+        "overlapMiddle": False,
+        "overlapNight": False
+    }
 
 
 class IndicationSend(BaseQuery):
@@ -11,6 +39,7 @@ class IndicationSend(BaseQuery):
 
     OPERATION_NAME = "indicationSendV4"
     DATA_NAME = "data"
+    IS_MUTATION = True
     QUERY = """
 mutation indicationSendV4($input: IndicationSendV4Input!, $deviceInfo: DeviceInfoInputV2!) {
   indicationSendV4(input: $input, deviceInfo: $deviceInfo) {
@@ -34,17 +63,7 @@ mutation indicationSendV4($input: IndicationSendV4Input!, $deviceInfo: DeviceInf
             'input': {
                 "lspuGroups": [{
                     ATTR_LSPU_ID: lspu_id,
-                    "counters": [{
-                        "uuid": uuid,
-                        "serviceId": 0.0,  # необязательный параметр (по умолчанию 0)
-                        "valueDay": value_day,
-                        "valueNight": None,
-                        "valueMiddle": None,
-                        "overlapDay": False,
-                        "overlapMiddle": False,
-                        "overlapNight": False
-                    }
-                    ]
+                    "counters": [_counter_input(uuid, value_day)]
                 }
                 ]
             },
@@ -52,3 +71,47 @@ mutation indicationSendV4($input: IndicationSendV4Input!, $deviceInfo: DeviceInf
         }
         if els_id is not None:
             self.variables['input'][ATTR_ELS_ID] = els_id
+
+
+class IndicationBatchSend(IndicationSend):
+    """GraphQL query for sending readings of several counters and accounts at once.
+
+    ``parse`` returns the counter result (uuid, sent, message) of each indication in order.
+    """
+
+    def __init__(self, indications: list[Indication]) -> None:
+        """Initialize the query with indications of the same els_id."""
+        if not indications:
+            raise ValueError("Batch must contain at least one indication")
+        els_ids = {indication.els_id for indication in indications}
+        if len(els_ids) > 1:
+            raise ValueError("Indications of a batch must have the same els_id")
+        if len({(indication.lspu_id, indication.uuid) for indication in indications}) < len(indications):
+            raise ValueError("Batch contains a counter more than once")
+        self.indications = list(indications)
+        groups: dict[int, list[dict[str, Any]]] = {}
+        for indication in self.indications:
+            groups.setdefault(indication.lspu_id, []).append(_counter_input(
+                indication.uuid, indication.value_day, indication.value_night, indication.value_middle
+            ))
+        self.variables = {
+            'input': {
+                "lspuGroups": [{ATTR_LSPU_ID: lspu_id, "counters": counters} for lspu_id, counters in groups.items()]
+            },
+            ATTR_DEVICE_INFO: DEVICE_INFO
+        }
+        if (els_id := els_ids.pop()) is not None:
+            self.variables['input'][ATTR_ELS_ID] = els_id
+
+    def parse(self, response: dict[str, Any]) -> list[dict[str, Any] | MyGasApiError]:
+        """Parse response and map the counter results to the indications."""
+        results = {
+            (group.get(ATTR_LSPU_ID), counter.get(ATTR_UUID)): counter
+            for group in super().parse(response) or []
+            for counter in group.get(ATTR_COUNTERS) or []
+        }
+        return [
+            results.get((indication.lspu_id, indication.uuid))
+            or MyGasApiParseError(f"No result for counter {indication.uuid} of {indication.lspu_id}")
+            for indication in self.indications
+        ]
@@ -0,0 +1,127 @@
+"""Field projection for GraphQL queries."""
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+
+from .base import BaseQuery
+from .compiler import Selection, render_selection
+
+_TOKEN_RE = re.compile(r"[{}]|[^{}\n]+")
+_NAME_RE = re.compile(r"\w+")
+
+
+def parse_selection(document: str) -> Selection:
+    """Parse a document with one field per line into a selection tree.
+
+    Keys are field texts with arguments, values are sub-selections or None for leaves.
+    """
+    root: Selection = {}
+    stack = [root]
+    last: str | None = None
+    for token in _TOKEN_RE.findall(document):
+        token = token.strip()
+        if not token:
+            continue
+        if token == "{":
+            if last is None:
+                raise ValueError("Unsupported GraphQL document")
+            child: Selection = {}
+            stack[-1][last] = child
+            stack.append(child)
+            last = None
+        elif token == "}":
+            if len(stack) == 1:
+                raise ValueError("Unsupported GraphQL document")
+            stack.pop()
+            last = None
+        else:
+            stack[-1][token] = None
+            last = token
+    if len(stack) != 1:
+        raise ValueError("Unsupported GraphQL document")
+    return root
+
+
+def _field_name(key: str) -> str:
+    """Return the field name of a key with arguments."""
+    match = _NAME_RE.match(key)
+    return match[0] if match else key
+
+
+def project_selection(selection: Selection, paths: Iterable[tuple[str, ...]]) -> Selection:
+    """Return the part of the selection that contains paths, keeping the field order.
+
+    A path selects the field with its whole sub-selection.
+    """
+    paths = list(paths)
+    names = {_field_name(key): key for key in selection}
+    for path in paths:
+        if path[0] not in names:
+            raise ValueError(f"Unknown field {path[0]}")
+        if len(path) > 1 and selection[names[path[0]]] is None:
+            raise ValueError(f"Field {path[0]} has no sub-fields")
+    projected: Selection = {}
+    for key, children in selection.items():
+        matching = [path[1:] for path in paths if path[0] == _field_name(key)]
+        if not matching:
+            continue
+        if children is None or any(not path for path in matching):
+            projected[key] = children
+        else:
+            projected[key] = project_selection(children, matching)
+    return projected
+
+
+@lru_cache(maxsize=256)
+def project_query(document: str, data_name: str, fields: tuple[str, ...]) -> str:
+    """Return the document with the data_name selection narrowed to fields.
+
+    Fields are dotted paths relative to data_name, e.g. ``counters.values``.
+    """
+    tree = parse_selection(document)
+    if len(tree) != 1:
+        raise ValueError("Unsupported GraphQL document")
+    header, operation = next(iter(tree.items()))
+    if operation is None or len(operation) != 1:
+        raise ValueError("Unsupported GraphQL document")
+    root_key, root = next(iter(operation.items()))
+    data_key = next((key for key in root or {} if _field_name(key) == data_name), None)
+    if root is None or data_key is None or root[data_key] is None:
+        raise ValueError(f"Field {data_name} not found in document")
+    paths = [tuple(field.split(".")) for field in fields]
+    try:
+        data = project_selection(root[data_key], paths)
+    except ValueError as err:
+        raise ValueError(f"{err} in {data_name} of {_field_name(root_key)}") from None
+    projected = {key: (data if key == data_key else children) for key, children in root.items()}
+    return "\n" + render_selection({header: {root_key: projected}}) + "\n"
+
+
+class ProjectedQuery(BaseQuery):
+    """Query whose data selection can be narrowed to a set of fields or a named preset."""
+    DATA_NAME: str
+    PRESETS: dict[str, tuple[str, ...]] = {}
+    fields: tuple[str, ...] | None = None
+
+    def _set_fields(self, fields: str | Iterable[str] | None) -> None:
+        """Narrow the query to fields, a preset name or a list of dotted paths."""
+        if fields is None:
+            return
+        if isinstance(fields, str):
+            if fields not in self.PRESETS:
+                raise ValueError(f"Unknown preset {fields} for {self.OPERATION_NAME}")
+            fields = self.PRESETS[fields]
+        self.fields = tuple(sorted(set(fields)))
+        if not self.fields:
+            raise ValueError("At least one field must be selected")
+        self.QUERY = project_query(type(self).QUERY, self.DATA_NAME, self.fields)
+
+    @property
+    def cache_key(self) -> tuple[str, str]:
+        """Return the operation name and canonicalized variables and fields."""
+        operation_name, variables = super().cache_key
+        if self.fields is None:
+            return operation_name, variables
+        return operation_name, f"{variables}|{','.join(self.fields)}"
@@ -10,6 +10,7 @@ class SignIn(BaseQuery):
     """GraphQL query for sign-in."""
     OPERATION_NAME = "signInN3"
     DATA_NAME = ("token", "hasAgreement")
+    IS_MUTATION = True
     QUERY = """
 mutation signInN3($input: ClientSignInInputV2!, $deviceInfo: DeviceInfoInputV2!) {
   signInN3(input: $input, deviceInfo: $deviceInfo) {
@@ -0,0 +1,87 @@
+"""Client-side rate limiting for MyGas API requests."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import NamedTuple
+
+from .const import LOGGER
+
+
+class RateLimit(NamedTuple):
+    """Rate limit: requests per second and burst size."""
+    rate: float
+    burst: int = 1
+
+
+class TokenBucket:
+    """Token bucket that waits asynchronously for a free token."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """Initialize the bucket."""
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self._rate = rate
+        self._capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        # waiters are served in FIFO order
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    async def async_acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class RateLimiter:
+    """Rate limiter with a global limit, per-identity limits and per-operation limits.
+
+    Per-identity limits apply to each identity separately, per-operation limits
+    are shared by all identities. A request waits for all limits that apply to it.
+    """
+
+    def __init__(self,
+                 global_limit: RateLimit | None = None,
+                 identity_limit: RateLimit | None = None,
+                 operation_limits: dict[str, RateLimit] | None = None) -> None:
+        """Initialize the rate limiter."""
+        self._global_bucket = TokenBucket(*global_limit) if global_limit is not None else None
+        self._identity_limit = identity_limit
+        self._identity_buckets: dict[str, TokenBucket] = {}
+        self._operation_buckets = {
+            operation: TokenBucket(*limit) for operation, limit in (operation_limits or {}).items()
+        }
+
+    def _get_buckets(self, identity: str, operation: str) -> list[TokenBucket]:
+        """Return the buckets that apply to a request."""
+        buckets = []
+        if (bucket := self._operation_buckets.get(operation)) is not None:
+            buckets.append(bucket)
+        if self._identity_limit is not None:
+            bucket = self._identity_buckets.get(identity)
+            if bucket is None:
+                bucket = self._identity_buckets[identity] = TokenBucket(*self._identity_limit)
+            buckets.append(bucket)
+        if self._global_bucket is not None:
+            buckets.append(self._global_bucket)
+        return buckets
+
+    async def async_acquire(self, identity: str, operation: str) -> None:
+        """Wait until the request is allowed by all limits."""
+        started_at = time.monotonic()
+        for bucket in self._get_buckets(identity, operation):
+            await bucket.async_acquire()
+        waited = time.monotonic() - started_at
+        if waited > 0.01:
+            LOGGER.debug("Request %s for %s delayed by rate limit for %.2f s", operation, identity, waited)
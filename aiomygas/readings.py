@@ -0,0 +1,256 @@
+"""Columnar store of meter readings."""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .const import LOGGER, ATTR_UUID, ATTR_VALUES, ATTR_DATE_DT, ATTR_VALUE_DAY, ATTR_VALUE_NIGHT, \
+    ATTR_VALUE_MIDDLE, ATTR_COUNTERS, ATTR_LSPU_INFO_GROUP, READINGS_FILE_SUFFIX
+
+# a reading is stored as a row of little-endian float64: timestamp, day, night, middle
+READING_COLUMNS = ("timestamps", "value_day", "value_night", "value_middle")
+_UUID_RE = re.compile(r"^[\w-]+$")
+
+
+def _to_timestamp(value: float | datetime) -> float:
+    """Return a POSIX timestamp."""
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+def to_float(value: Any) -> float:
+    """Return a reading value as float, NaN if it is missing."""
+    try:
+        return float(value) if value is not None and value != "" else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _from_rows(rows: dict[float, tuple[float, float, float]]) -> MeterReadings:
+    """Return readings from rows by timestamp."""
+    ordered = sorted(rows.items())
+    return MeterReadings(
+        [timestamp for timestamp, _ in ordered],
+        *([row[index] for _, row in ordered] for index in range(3)),
+    )
+
+
+def _same(a: float, b: float) -> bool:
+    """Compare values treating NaN as equal to NaN."""
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+class MeterReadings:
+    """Readings of a counter in float64 columns sorted by timestamp."""
+    __slots__ = READING_COLUMNS
+
+    def __init__(self, timestamps: Iterable[float] = (), value_day: Iterable[float] = (),
+                 value_night: Iterable[float] = (), value_middle: Iterable[float] = ()) -> None:
+        """Initialize the columns."""
+        self.timestamps = array("d", timestamps)
+        self.value_day = array("d", value_day)
+        self.value_night = array("d", value_night)
+        self.value_middle = array("d", value_middle)
+        if not len(self.timestamps) == len(self.value_day) == len(self.value_night) == len(self.value_middle):
+            raise ValueError("Columns must have the same length")
+
+    def __len__(self) -> int:
+        """Return the number of readings."""
+        return len(self.timestamps)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare columns."""
+        if not isinstance(other, MeterReadings):
+            return NotImplemented
+        return all(
+            len(getattr(self, name)) == len(getattr(other, name))
+            and all(_same(a, b) for a, b in zip(getattr(self, name), getattr(other, name)))
+            for name in READING_COLUMNS
+        )
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return f"MeterReadings({len(self)} readings)"
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> MeterReadings:
+        """Create readings from rows of little-endian float64."""
+        rows = array("d")
+        rows.frombytes(data)
+        if sys.byteorder != "little":
+            rows.byteswap()
+        width = len(READING_COLUMNS)
+        if len(rows) % width:
+            raise ValueError("Truncated readings data")
+        return cls(*(rows[index::width] for index in range(width)))
+
+    def to_bytes(self) -> bytes:
+        """Return the readings as rows of little-endian float64."""
+        width = len(READING_COLUMNS)
+        rows = array("d", bytes(8 * width * len(self)))
+        for index, name in enumerate(READING_COLUMNS):
+            rows[index::width] = getattr(self, name)
+        if sys.byteorder != "little":
+            rows.byteswap()
+        return rows.tobytes()
+
+    def between(self, start: float | datetime | None = None, end: float | datetime | None = None) -> MeterReadings:
+        """Return readings with start <= timestamp < end."""
+        first = 0 if start is None else bisect_left(self.timestamps, _to_timestamp(start))
+        last = len(self) if end is None else bisect_left(self.timestamps, _to_timestamp(end))
+        return MeterReadings(*(getattr(self, name)[first:last] for name in READING_COLUMNS))
+
+    def deltas(self) -> MeterReadings:
+        """Return the consumption between consecutive readings, at the timestamp of the later one."""
+        return MeterReadings(
+            self.timestamps[1:],
+            *(
+                (b - a for a, b in zip(column, column[1:]))
+                for column in (self.value_day, self.value_night, self.value_middle)
+            ),
+        )
+
+    def merge(self, other: MeterReadings) -> MeterReadings | None:
+        """Return readings merged with other, which wins on equal timestamps, or None if nothing changes."""
+        rows = {
+            timestamp: tuple(row)
+            for timestamp, *row in zip(self.timestamps, self.value_day, self.value_night, self.value_middle)
+        }
+        changed = False
+        for timestamp, *row in zip(other.timestamps, other.value_day, other.value_night, other.value_middle):
+            current = rows.get(timestamp)
+            if current is None or not all(_same(a, b) for a, b in zip(current, row)):
+                rows[timestamp] = tuple(row)
+                changed = True
+        return _from_rows(rows) if changed else None
+
+
+def readings_from_counter(counter: dict[str, Any]) -> MeterReadings:
+    """Return the readings of a counter from lspuInfo or elsInfo, deduplicated on dateDt."""
+    rows: dict[float, tuple[float, float, float]] = {}
+    for value in counter.get(ATTR_VALUES) or []:
+        try:
+            timestamp = datetime.fromisoformat(value[ATTR_DATE_DT].replace("Z", "+00:00")).timestamp()
+        except (KeyError, AttributeError, ValueError):
+            continue
+        rows.setdefault(timestamp, (
+            to_float(value.get(ATTR_VALUE_DAY)),
+            to_float(value.get(ATTR_VALUE_NIGHT)),
+            to_float(value.get(ATTR_VALUE_MIDDLE)),
+        ))
+    return _from_rows(rows)
+
+
+class MeterReadingStore:
+    """Meter readings by counter uuid, persisted as one file of float64 rows per counter.
+
+    Files are read into memory. Their fixed-width rows can also be read by other
+    tools, e.g. numpy.fromfile or numpy.memmap with four float64 fields.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        """Initialize the store in the directory path."""
+        self._path = Path(path)
+        self._readings: dict[str, MeterReadings] = {}
+        self._dirty: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    def __contains__(self, uuid: object) -> bool:
+        """Check if the store has readings of a counter."""
+        return uuid in self._readings
+
+    @property
+    def uuids(self) -> list[str]:
+        """Return the counter uuids."""
+        return list(self._readings)
+
+    def get_path(self, uuid: str) -> Path:
+        """Return the file of a counter."""
+        if not _UUID_RE.match(uuid):
+            raise ValueError(f"Invalid counter uuid {uuid}")
+        return self._path / f"{uuid}{READINGS_FILE_SUFFIX}"
+
+    def get(self, uuid: str) -> MeterReadings:
+        """Return the readings of a counter."""
+        return self._readings.get(uuid) or MeterReadings()
+
+    def between(self, uuid: str, start: float | datetime | None = None,
+                end: float | datetime | None = None) -> MeterReadings:
+        """Return the readings of a counter with start <= timestamp < end."""
+        return self.get(uuid).between(start, end)
+
+    def deltas(self, uuid: str, start: float | datetime | None = None,
+               end: float | datetime | None = None) -> MeterReadings:
+        """Return the consumption of a counter between consecutive readings in a range."""
+        return self.between(uuid, start, end).deltas()
+
+    def add(self, uuid: str, readings: MeterReadings) -> bool:
+        """Merge readings of a counter and return True if anything has changed."""
+        self.get_path(uuid)
+        current = self._readings.get(uuid)
+        merged = readings if current is None else current.merge(readings)
+        if merged is None or (current is None and not len(merged)):
+            return False
+        self._readings[uuid] = merged
+        self._dirty.add(uuid)
+        return True
+
+    def add_counters(self, counters: Iterable[dict[str, Any]]) -> list[str]:
+        """Merge readings of counters and return the uuids of changed counters."""
+        return [
+            counter[ATTR_UUID] for counter in counters
+            if counter.get(ATTR_UUID) and self.add(counter[ATTR_UUID], readings_from_counter(counter))
+        ]
+
+    def add_info(self, info: dict[str, Any]) -> list[str]:
+        """Merge readings from the result of async_get_lspu_info or async_get_els_info."""
+        groups = info.get(ATTR_LSPU_INFO_GROUP) or [info]
+        return [uuid for group in groups for uuid in self.add_counters(group.get(ATTR_COUNTERS) or [])]
+
+    def _load(self) -> dict[str, MeterReadings]:
+        """Read all counter files."""
+        readings = {}
+        for path in self._path.glob(f"*{READINGS_FILE_SUFFIX}"):
+            try:
+                if data := path.read_bytes():
+                    readings[path.name.removesuffix(READINGS_FILE_SUFFIX)] = MeterReadings.from_bytes(data)
+            except (OSError, ValueError) as err:
+                LOGGER.warning("Unable to read meter readings %s: %s", path, err)
+        return readings
+
+    def _save(self, readings: dict[str, MeterReadings]) -> None:
+        """Write counter files atomically."""
+        self._path.mkdir(parents=True, exist_ok=True)
+        for uuid, counter_readings in readings.items():
+            path = self.get_path(uuid)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(counter_readings.to_bytes())
+            os.replace(tmp_path, path)
+
+    async def async_load(self) -> None:
+        """Load readings from disk, readings added since are kept."""
+        async with self._lock:
+            loaded = await asyncio.to_thread(self._load)
+        for uuid, readings in loaded.items():
+            current = self._readings.get(uuid)
+            self._readings[uuid] = readings if current is None else (readings.merge(current) or readings)
+
+    async def async_save(self) -> None:
+        """Write changed counters to disk."""
+        async with self._lock:
+            dirty = {uuid: self._readings[uuid] for uuid in self._dirty}
+            self._dirty.clear()
+            try:
+                await asyncio.to_thread(self._save, dirty)
+            except OSError:
+                self._dirty.update(dirty)
+                raise
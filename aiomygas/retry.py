@@ -0,0 +1,140 @@
+"""Retry policy and circuit breaker for MyGas API requests."""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+
+from aiohttp import ClientConnectionError, ClientConnectorError, ClientResponseError, hdrs
+
+from .const import LOGGER, DEFAULT_RETRY_STATUSES, DEFAULT_RETRY_ATTEMPTS, DEFAULT_RETRY_BASE_DELAY, \
+    DEFAULT_RETRY_MAX_DELAY, DEFAULT_CIRCUIT_FAILURE_THRESHOLD, DEFAULT_CIRCUIT_RECOVERY_TIMEOUT
+from .exceptions import MyGasCircuitOpenError
+
+
+def is_transient_error(err: BaseException) -> bool:
+    """Check if the error means that the backend is unavailable or overloaded."""
+    if isinstance(err, ClientResponseError):
+        return err.status >= 500 or err.status == 429
+    return isinstance(err, (ClientConnectionError, asyncio.TimeoutError))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry policy with exponential backoff and jitter.
+
+    Mutations are retried only when the connection could not be established,
+    so a request that may have reached the server is never sent twice.
+    """
+    max_attempts: int = DEFAULT_RETRY_ATTEMPTS
+    base_delay: float = DEFAULT_RETRY_BASE_DELAY
+    max_delay: float = DEFAULT_RETRY_MAX_DELAY
+    jitter: float = 1.0
+    retry_statuses: frozenset[int] = DEFAULT_RETRY_STATUSES
+    retry_timeouts: bool = True
+
+    def is_retryable(self, err: BaseException, is_mutation: bool = False) -> bool:
+        """Check if the request may be retried after err."""
+        if isinstance(err, ClientConnectorError):
+            return True
+        if is_mutation:
+            return False
+        if isinstance(err, ClientResponseError):
+            return err.status in self.retry_statuses
+        if isinstance(err, asyncio.TimeoutError):
+            return self.retry_timeouts
+        return isinstance(err, ClientConnectionError)
+
+    def get_delay(self, attempt: int, err: BaseException | None = None) -> float:
+        """Return the delay before the next attempt (attempt starts at 1)."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay -= delay * self.jitter * random.random()
+        if isinstance(err, ClientResponseError) and err.headers is not None:
+            try:
+                retry_after = float(err.headers.get(hdrs.RETRY_AFTER, 0))
+            except ValueError:
+                retry_after = 0
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Circuit breaker that fails fast while the backend is down."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str,
+                 failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_CIRCUIT_RECOVERY_TIMEOUT) -> None:
+        """Initialize the circuit breaker."""
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Return the current state."""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._recovery_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def before_request(self) -> None:
+        """Raise MyGasCircuitOpenError if the request must not be sent."""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            # let a single trial request through
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            return
+        raise MyGasCircuitOpenError(f"Circuit breaker for {self.name} is open")
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        if self._state != self.CLOSED:
+            LOGGER.info("Circuit breaker for %s closed", self.name)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Register a failed request and open the circuit if needed."""
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state != self.OPEN:
+                LOGGER.warning("Circuit breaker for %s opened after %s failures", self.name, self._failures)
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def record_release(self) -> None:
+        """Release a trial request that finished without a verdict."""
+        self._trial_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """Per-endpoint circuit breakers that may be shared between auth instances."""
+
+    def __init__(self,
+                 failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_CIRCUIT_RECOVERY_TIMEOUT) -> None:
+        """Initialize the registry."""
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """Return the circuit breaker for endpoint."""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, self._failure_threshold, self._recovery_timeout)
+            self._breakers[endpoint] = breaker
+        return breaker
@@ -0,0 +1,132 @@
+"""Incremental parsing of JSON responses."""
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from typing import Any
+
+from .codec import AbstractJsonCodec, get_default_codec
+from .exceptions import MyGasApiParseError
+
+JsonPath = tuple[str | int | None, ...]
+
+_STRUCTURAL_RE = re.compile(rb'["{}\[\]:,]')
+_STRING_END_RE = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+_QUOTE, _COLON, _COMMA, _OPEN_OBJECT, _OPEN_ARRAY = b'":,{['
+
+
+class JsonStreamParser:
+    """Parse a JSON document fed in chunks and return values at given paths as soon as they are complete.
+
+    A path is a tuple of object keys and array indexes, None matches any index.
+    Bytes outside the value being captured are discarded, so memory is bounded by
+    the largest captured value. Values are decoded by codec.
+    """
+
+    def __init__(self, paths: Iterable[JsonPath], codec: AbstractJsonCodec | None = None) -> None:
+        """Initialize the parser."""
+        self._paths = [tuple(path) for path in paths]
+        self._max_depth = max((len(path) for path in self._paths), default=0)
+        self._codec = codec or get_default_codec()
+        self._buffer = bytearray()
+        self._pos = 0
+        # open containers as [key or index, True/False while expecting a key or a value, None for arrays]
+        self._stack: list[list[Any]] = []
+        # depth, start offset and path of the value being captured
+        self._capture: tuple[int, int, JsonPath] | None = None
+        self._started = False
+
+    def _match(self, path: JsonPath) -> bool:
+        """Check if a value at path is captured."""
+        return any(
+            len(pattern) == len(path)
+            and all(a == b or (a is None and isinstance(b, int)) for a, b in zip(pattern, path))
+            for pattern in self._paths
+        )
+
+    def _start_value(self, start: int) -> None:
+        """Start capturing the value that begins at start if its path matches."""
+        if self._capture is None and len(self._stack) <= self._max_depth:
+            path = tuple(frame[0] for frame in self._stack)
+            if self._match(path):
+                self._capture = (len(self._stack), start, path)
+
+    def _end_value(self, end: int, results: list[tuple[JsonPath, Any]]) -> None:
+        """Decode the captured value if it ends at end."""
+        if self._capture is None or self._capture[0] != len(self._stack):
+            return
+        _, start, path = self._capture
+        self._capture = None
+        data = bytes(self._buffer[start:end])
+        if data.strip():
+            results.append((path, self._loads(data)))
+
+    def _loads(self, data: bytes) -> Any:
+        """Decode a JSON value."""
+        try:
+            return self._codec.loads(data)
+        except ValueError as err:
+            raise MyGasApiParseError(f"Invalid JSON response: {err}") from err
+
+    def feed(self, chunk: bytes) -> list[tuple[JsonPath, Any]]:
+        """Parse a chunk and return the (path, value) pairs completed by it in document order."""
+        buffer = self._buffer
+        buffer += chunk
+        stack = self._stack
+        results: list[tuple[JsonPath, Any]] = []
+        pos = self._pos
+        while (match := _STRUCTURAL_RE.search(buffer, pos)) is not None:
+            index = match.start()
+            char = buffer[index]
+            if char == _QUOTE:
+                end = _STRING_END_RE.match(buffer, index + 1)
+                if end is None:
+                    # the string continues in the next chunk
+                    pos = index
+                    break
+                pos = end.end()
+                if stack and stack[-1][1] is True:
+                    stack[-1][0] = self._loads(bytes(buffer[index:pos])) if self._capture is None else None
+                continue
+            pos = index + 1
+            if char == _COLON:
+                if not stack or stack[-1][1] is not True:
+                    raise MyGasApiParseError("Invalid JSON response: unexpected colon")
+                stack[-1][1] = False
+                self._start_value(pos)
+            elif char == _COMMA:
+                if not stack:
+                    raise MyGasApiParseError("Invalid JSON response: unexpected comma")
+                self._end_value(index, results)
+                if stack[-1][1] is None:
+                    stack[-1][0] += 1
+                    self._start_value(pos)
+                else:
+                    stack[-1][1] = True
+            elif char == _OPEN_OBJECT:
+                self._started = True
+                stack.append([None, True])
+            elif char == _OPEN_ARRAY:
+                self._started = True
+                stack.append([0, None])
+                self._start_value(pos)
+            else:
+                if not stack:
+                    raise MyGasApiParseError("Invalid JSON response: unexpected closing bracket")
+                self._end_value(index, results)
+                stack.pop()
+        else:
+            pos = len(buffer)
+        # keep only the captured value and an unfinished string
+        keep = pos if self._capture is None else min(pos, self._capture[1])
+        del buffer[:keep]
+        self._pos = pos - keep
+        if self._capture is not None:
+            depth, start, path = self._capture
+            self._capture = (depth, start - keep, path)
+        return results
+
+    def close(self) -> None:
+        """Check that the document is complete."""
+        if not self._started or self._stack:
+            raise MyGasApiParseError("Invalid JSON response: incomplete document")
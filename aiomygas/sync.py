@@ -0,0 +1,198 @@
+"""Incremental sync of payments and charges into a local SQLite database."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .api import MyGasApi
+from .const import LOGGER, ATTR_PAYMENT_ID, ATTR_ID, ATTR_DATE, ATTR_AMOUNT_KOP, ATTR_SOURCE, \
+    ATTR_SERVICE_NAME, ATTR_SERVICE_UUID, SYNC_KIND_PAYMENTS, SYNC_KIND_CHARGES
+
+SYNC_KINDS = (SYNC_KIND_PAYMENTS, SYNC_KIND_CHARGES)
+
+
+class SyncDelta(NamedTuple):
+    """Records added and changed by a sync."""
+    added: list[dict[str, Any]]
+    changed: list[dict[str, Any]]
+
+    def __bool__(self) -> bool:
+        """Check if anything has changed."""
+        return bool(self.added or self.changed)
+
+
+def _digest(data: Any) -> str:
+    """Return the digest of canonicalized JSON data."""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _record_key(kind: str, record: dict[str, Any]) -> str:
+    """Return the natural key of a record.
+
+    Payments without paymentId and charges without id are keyed by their content.
+    """
+    if kind == SYNC_KIND_PAYMENTS:
+        if record.get(ATTR_PAYMENT_ID) is not None:
+            return str(record[ATTR_PAYMENT_ID])
+        fields = (record.get(ATTR_DATE), record.get(ATTR_AMOUNT_KOP), record.get(ATTR_SOURCE),
+                  record.get(ATTR_SERVICE_NAME))
+    else:
+        fields = (record.get(ATTR_ID), record.get(ATTR_DATE), record.get(ATTR_SERVICE_UUID))
+    return "|".join("" if field is None else str(field) for field in fields)
+
+
+def _record_keys(kind: str, records: list[dict[str, Any]]) -> list[str]:
+    """Return unique keys of records, numbering records with equal natural keys."""
+    seen: Counter[str] = Counter()
+    keys = []
+    for record in records:
+        key = _record_key(kind, record)
+        seen[key] += 1
+        keys.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+    return keys
+
+
+class SyncEngine:
+    """Keep payments and charges of accounts in a local SQLite database.
+
+    Only new or changed records are written and returned. A checkpoint per account
+    and kind records the last sync, so an interrupted backfill resumes where it stopped.
+    """
+
+    def __init__(self, api: MyGasApi, path: str | os.PathLike[str]) -> None:
+        """Initialize the engine."""
+        self._api = api
+        self._path = Path(path)
+        self._lock = asyncio.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection and create the schema if needed."""
+        if not self._initialized:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "kind TEXT NOT NULL, lspu_id INTEGER NOT NULL, record_key TEXT NOT NULL, "
+                "date TEXT, digest TEXT NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (kind, lspu_id, record_key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS records_date ON records (kind, lspu_id, date)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "kind TEXT NOT NULL, lspu_id INTEGER NOT NULL, synced_at REAL NOT NULL, "
+                "digest TEXT NOT NULL, PRIMARY KEY (kind, lspu_id))"
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _get_checkpoint(self, kind: str, lspu_id: int) -> tuple[float, str] | None:
+        """Return the time and digest of the last sync."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT synced_at, digest FROM checkpoints WHERE kind = ? AND lspu_id = ?", (kind, lspu_id)
+            ).fetchone()
+        conn.close()
+        return row
+
+    def _apply(self, kind: str, lspu_id: int, records: list[dict[str, Any]]) -> SyncDelta:
+        """Upsert new and changed records and save the checkpoint in one transaction."""
+        now = time.time()
+        digest = _digest(records)
+        delta = SyncDelta([], [])
+        with self._connect() as conn:
+            checkpoint = conn.execute(
+                "SELECT digest FROM checkpoints WHERE kind = ? AND lspu_id = ?", (kind, lspu_id)
+            ).fetchone()
+            if checkpoint is None or checkpoint[0] != digest:
+                stored = dict(conn.execute(
+                    "SELECT record_key, digest FROM records WHERE kind = ? AND lspu_id = ?", (kind, lspu_id)
+                ).fetchall())
+                rows = []
+                for key, record in zip(_record_keys(kind, records), records):
+                    record_digest = _digest(record)
+                    if stored.get(key) == record_digest:
+                        continue
+                    (delta.added if key not in stored else delta.changed).append(record)
+                    rows.append((kind, lspu_id, key, record.get(ATTR_DATE), record_digest,
+                                 json.dumps(record, ensure_ascii=False), now))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO records (kind, lspu_id, record_key, date, digest, data, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (kind, lspu_id, synced_at, digest) VALUES (?, ?, ?, ?)",
+                (kind, lspu_id, now, digest),
+            )
+        conn.close()
+        return delta
+
+    def _get_records(self, kind: str, lspu_id: int, since: str | None) -> list[dict[str, Any]]:
+        """Return stored records ordered by date."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM records WHERE kind = ? AND lspu_id = ? AND (? IS NULL OR date >= ?) "
+                "ORDER BY date, record_key", (kind, lspu_id, since, since)
+            ).fetchall()
+        conn.close()
+        return [json.loads(row[0]) for row in rows]
+
+    async def _async_fetch(self, kind: str, lspu_id: int) -> list[dict[str, Any]]:
+        """Fetch all records of an account."""
+        if kind == SYNC_KIND_PAYMENTS:
+            records = await self._api.async_get_payments(lspu_id)
+        elif kind == SYNC_KIND_CHARGES:
+            records = await self._api.async_get_charges(lspu_id)
+        else:
+            raise ValueError(f"Unknown sync kind {kind}")
+        return list(records or [])
+
+    async def async_sync_account(self, kind: str, lspu_id: int) -> SyncDelta:
+        """Sync payments or charges of an account and return the delta."""
+        records = await self._async_fetch(kind, lspu_id)
+        async with self._lock:
+            delta = await asyncio.to_thread(self._apply, kind, lspu_id, records)
+        LOGGER.debug("Synced %s of %s: %s added, %s changed", kind, lspu_id, len(delta.added), len(delta.changed))
+        return delta
+
+    async def async_sync_payments(self, lspu_id: int) -> SyncDelta:
+        """Sync payments of an account and return the delta."""
+        return await self.async_sync_account(SYNC_KIND_PAYMENTS, lspu_id)
+
+    async def async_sync_charges(self, lspu_id: int) -> SyncDelta:
+        """Sync charges of an account and return the delta."""
+        return await self.async_sync_account(SYNC_KIND_CHARGES, lspu_id)
+
+    async def async_sync(self, lspu_ids: Iterable[int], kinds: Iterable[str] = SYNC_KINDS,
+                         max_age: float | None = None) -> dict[tuple[str, int], SyncDelta]:
+        """Sync several accounts and return the deltas by (kind, lspu_id).
+
+        Accounts synced less than max_age seconds ago are skipped, so a backfill
+        interrupted by an error resumes with the accounts it has not reached.
+        """
+        deltas: dict[tuple[str, int], SyncDelta] = {}
+        for lspu_id in lspu_ids:
+            for kind in kinds:
+                if max_age is not None:
+                    async with self._lock:
+                        checkpoint = await asyncio.to_thread(self._get_checkpoint, kind, lspu_id)
+                    if checkpoint is not None and time.time() - checkpoint[0] < max_age:
+                        continue
+                deltas[kind, lspu_id] = await self.async_sync_account(kind, lspu_id)
+        return deltas
+
+    async def async_get_records(self, kind: str, lspu_id: int, since: str | None = None) -> list[dict[str, Any]]:
+        """Return stored payments or charges of an account, optionally from the date since (ISO format)."""
+        async with self._lock:
+            return await asyncio.to_thread(self._get_records, kind, lspu_id, since)
@@ -0,0 +1,225 @@
+"""Token stores for MyGas API auth."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+from .const import LOGGER
+
+
+class AbstractTokenStore(ABC):
+    """Abstract class to persist access tokens between runs."""
+
+    @abstractmethod
+    async def async_load(self, identifier: str) -> dict[str, Any] | None:
+        """Return the stored token for identifier or None."""
+
+    @abstractmethod
+    async def async_save(self, identifier: str, token: dict[str, Any]) -> None:
+        """Store the token for identifier."""
+
+    @abstractmethod
+    async def async_delete(self, identifier: str) -> None:
+        """Remove the stored token for identifier."""
+
+
+class MemoryTokenStore(AbstractTokenStore):
+    """Token store that keeps tokens in memory."""
+
+    def __init__(self) -> None:
+        """Initialize the store."""
+        self._tokens: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self, identifier: str) -> dict[str, Any] | None:
+        """Return the stored token for identifier or None."""
+        token = self._tokens.get(identifier)
+        return dict(token) if token is not None else None
+
+    async def async_save(self, identifier: str, token: dict[str, Any]) -> None:
+        """Store the token for identifier."""
+        self._tokens[identifier] = dict(token)
+
+    async def async_delete(self, identifier: str) -> None:
+        """Remove the stored token for identifier."""
+        self._tokens.pop(identifier, None)
+
+
+class JsonFileTokenStore(AbstractTokenStore):
+    """Token store that keeps tokens in a JSON file.
+
+    Updates hold an advisory lock on a sidecar ``.lock`` file, so processes sharing
+    the file do not lose each other's tokens. Without fcntl (Windows) the store is
+    safe for a single process only, use SqliteTokenStore there.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        """Initialize the store."""
+        self._path = Path(path)
+        self._lock = asyncio.Lock()
+
+    def _read(self) -> dict[str, Any]:
+        """Read all tokens from the file."""
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as err:
+            LOGGER.warning("Unable to read token store %s: %s", self._path, err)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict[str, Any]) -> None:
+        """Write all tokens to the file atomically."""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._path)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold the lock of the file between processes while it is updated."""
+        if fcntl is None:
+            yield
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._path.with_name(f"{self._path.name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _load(self, identifier: str) -> dict[str, Any] | None:
+        """Return the stored token for identifier or None."""
+        token = self._read().get(identifier)
+        return token if isinstance(token, dict) else None
+
+    def _save(self, identifier: str, token: dict[str, Any]) -> None:
+        """Store the token for identifier."""
+        with self._file_lock():
+            data = self._read()
+            data[identifier] = token
+            self._write(data)
+
+    def _delete(self, identifier: str) -> None:
+        """Remove the stored token for identifier."""
+        with self._file_lock():
+            data = self._read()
+            if data.pop(identifier, None) is not None:
+                self._write(data)
+
+    async def async_load(self, identifier: str) -> dict[str, Any] | None:
+        """Return the stored token for identifier or None."""
+        async with self._lock:
+            return await asyncio.to_thread(self._load, identifier)
+
+    async def async_save(self, identifier: str, token: dict[str, Any]) -> None:
+        """Store the token for identifier."""
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._save, identifier, token)
+            except OSError as err:
+                LOGGER.warning("Unable to write token store %s: %s", self._path, err)
+
+    async def async_delete(self, identifier: str) -> None:
+        """Remove the stored token for identifier."""
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._delete, identifier)
+            except OSError as err:
+                LOGGER.warning("Unable to write token store %s: %s", self._path, err)
+
+
+class SqliteTokenStore(AbstractTokenStore):
+    """Token store that keeps tokens in a SQLite database."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        """Initialize the store."""
+        self._path = Path(path)
+        self._lock = asyncio.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection and create the schema if needed."""
+        conn = sqlite3.connect(self._path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "identifier TEXT PRIMARY KEY, token TEXT NOT NULL)"
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _load(self, identifier: str) -> dict[str, Any] | None:
+        """Return the stored token for identifier or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT token FROM tokens WHERE identifier = ?", (identifier,)
+            ).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        try:
+            token = json.loads(row[0])
+        except json.JSONDecodeError:
+            return None
+        return token if isinstance(token, dict) else None
+
+    def _save(self, identifier: str, token: dict[str, Any]) -> None:
+        """Store the token for identifier."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tokens (identifier, token) VALUES (?, ?)",
+                (identifier, json.dumps(token)),
+            )
+        conn.close()
+
+    def _delete(self, identifier: str) -> None:
+        """Remove the stored token for identifier."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tokens WHERE identifier = ?", (identifier,))
+        conn.close()
+
+    async def async_load(self, identifier: str) -> dict[str, Any] | None:
+        """Return the stored token for identifier or None."""
+        async with self._lock:
+            try:
+                return await asyncio.to_thread(self._load, identifier)
+            except (OSError, sqlite3.Error) as err:
+                LOGGER.warning("Unable to read token store %s: %s", self._path, err)
+                return None
+
+    async def async_save(self, identifier: str, token: dict[str, Any]) -> None:
+        """Store the token for identifier."""
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._save, identifier, token)
+            except (OSError, sqlite3.Error) as err:
+                LOGGER.warning("Unable to write token store %s: %s", self._path, err)
+
+    async def async_delete(self, identifier: str) -> None:
+        """Remove the stored token for identifier."""
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._delete, identifier)
+            except (OSError, sqlite3.Error) as err:
+                LOGGER.warning("Unable to write token store %s: %s", self._path, err)
@@ -0,0 +1,48 @@
+"""Benchmark of JSON codecs against the recorded responses in tests/fixtures.
+
+Run with ``python benchmarks/codec.py``. Codecs whose optional dependency
+is not installed are skipped.
+"""
+from __future__ import annotations
+
+import timeit
+from pathlib import Path
+
+from aiomygas import queries
+from aiomygas.codec import AbstractJsonCodec, MsgspecCodec, OrjsonCodec, StdlibJsonCodec
+
+FIXTURES_PATH = Path(__file__).parent.parent.joinpath("tests", "fixtures")
+NUMBER = 500
+
+
+def get_codecs() -> list[AbstractJsonCodec]:
+    """Return the available codecs."""
+    codecs: list[AbstractJsonCodec] = [StdlibJsonCodec()]
+    for codec_class in (OrjsonCodec, MsgspecCodec):
+        try:
+            codecs.append(codec_class())
+        except RuntimeError:
+            print(f"{codec_class.__name__} is not available")
+    return codecs
+
+
+def main() -> None:
+    """Run the benchmark."""
+    codecs = get_codecs()
+    print(f"{'decode fixture':<40}{'size, B':>10}" + "".join(f"{c.name + ', us':>16}" for c in codecs))
+    for fixture in sorted(FIXTURES_PATH.glob("*_response*.json")):
+        body = fixture.read_bytes()
+        times = [min(timeit.repeat(lambda c=c: c.loads(body), number=NUMBER, repeat=5)) / NUMBER * 1e6
+                 for c in codecs]
+        print(f"{fixture.name:<40}{len(body):>10}" + "".join(f"{t:>16.1f}" for t in times))
+
+    print()
+    print(f"{'encode request':<40}{'':>10}" + "".join(f"{c.name + ', us':>16}" for c in codecs))
+    query = queries.IndicationSend(123456789, "test_uuid", 123.45, 987654321)
+    times = [min(timeit.repeat(lambda c=c: query.to_bytes(codec=c), number=NUMBER * 20, repeat=5))
+             / (NUMBER * 20) * 1e6 for c in codecs]
+    print(f"{query.OPERATION_NAME:<40}{'':>10}" + "".join(f"{t:>16.2f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Micro-benchmark of request payload encoding in async_request.
+
+Compares encoding the payload dict on every request (as aiohttp does for
+``json=payload``) with the pre-serialized payload from ``BaseQuery.to_bytes()``.
+
+Run with ``python benchmarks/payload.py``.
+"""
+from __future__ import annotations
+
+import json
+import timeit
+
+from aiomygas import queries
+
+NUMBER = 20000
+
+QUERIES = [
+    queries.Accounts(),
+    queries.ElsInfo(123456789),
+    queries.LspuInfo(123456789),
+    queries.Charges(123456789),
+    queries.Payments(123456789),
+]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"{'query':<16}{'size, B':>10}{'min, B':>10}{'dict, us':>12}{'bytes, us':>12}{'saved':>8}")
+    for query in QUERIES:
+        def encode_dict() -> bytes:
+            return json.dumps(query.to_json()).encode("utf-8")
+
+        def encode_bytes() -> bytes:
+            return query.to_bytes()
+
+        encode_bytes()  # warm up the payload cache
+        dict_time = min(timeit.repeat(encode_dict, number=NUMBER, repeat=5)) / NUMBER * 1e6
+        bytes_time = min(timeit.repeat(encode_bytes, number=NUMBER, repeat=5)) / NUMBER * 1e6
+        print(f"{query.OPERATION_NAME:<16}{len(encode_dict()):>10}{len(encode_bytes()):>10}"
+              f"{dict_time:>12.2f}{bytes_time:>12.2f}{1 - bytes_time / dict_time:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
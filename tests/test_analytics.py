@@ -0,0 +1,86 @@
+"""Test analytics module."""
+import json
+import math
+import unittest
+from pathlib import Path
+
+from aiomygas.readings import readings_from_counter
+
+try:
+    import numpy as np
+    from aiomygas.analytics import analyze, analyze_readings, collect_counters
+except ImportError:
+    np = None
+
+FIXTURES_PATH = Path(__file__).parent.absolute().joinpath("fixtures")
+
+
+def make_counter(uuid, values, capacity=None, average_rate=None):
+    """Return a counter with monthly readings given as valueDay."""
+    return {"uuid": uuid, "capacity": capacity, "averageRate": average_rate, "values": [
+        {"valueDay": value, "valueNight": None, "valueMiddle": None, "dateDt": f"2024-{month:02}-01T00:00:00.000Z"}
+        for month, value in enumerate(values, 1)
+    ]}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestAnalytics(unittest.TestCase):
+    """Test consumption analytics."""
+
+    def test_consumption(self):
+        """Test consumption, rollover and comparison with averageRate."""
+        result = analyze([{"counters": [
+            make_counter("a", [99990, 10, 40], capacity=5, average_rate=30),
+            make_counter("b", [5, 3], average_rate=None),
+        ]}])
+        self.assertEqual(result.counters.uuid, ["a", "b"])
+        periods = result.periods
+        self.assertEqual(periods.counter.tolist(), [0, 0, 1])
+        self.assertEqual(periods.consumption.tolist(), [20, 30, -2])
+        self.assertEqual(periods.rollover.tolist(), [True, False, False])
+        self.assertEqual(periods.outlier.tolist(), [False, False, True])
+        self.assertAlmostEqual(periods.daily_rate[1], 30 / 29)
+        self.assertAlmostEqual(periods.average_ratio[1], 30 / 29 * 365.25 / 12 / 30)
+        self.assertTrue(math.isnan(periods.average_ratio[2]))
+        self.assertEqual(result.counters.consumption.tolist(), [50, -2])
+        self.assertEqual(result.counters.periods.tolist(), [2, 1])
+        self.assertEqual(result.counters.outliers.tolist(), [0, 1])
+
+    def test_outliers(self):
+        """Test outliers are detected per counter."""
+        result = analyze([{"counters": [
+            make_counter("a", [0, 10, 21, 30, 200, 211]),
+            make_counter("b", [0, 100, 210, 300, 400, 510]),
+        ]}])
+        outliers = result.periods.outlier.reshape(2, 5)
+        self.assertEqual(outliers[0].tolist(), [False, False, False, True, False])
+        self.assertFalse(outliers[1].any())
+        result = analyze([{"counters": [make_counter("a", [0, 10, 200])]}])
+        self.assertFalse(result.periods.outlier.any())
+
+    def test_empty(self):
+        """Test analysis without readings."""
+        result = analyze_readings({})
+        self.assertEqual(result.counters.uuid, [])
+        self.assertEqual(len(result.periods.consumption), 0)
+        result = analyze([{"counters": [make_counter("a", [])]}])
+        self.assertEqual(result.counters.periods.tolist(), [0])
+        self.assertEqual(result.counters.consumption.tolist(), [0])
+
+    def test_fixtures(self):
+        """Test counters are taken from lspuInfo and elsInfo."""
+        infos = []
+        for file_name, operation_name in (("lspuInfo_response.json", "lspuInfo"),
+                                          ("elsInfo_response.json", "elsInfo")):
+            with open(FIXTURES_PATH.joinpath(file_name), encoding='utf-8') as json_file:
+                infos.append(json.load(json_file)["data"][operation_name]["info"])
+        counters = collect_counters(infos)
+        self.assertEqual(len(counters), 2)
+        result = analyze(infos)
+        self.assertEqual(result.counters.capacity.tolist(), [5, 5])
+        self.assertEqual(len(result.periods.consumption),
+                         sum(max(len(readings_from_counter(c)) - 1, 0) for c in counters.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,20 @@
+import asyncio
 import json
+import time
 import unittest
+from functools import partial
 from pathlib import Path
 from unittest import mock
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 from aiohttp import ClientSession
 
-from aiomygas import SimpleMyGasAuth
+from aiomygas import MemoryResponseCache, SimpleMyGasAuth
+from aiomygas.auth import AbstractMyGasAuth
 from aiomygas import queries
 from aiomygas.api import MyGasApi
 from aiomygas.const import ATTR_DATA, ATTR_OK, ATTR_ERROR
+from aiomygas.exceptions import MyGasApiError
 
 FIXTURES_PATH = Path(__file__).parent.absolute().joinpath("fixtures")
 
@@ -49,7 +54,7 @@ class TestMyGasApi(unittest.IsolatedAsyncioTestCase):
                 json_resp = json.load(json_file)
 
             self.session.post.return_value.__aenter__.return_value.status = 200
-            self.session.post.return_value.__aenter__.return_value.json.return_value = json_resp
+            self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
 
             async_method = getattr(api, method_name)
 
@@ -73,7 +78,7 @@ class TestMyGasApi(unittest.IsolatedAsyncioTestCase):
                     json_resp[ATTR_DATA][query.OPERATION_NAME][query.DATA_NAME] = None
 
             self.session.post.return_value.__aenter__.return_value.status = 200
-            self.session.post.return_value.__aenter__.return_value.json.return_value = json_resp
+            self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
 
             async_method = getattr(api, method_name)
 
@@ -100,7 +105,7 @@ class TestMyGasApi(unittest.IsolatedAsyncioTestCase):
                 json_resp[ATTR_DATA][query.OPERATION_NAME][query.DATA_NAME] = None
 
             self.session.post.return_value.__aenter__.return_value.status = 200
-            self.session.post.return_value.__aenter__.return_value.json.return_value = json_resp
+            self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
 
             async_method = getattr(api, method_name)
 
@@ -108,3 +113,341 @@ class TestMyGasApi(unittest.IsolatedAsyncioTestCase):
                 info = await async_method(*args, **kwargs)
 
             self.assertEqual(str(cm.exception), f"Key {query.DATA_NAME} not found in response")
+
+    @mock.patch("aiomygas.auth.SimpleMyGasAuth.async_get_token")
+    async def test_api_methods_fields(self, mock_get_token):
+        """Test api methods send the projected document."""
+        api = MyGasApi(self.auth)
+        mock_get_token.return_value = "test_token"
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(
+            {ATTR_DATA: {"lspuInfo": {"ok": True, "error": None, "info": {"balance": 1}}}}).encode()
+
+        info = await api.async_get_lspu_info(123456789, fields="balances")
+
+        self.assertEqual(info, {"balance": 1})
+        payload = json.loads(self.session.post.call_args.kwargs["data"])
+        self.assertIn("balances{", payload["query"])
+        self.assertNotIn("counters", payload["query"])
+
+    @mock.patch("aiomygas.auth.SimpleMyGasAuth.async_get_token")
+    async def test_async_batch(self, mock_get_token):
+        """Test async_batch splits queries into batches and keeps the order."""
+        api = MyGasApi(self.auth)
+        mock_get_token.return_value = "test_token"
+
+        async def fake_read():
+            variables = json.loads(self.session.post.call_args.kwargs["data"])["variables"]
+            return json.dumps({ATTR_DATA: {
+                alias.split("_")[0]: {"ok": True, "error": None, "data": [value]}
+                for alias, value in variables.items()
+            }}).encode()
+
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = fake_read
+        batch = [queries.Charges(lspu_id) for lspu_id in range(5)]
+
+        results = await api.async_batch(batch, max_batch_size=2)
+
+        self.assertEqual(results, [[0], [1], [2], [3], [4]])
+        self.assertEqual(self.session.post.call_count, 3)
+
+    @mock.patch("aiomygas.auth.SimpleMyGasAuth.async_get_token")
+    async def test_async_batch_errors(self, mock_get_token):
+        """Test async_batch raises or returns errors of single queries."""
+        api = MyGasApi(self.auth)
+        mock_get_token.return_value = "test_token"
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps({ATTR_DATA: {
+            "q0": {"ok": True, "error": None, "data": [1]},
+            "q1": {"ok": False, "error": "test_error", "data": None},
+        }}).encode()
+        batch = [queries.Charges(1), queries.Payments(1)]
+
+        results = await api.async_batch(batch, return_exceptions=True)
+        self.assertEqual(results[0], [1])
+        self.assertEqual(str(results[1]), "test_error")
+
+        with self.assertRaises(MyGasApiError):
+            await api.async_batch(batch)
+
+    def _set_stream(self, body, chunk_size=64):
+        """Make the mocked session stream body in chunks."""
+        async def iter_any():
+            for i in range(0, len(body), chunk_size):
+                yield body[i:i + chunk_size]
+
+        self.session.post.return_value.__aenter__.return_value.content.iter_any = iter_any
+
+    @mock.patch("aiomygas.auth.SimpleMyGasAuth.async_get_token")
+    async def test_aiter_els_lspu_groups(self, mock_get_token):
+        """Test lspuInfoGroup entries are streamed."""
+        api = MyGasApi(self.auth)
+        mock_get_token.return_value = "test_token"
+        with open(FIXTURES_PATH.joinpath("elsInfo_response.json"), encoding='utf-8') as json_file:
+            json_resp = json.load(json_file)
+        self._set_stream(json.dumps(json_resp).encode())
+
+        groups = [group async for group in api.aiter_els_lspu_groups(123456789)]
+        self.assertEqual(groups, json_resp["data"]["elsInfo"]["info"]["lspuInfoGroup"])
+        payload = json.loads(self.session.post.call_args.kwargs["data"])
+        self.assertEqual(payload["variables"], {"elsId": 123456789})
+
+        self._set_stream(json.dumps({ATTR_DATA: {"elsInfo": {ATTR_OK: False, ATTR_ERROR: "test_error"}}}).encode())
+        with self.assertRaisesRegex(MyGasApiError, "test_error"):
+            [group async for group in api.aiter_els_lspu_groups(123456789)]
+
+        self._set_stream(json.dumps(json_resp).encode()[:-10])
+        with self.assertRaises(MyGasApiError):
+            [group async for group in api.aiter_els_lspu_groups(123456789)]
+
+
+class TestMyGasApiSnapshot(unittest.IsolatedAsyncioTestCase):
+    """Test MyGasApi snapshot."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.api = MyGasApi(MagicMock(spec=AbstractMyGasAuth))
+        self.running = 0
+        self.max_running = 0
+        accounts = {
+            "elsGroup": [{"els": {"id": 1}, "lspu": [{"id": 10}, {"id": 11}]}],
+            "lspu": [{"id": 20}],
+        }
+        self.api.async_get_accounts = AsyncMock(return_value=accounts)
+        self.api.async_get_els_info = AsyncMock(side_effect=partial(self.fetch, "els"))
+        self.api.async_get_lspu_info = AsyncMock(side_effect=partial(self.fetch, "lspu"))
+        self.api.async_get_charges = AsyncMock(side_effect=partial(self.fetch, "charges"))
+        self.api.async_get_payments = AsyncMock(side_effect=partial(self.fetch, "payments"))
+
+    async def fetch(self, kind, account_id):
+        """Return fake data after a while, failing for account 11."""
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if account_id == 11:
+            raise MyGasApiError("test_error")
+        return f"{kind} {account_id}"
+
+    async def test_snapshot(self):
+        """Test all accounts are fetched with partial failures."""
+        snapshot = await self.api.async_get_snapshot(concurrency=2)
+        self.assertEqual(snapshot.els_info, {1: "els 1"})
+        self.assertEqual(snapshot.lspu_info, {20: "lspu 20"})
+        self.assertEqual(snapshot.charges, {10: "charges 10", 20: "charges 20"})
+        self.assertEqual(snapshot.payments, {10: "payments 10", 20: "payments 20"})
+        self.assertEqual(sorted(snapshot.errors), [("charges", 11), ("payments", 11)])
+        self.assertEqual(self.max_running, 2)
+
+    async def test_timeout(self):
+        """Test a timed out request is recorded as an error of its account."""
+        auth = SimpleMyGasAuth("test_user", "test_password", MagicMock(spec=ClientSession))
+        auth._token = {"token": "test_token", "expires_at": time.time() + 3600}
+
+        async def post(query, headers):
+            if query.variables["lspuId"] == 11:
+                raise asyncio.TimeoutError
+            return {ATTR_DATA: {query.OPERATION_NAME: {ATTR_OK: True, ATTR_ERROR: None, "data": "test_data"}}}
+
+        auth._async_post = post
+        api = MyGasApi(auth)
+        api.async_get_accounts = self.api.async_get_accounts
+        snapshot = await api.async_get_snapshot(include=["charges"])
+        self.assertEqual(snapshot.charges, {10: "test_data", 20: "test_data"})
+        self.assertEqual(list(snapshot.errors), [("charges", 11)])
+        self.assertIsInstance(snapshot.errors["charges", 11].__cause__, asyncio.TimeoutError)
+
+    async def test_include(self):
+        """Test only included data is fetched."""
+        snapshot = await self.api.async_get_snapshot(include=["charges"])
+        self.assertEqual(list(snapshot.charges), [10, 20])
+        self.assertEqual(snapshot.payments, {})
+        self.api.async_get_payments.assert_not_called()
+        with self.assertRaises(ValueError):
+            await self.api.async_get_snapshot(include=["unknown"])
+
+
+class TestMyGasApiCache(unittest.IsolatedAsyncioTestCase):
+    """Test MyGasApi response cache."""
+
+    def setUp(self):
+        self.auth = MagicMock(spec=AbstractMyGasAuth)
+        self.auth.identity = "test_user"
+        self.auth.async_request = AsyncMock(side_effect=lambda query: {"variables": dict(query.variables)})
+        self.cache = MemoryResponseCache()
+        self.api = MyGasApi(self.auth, cache=self.cache)
+
+    async def test_cache_hit(self):
+        """Test read queries are served from the cache."""
+        first = await self.api.async_get_lspu_info(1)
+        second = await self.api.async_get_lspu_info(1)
+        await self.api.async_get_lspu_info(2)
+        await self.api.async_get_lspu_info(1, fields="balances")
+
+        self.assertIs(first, second)
+        self.assertEqual(self.auth.async_request.call_count, 3)
+        self.assertEqual((self.api.cache_stats.hits, self.api.cache_stats.misses), (1, 3))
+
+    async def test_cache_ttls(self):
+        """Test operations without TTL are not cached."""
+        api = MyGasApi(self.auth, cache=self.cache, cache_ttls={"accountsN": 60})
+        await api.async_get_accounts()
+        await api.async_get_accounts()
+        await api.async_get_client_info()
+        await api.async_get_client_info()
+        await api.async_get_receipt("2023-11-01", "test@email.ru", 1, False)
+        self.assertEqual(self.auth.async_request.call_count, 4)
+        self.assertIsNone(MyGasApi(self.auth).cache_stats)
+
+    async def test_identity_namespace(self):
+        """Test identities do not share cached responses."""
+        await self.api.async_get_accounts()
+        self.auth.identity = "other_user"
+        await self.api.async_get_accounts()
+        self.assertEqual(self.auth.async_request.call_count, 2)
+
+    async def test_invalidate_after_indication_send(self):
+        """Test sending a reading invalidates the account."""
+        await self.api.async_get_lspu_info(1)
+        await self.api.async_get_lspu_info(2)
+        await self.api.async_get_els_info(10)
+        await self.api.async_get_accounts()
+        self.auth.async_request.reset_mock()
+
+        await self.api.async_indication_send(1, "uuid", 100, 10)
+        await self.api.async_get_lspu_info(1)
+        await self.api.async_get_lspu_info(2)
+        await self.api.async_get_els_info(10)
+        await self.api.async_get_accounts()
+
+        sent = [call.args[0].OPERATION_NAME for call in self.auth.async_request.call_args_list]
+        self.assertEqual(sent, ["indicationSendV4", "lspuInfo", "elsInfo"])
+
+    async def test_indication_send_many(self):
+        """Test readings are grouped into mutations and results mapped back."""
+        def send(query):
+            if isinstance(query, queries.IndicationBatchSend):
+                if query.variables["input"].get("elsId") == 20:
+                    raise MyGasApiError("test_error")
+                return [{"uuid": indication.uuid, "sent": True, "message": str(indication.lspu_id)}
+                        for indication in query.indications]
+            return {"variables": dict(query.variables)}
+
+        self.auth.async_request.side_effect = send
+        await self.api.async_get_lspu_info(1)
+        await self.api.async_get_lspu_info(3)
+        self.auth.async_request.reset_mock()
+        indications = [
+            queries.Indication(1, "a", 10, els_id=10),
+            queries.Indication(2, "b", 20, els_id=10),
+            queries.Indication(1, "a", 11, els_id=10),
+            queries.Indication(3, "c", 30),
+            queries.Indication(4, "d", 40, els_id=20),
+        ]
+        results = await self.api.async_indication_send_many(indications, return_exceptions=True)
+        self.assertEqual([result["message"] for result in results[:4]], ["1", "2", "1", "3"])
+        self.assertIsInstance(results[4], MyGasApiError)
+        sent = [[indication.lspu_id for indication in call.args[0].indications]
+                for call in self.auth.async_request.call_args_list]
+        self.assertEqual(sent, [[1, 2], [1], [3], [4]])
+
+        await self.api.async_get_lspu_info(1)
+        await self.api.async_get_lspu_info(3)
+        self.assertEqual(self.auth.async_request.call_count, 6)
+
+        with self.assertRaises(MyGasApiError):
+            await self.api.async_indication_send_many(indications)
+        results = await self.api.async_indication_send_many(indications[:2], max_batch_size=1)
+        self.assertEqual(len(results), 2)
+
+    async def test_failed_indication_send_keeps_cache(self):
+        """Test a failed reading does not invalidate the account."""
+        await self.api.async_get_lspu_info(1)
+        self.auth.async_request.side_effect = MyGasApiError("test_error")
+        with self.assertRaises(MyGasApiError):
+            await self.api.async_indication_send(1, "uuid", 100)
+        self.assertEqual(len(self.cache), 1)
+
+    async def test_explicit_invalidation(self):
+        """Test explicit invalidation."""
+        await self.api.async_get_lspu_info(1)
+        await self.api.async_get_charges(1)
+        await self.api.async_get_els_info(10)
+        self.assertEqual(await self.api.async_invalidate_cache("lspuInfo", lspu_id=1), 1)
+        self.assertEqual(await self.api.async_invalidate_cache(els_id=10), 1)
+        self.assertEqual(await self.api.async_invalidate_cache(), 1)
+        self.assertEqual(await MyGasApi(self.auth).async_invalidate_cache(), 0)
+
+    async def _store_expired(self, query):
+        """Store an expired response for query as a previous run would."""
+        with mock.patch("time.time", return_value=time.time() - 100):
+            await self.cache.async_set(("test_user", *query.cache_key), {"cached": True}, 10)
+
+    async def test_stale_if_error(self):
+        """Test an expired response is returned when the request fails."""
+        await self._store_expired(queries.LspuInfo(1))
+        self.auth.async_request.side_effect = MyGasApiError("test_error")
+        with self.assertRaises(MyGasApiError):
+            await self.api.async_get_lspu_info(1)
+
+        api = MyGasApi(self.auth, cache=self.cache, stale_if_error=True)
+        with self.assertLogs("aiomygas", level="WARNING"):
+            self.assertEqual(await api.async_get_lspu_info(1), {"cached": True})
+        with self.assertRaises(MyGasApiError):
+            await api.async_get_lspu_info(2)
+
+    async def test_warm_start(self):
+        """Test responses of a previous run are returned at once and refreshed in the background."""
+        await self._store_expired(queries.LspuInfo(1))
+        api = MyGasApi(self.auth, cache=self.cache, warm_start=True)
+
+        results = await asyncio.gather(api.async_get_lspu_info(1), api.async_get_lspu_info(1))
+        self.assertEqual(results, [{"cached": True}, {"cached": True}])
+        await asyncio.gather(*api._refresh_tasks.values())
+        self.assertEqual(self.auth.async_request.call_count, 1)
+
+        self.assertEqual(await api.async_get_lspu_info(1), {"variables": {"lspuId": 1}})
+        self.assertEqual(self.auth.async_request.call_count, 1)
+
+    async def test_warm_start_refresh_error(self):
+        """Test a failed background refresh keeps the cached response."""
+        await self._store_expired(queries.LspuInfo(1))
+        self.auth.async_request.side_effect = MyGasApiError("test_error")
+        api = MyGasApi(self.auth, cache=self.cache, warm_start=True)
+
+        self.assertEqual(await api.async_get_lspu_info(1), {"cached": True})
+        with self.assertLogs("aiomygas", level="WARNING"):
+            await asyncio.gather(*api._refresh_tasks.values(), return_exceptions=True)
+            await asyncio.sleep(0)
+        self.assertEqual(await api.async_get_lspu_info(1), {"cached": True})
+
+    async def test_stale_while_revalidate(self):
+        """Test stale responses are returned within the stale window and refreshed once."""
+        await self._store_expired(queries.LspuInfo(1))  # expired 90 seconds ago
+        await self._store_expired(queries.LspuInfo(2))
+        api = MyGasApi(self.auth, cache=self.cache, stale_ttls={"lspuInfo": 120})
+
+        results = await asyncio.gather(*(api.async_get_lspu_info(1) for _ in range(3)))
+        self.assertEqual(results, [{"cached": True}] * 3)
+        await asyncio.gather(*api._refresh_tasks.values())
+        self.assertEqual(self.auth.async_request.call_count, 1)
+        self.assertEqual(await api.async_get_lspu_info(1), {"variables": {"lspuId": 1}})
+        self.assertEqual(self.auth.async_request.call_count, 1)
+
+        api = MyGasApi(self.auth, cache=self.cache, stale_ttls={"lspuInfo": 60})
+        self.assertEqual(await api.async_get_lspu_info(2), {"variables": {"lspuId": 2}})
+        self.assertEqual(api._refresh_tasks, {})
+
+    async def test_refresh_error_callback(self):
+        """Test background refresh errors are passed to the callback."""
+        await self._store_expired(queries.LspuInfo(1))
+        self.auth.async_request.side_effect = MyGasApiError("test_error")
+        on_refresh_error = MagicMock()
+        api = MyGasApi(self.auth, cache=self.cache, stale_ttls={"lspuInfo": 120},
+                       on_refresh_error=on_refresh_error)
+
+        self.assertEqual(await api.async_get_lspu_info(1), {"cached": True})
+        await asyncio.gather(*api._refresh_tasks.values(), return_exceptions=True)
+        await asyncio.sleep(0)
+
+        query, err = on_refresh_error.call_args.args
+        self.assertEqual(query.variables, {"lspuId": 1})
+        self.assertEqual(str(err), "test_error")
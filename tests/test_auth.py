@@ -1,4 +1,6 @@
+import asyncio
 import json
+import tempfile
 import time
 import unittest
 from pathlib import Path
@@ -8,8 +10,11 @@ from unittest import mock
 from aiohttp import ClientSession
 
 from aiomygas.auth import SimpleMyGasAuth
-from aiomygas.const import CLIENT_SESSION_LIFETIME
-from aiomygas.exceptions import MyGasAuthError
+from aiomygas.coordinator import FileLockAuthCoordinator
+from aiomygas.const import CLIENT_SESSION_LIFETIME, CLOCK_OUT_OF_SYNC_MAX_SEC
+from aiomygas import queries
+from aiomygas.exceptions import MyGasAuthError, MyGasTokenError
+from aiomygas.token_store import JsonFileTokenStore, MemoryTokenStore
 
 FIXTURES_PATH = Path(__file__).parent.absolute().joinpath("fixtures")
 
@@ -94,7 +99,7 @@ class TestSimpleMyGasAuth(IsolatedAsyncioTestCase):
         self.auth._token = invalid_token
         json_resp = self.fixtures["signInN3_response"]
         self.session.post.return_value.__aenter__.return_value.status = 200
-        self.session.post.return_value.__aenter__.return_value.json.return_value = json_resp
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
 
         token = await self.auth.async_get_token()
 
@@ -108,11 +113,233 @@ class TestSimpleMyGasAuth(IsolatedAsyncioTestCase):
         self.auth._token = {}
         error_api_response = self.fixtures["signInN3_response_error"]
         self.session.post.return_value.__aenter__.return_value.status = 200
-        self.session.post.return_value.__aenter__.return_value.json.return_value = error_api_response
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(error_api_response).encode()
 
-        with self.assertRaises(MyGasAuthError):
+        with self.assertRaises(MyGasAuthError), self.assertNoLogs("aiomygas", level="WARNING"):
             token = await self.auth.async_get_token()
 
+    async def test_async_get_token_background_refresh_error(self):
+        """Test a failed background refresh is logged and the current token is kept."""
+        self.auth._token = {"token": "old_test_token", "expires_at": time.time() + 60}
+        error_api_response = self.fixtures["signInN3_response_error"]
+        response = self.session.post.return_value.__aenter__.return_value
+        response.status = 200
+        response.read.return_value = json.dumps(error_api_response).encode()
+
+        with self.assertLogs("aiomygas", level="WARNING"):
+            self.assertEqual(await self.auth.async_get_token(), "old_test_token")
+            await asyncio.wait([self.auth._refresh_task])
+        self.assertEqual(self.auth._token["token"], "old_test_token")
+
+        # no new background refresh right after a failed one
+        self.assertEqual(await self.auth.async_get_token(), "old_test_token")
+        self.assertTrue(self.auth._refresh_task.done())
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_refresh_margin_validation(self):
+        """Test a refresh margin that would refresh every token is rejected."""
+        for refresh_margin in (-1, CLIENT_SESSION_LIFETIME - CLOCK_OUT_OF_SYNC_MAX_SEC, CLIENT_SESSION_LIFETIME):
+            with self.subTest(refresh_margin=refresh_margin), self.assertRaises(ValueError):
+                SimpleMyGasAuth(self.username, self.password, self.session, refresh_margin=refresh_margin)
+
+    async def test_async_get_token_from_store(self):
+        """Test async_get_token loads a valid token from the token store."""
+        store = MemoryTokenStore()
+        stored_token = {
+            "token": "stored_test_token",
+            "expires_at": time.time() + CLIENT_SESSION_LIFETIME
+        }
+        await store.async_save(self.username, stored_token)
+        auth = SimpleMyGasAuth(self.username, self.password, self.session, token_store=store)
+
+        token = await auth.async_get_token()
+
+        self.assertEqual(token, stored_token["token"])
+        self.session.post.assert_not_called()
+
+    async def test_async_get_token_from_store_in_refresh_margin(self):
+        """Test a stored token close to expiry is used at once and renewed in the background."""
+        store = MemoryTokenStore()
+        await store.async_save(self.username, {"token": "stored_test_token", "expires_at": time.time() + 60})
+        auth = SimpleMyGasAuth(self.username, self.password, self.session, token_store=store)
+        json_resp = self.fixtures["signInN3_response"]
+        self.session.post.return_value.__aenter__.return_value.status = 200
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
+
+        self.assertEqual(await auth.async_get_token(), "stored_test_token")
+        await auth._refresh_task
+
+        new_token = json_resp['data']['signInN3']["token"]
+        self.assertEqual(await auth.async_get_token(), new_token)
+        self.assertEqual((await store.async_load(self.username))["token"], new_token)
+        self.assertEqual(self.session.post.call_count, 1)
+
+    async def test_async_get_token_saves_to_store(self):
+        """Test async_get_token signs in and saves the token when the stored one is expired."""
+        store = MemoryTokenStore()
+        await store.async_save(self.username, {
+            "token": "expired_test_token",
+            "expires_at": time.time() - CLIENT_SESSION_LIFETIME
+        })
+        auth = SimpleMyGasAuth(self.username, self.password, self.session, token_store=store)
+        json_resp = self.fixtures["signInN3_response"]
+        self.session.post.return_value.__aenter__.return_value.status = 200
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
+
+        token = await auth.async_get_token()
+
+        self.assertEqual(token, json_resp['data']['signInN3']["token"])
+        stored_token = await store.async_load(self.username)
+        self.assertEqual(stored_token["token"], token)
+
+    async def test_async_get_token_coordinated(self):
+        """Test coordinated auth instances sign in only once."""
+        json_resp = self.fixtures["signInN3_response"]
+        self.session.post.return_value.__aenter__.return_value.status = 200
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = JsonFileTokenStore(f"{tmp_dir}/tokens.json")
+            # separate auth instances stand in for separate worker processes
+            auths = [
+                SimpleMyGasAuth(self.username, self.password, self.session, token_store=store,
+                                coordinator=FileLockAuthCoordinator(tmp_dir, poll_interval=0.01))
+                for _ in range(3)
+            ]
+            tokens = await asyncio.gather(*(auth.async_get_token() for auth in auths))
+
+        self.assertEqual(set(tokens), {json_resp['data']['signInN3']["token"]})
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_coordinator_requires_shared_token_store(self):
+        """Test a coordinator without a shared token store is rejected."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            coordinator = FileLockAuthCoordinator(tmp_dir)
+            for token_store in (None, MemoryTokenStore()):
+                with self.subTest(token_store=token_store), self.assertRaises(ValueError):
+                    SimpleMyGasAuth(self.username, self.password, self.session,
+                                    token_store=token_store, coordinator=coordinator)
+
+    async def test_async_get_token_background_refresh(self):
+        """Test a token close to expiry is returned and renewed in the background."""
+        old_token = {
+            "token": "old_test_token",
+            "expires_at": time.time() + 60
+        }
+        self.auth._token = old_token
+        json_resp = self.fixtures["signInN3_response"]
+        self.session.post.return_value.__aenter__.return_value.status = 200
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps(json_resp).encode()
+
+        token = await self.auth.async_get_token()
+        self.assertEqual(token, old_token["token"])
+
+        await self.auth._refresh_task
+        self.assertEqual(await self.auth.async_get_token(), json_resp['data']['signInN3']["token"])
+        self.assertEqual(self.session.post.call_count, 1)
+
+    async def test_async_get_token_single_flight(self):
+        """Test concurrent callers share one sign-in and survive a cancelled caller."""
+        json_resp = self.fixtures["signInN3_response"]
+        sign_in_started = asyncio.Event()
+        release_sign_in = asyncio.Event()
+
+        async def slow_read():
+            sign_in_started.set()
+            await release_sign_in.wait()
+            return json.dumps(json_resp).encode()
+
+        self.session.post.return_value.__aenter__.return_value.status = 200
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = slow_read
+
+        cancelled = asyncio.create_task(self.auth.async_get_token())
+        waiters = [asyncio.create_task(self.auth.async_get_token()) for _ in range(3)]
+        await sign_in_started.wait()
+        cancelled.cancel()
+        release_sign_in.set()
+
+        tokens = await asyncio.gather(*waiters)
+        self.assertEqual(set(tokens), {json_resp['data']['signInN3']["token"]})
+        self.assertEqual(self.session.post.call_count, 1)
+        with self.assertRaises(asyncio.CancelledError):
+            await cancelled
+
+    async def test_async_request_replays_on_rejected_token(self):
+        """Test async_request signs in again and replays the query when the token is rejected."""
+        self.auth._token = {
+            "token": "revoked_test_token",
+            "expires_at": time.time() + CLIENT_SESSION_LIFETIME
+        }
+        sign_in_resp = self.fixtures["signInN3_response"]
+        rejected_resp = {"errors": [{"message": "Unauthorized"}], "data": None}
+        ok_resp = {"data": {"clientV2": {"ok": True, "error": None, "client": {"id": 1}}}}
+        self.session.post.return_value.__aenter__.return_value.status = 200
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = [
+            json.dumps(response).encode() for response in (rejected_resp, sign_in_resp, ok_resp)
+        ]
+
+        result = await self.auth.async_request(queries.ClientV2())
+
+        self.assertEqual(result, {"id": 1})
+        self.assertEqual(self.auth._token["token"], sign_in_resp['data']['signInN3']["token"])
+        replay_headers = self.session.post.call_args_list[-1].kwargs["headers"]
+        self.assertEqual(replay_headers["token"], sign_in_resp['data']['signInN3']["token"])
+
+    async def test_async_request_rejected_twice(self):
+        """Test async_request replays only once."""
+        self.auth._token = {
+            "token": "revoked_test_token",
+            "expires_at": time.time() + CLIENT_SESSION_LIFETIME
+        }
+        rejected_resp = {"errors": [{"message": "Unauthorized"}], "data": None}
+        self.session.post.return_value.__aenter__.return_value.status = 200
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = [
+            json.dumps(response).encode()
+            for response in (rejected_resp, self.fixtures["signInN3_response"], rejected_resp)
+        ]
+
+        with self.assertRaises(MyGasTokenError):
+            await self.auth.async_request(queries.ClientV2())
+        self.assertEqual(self.session.post.call_count, 3)
+
+    async def test_async_request_coalesces_identical_queries(self):
+        """Test concurrent identical read queries share one request."""
+        self.auth._token = {
+            "token": "valid_test_token",
+            "expires_at": time.time() + CLIENT_SESSION_LIFETIME
+        }
+        release = asyncio.Event()
+
+        async def slow_read():
+            await release.wait()
+            return json.dumps({"data": {"elsInfo": {"ok": True, "error": None, "info": {"els": {"id": 1}}}}}).encode()
+
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = slow_read
+        tasks = [asyncio.create_task(self.auth.async_request(queries.ElsInfo(1))) for _ in range(3)]
+        other = asyncio.create_task(self.auth.async_request(queries.ElsInfo(2)))
+        await asyncio.sleep(0)
+        tasks[0].cancel()
+        release.set()
+
+        results = await asyncio.gather(*tasks[1:], other)
+        self.assertEqual(results[0], {"els": {"id": 1}})
+        self.assertIs(results[0], results[1])
+        self.assertEqual(self.session.post.call_count, 2)
+        self.assertEqual(self.auth._inflight, {})
+
+    async def test_async_request_does_not_coalesce_mutations(self):
+        """Test mutations are always sent."""
+        self.auth._token = {
+            "token": "valid_test_token",
+            "expires_at": time.time() + CLIENT_SESSION_LIFETIME
+        }
+        self.session.post.return_value.__aenter__.return_value.read.return_value = json.dumps({
+            "data": {"indicationSendV4": {"ok": True, "error": None, "data": []}}
+        }).encode()
+        await asyncio.gather(*(
+            self.auth.async_request(queries.IndicationSend(1, "uuid", 1)) for _ in range(2)
+        ))
+        self.assertEqual(self.session.post.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
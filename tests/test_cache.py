@@ -0,0 +1,170 @@
+"""Test cache module."""
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase, mock
+
+from aiomygas import StdlibJsonCodec
+from aiomygas.cache import CacheStats, MemoryResponseCache, SqliteResponseCache
+
+
+class TestResponseCaches(IsolatedAsyncioTestCase):
+    """Test response cache backends."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp_dir.cleanup()
+
+    def make_caches(self):
+        """Return one instance of each cache."""
+        return [MemoryResponseCache(), SqliteResponseCache(self.path / "cache.db")]
+
+    async def test_get_set(self):
+        """Test fresh and expired entries and statistics."""
+        for cache in self.make_caches():
+            key = ("user", "lspuInfo", '{"lspuId":1}')
+            self.assertIsNone(await cache.async_get(key))
+            await cache.async_set(key, {"balance": 1}, 60)
+            entry = await cache.async_get(key)
+            self.assertEqual(entry.value, {"balance": 1})
+            self.assertTrue(entry.is_fresh())
+            await cache.async_set(key, {"balance": 2}, -1)
+            entry = await cache.async_get(key)
+            self.assertEqual(entry.value, {"balance": 2})
+            self.assertFalse(entry.is_fresh())
+            self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 2))
+            self.assertAlmostEqual(cache.stats.hit_ratio, 1 / 3)
+
+    async def test_lru_eviction(self):
+        """Test the least recently used entry is evicted."""
+        cache = MemoryResponseCache(max_size=2)
+        await cache.async_set(("user", "a", ""), 1, 60)
+        await cache.async_set(("user", "b", ""), 2, 60)
+        await cache.async_get(("user", "a", ""))
+        await cache.async_set(("user", "c", ""), 3, 60)
+        self.assertIsNone(await cache.async_get(("user", "b", "")))
+        self.assertIsNotNone(await cache.async_get(("user", "a", "")))
+        self.assertIsNotNone(await cache.async_get(("user", "c", "")))
+        self.assertEqual(cache.stats.evictions, 1)
+
+    async def test_invalidate(self):
+        """Test invalidation by identity, operation and tag."""
+        for cache in self.make_caches():
+            await cache.async_set(("user", "lspuInfo", "1"), 1, 60, frozenset({"lspuId:1"}))
+            await cache.async_set(("user", "lspuInfo", "2"), 2, 60, frozenset({"lspuId:2"}))
+            await cache.async_set(("user", "accountsN", ""), 3, 60)
+            await cache.async_set(("other", "lspuInfo", "1"), 4, 60, frozenset({"lspuId:1"}))
+            self.assertEqual(await cache.async_invalidate("user", tag="lspuId:1"), 1)
+            self.assertIsNotNone(await cache.async_get(("other", "lspuInfo", "1")))
+            self.assertEqual(await cache.async_invalidate("user", "lspuInfo"), 1)
+            self.assertEqual(await cache.async_invalidate("user"), 1)
+            self.assertEqual(await cache.async_invalidate(), 1)
+
+    def test_stats(self):
+        """Test hit ratio without lookups."""
+        self.assertEqual(CacheStats().hit_ratio, 0.0)
+        with self.assertRaises(ValueError):
+            MemoryResponseCache(0)
+
+
+class TestSqliteResponseCache(IsolatedAsyncioTestCase):
+    """Test SQLite response cache."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "cache" / "cache.db"
+        self.value = {"info": [{"account": "1234567890", "balance": "100.00"}] * 50}
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp_dir.cleanup()
+
+    async def test_persistence(self):
+        """Test entries survive a new cache instance."""
+        key = ("user", "lspuInfo", '{"lspuId":1}')
+        await SqliteResponseCache(self.path).async_set(key, self.value, 60, frozenset({"lspuId:1"}))
+        entry = await SqliteResponseCache(self.path).async_get(key)
+        self.assertEqual(entry.value, self.value)
+        self.assertEqual(entry.tags, frozenset({"lspuId:1"}))
+
+    async def test_compression(self):
+        """Test responses are compressed with zstd or zlib."""
+        key = ("user", "lspuInfo", '{"lspuId":1}')
+        with mock.patch("aiomygas.cache.zstandard", None):
+            zlib_cache = SqliteResponseCache(self.path, codec=StdlibJsonCodec())
+            await zlib_cache.async_set(key, self.value, 60)
+            self.assertEqual((await zlib_cache.async_get(key)).value, self.value)
+        with sqlite3.connect(self.path) as conn:
+            compression, size = conn.execute("SELECT compression, size FROM responses").fetchone()
+        conn.close()
+        self.assertEqual(compression, "zlib")
+        self.assertLess(size, len(StdlibJsonCodec().dumps(self.value)) / 10)
+        # entries written with another compression are still readable
+        self.assertEqual((await SqliteResponseCache(self.path).async_get(key)).value, self.value)
+
+    async def test_size_eviction(self):
+        """Test least recently used entries are evicted above max_bytes."""
+        cache = SqliteResponseCache(self.path, max_bytes=1)
+        await cache.async_set(("user", "a", ""), self.value, 60)
+        await cache.async_set(("user", "b", ""), self.value, 60)
+        self.assertIsNone(await cache.async_get(("user", "a", "")))
+        self.assertIsNotNone(await cache.async_get(("user", "b", "")))
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def assert_total_size(self):
+        """Assert the running total equals the sum of the entry sizes."""
+        with sqlite3.connect(self.path) as conn:
+            total = conn.execute("SELECT total FROM responses_size").fetchone()[0]
+            expected = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        conn.close()
+        self.assertEqual(total, expected)
+        return total
+
+    async def test_total_size(self):
+        """Test the running total of sizes follows inserts, replacements, invalidation and eviction."""
+        cache = SqliteResponseCache(self.path, max_bytes=10 ** 6)
+        await cache.async_set(("user", "a", ""), self.value, 60, frozenset({"tag"}))
+        await cache.async_set(("user", "b", ""), self.value, 60)
+        self.assertGreater(self.assert_total_size(), 0)
+        await cache.async_set(("user", "a", ""), {"small": 1}, 60)
+        self.assert_total_size()
+        await cache.async_invalidate(operation="b")
+        self.assert_total_size()
+        cache._max_bytes = 1
+        await cache.async_set(("user", "c", ""), self.value, 60)
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assert_total_size()
+
+    async def test_total_size_seeded(self):
+        """Test the running total is seeded from a database created without it."""
+        await SqliteResponseCache(self.path).async_set(("user", "a", ""), self.value, 60)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("DROP TABLE responses_size")
+            for name in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER responses_size_{name}")
+        conn.close()
+        await SqliteResponseCache(self.path).async_set(("user", "b", ""), self.value, 60)
+        self.assertGreater(self.assert_total_size(), 0)
+
+    async def test_unreadable_database(self):
+        """Test database errors are logged, not raised."""
+        self.path.parent.mkdir(parents=True)
+        self.path.write_bytes(b"not a database" * 100)
+        cache = SqliteResponseCache(self.path)
+        with self.assertLogs("aiomygas", level="WARNING"):
+            self.assertIsNone(await cache.async_get(("user", "a", "")))
+        with self.assertLogs("aiomygas", level="WARNING"):
+            await cache.async_set(("user", "a", ""), 1, 60)
+        with self.assertLogs("aiomygas", level="WARNING"):
+            self.assertEqual(await cache.async_invalidate(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
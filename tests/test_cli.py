@@ -1,10 +1,18 @@
 """Test CLI module."""
 from __future__ import annotations
 
+import asyncio
+import io
+import json
+import os
+import tempfile
 import unittest
+from contextlib import redirect_stdout
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from aiomygas.exceptions import MyGasAuthError
+
 from aiomygas.cli import (
     get_arguments,
     get_charges,
@@ -16,6 +24,9 @@ from aiomygas.cli import (
     get_payments,
     get_payments_lspu,
     get_receipts,
+    read_credentials,
+    run_batch,
+    run_ordered,
     send_readings,
 )
 
@@ -116,6 +127,68 @@ class TestGetArguments(unittest.TestCase):
         args = get_arguments()
         self.assertEqual(args.verbose, 3)
 
+    @patch("sys.argv", ["prog", "user@test.com", "pass123", "--concurrency", "8"])
+    def test_concurrency(self):
+        """Test concurrency option."""
+        self.assertEqual(get_arguments().concurrency, 8)
+
+    @patch("sys.argv", ["prog", "user@test.com", "pass123", "--concurrency", "0"])
+    def test_invalid_concurrency(self):
+        """Test concurrency must be positive."""
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            get_arguments()
+
+
+class TestRunOrdered(IsolatedAsyncioTestCase):
+    """Test run_ordered()."""
+
+    async def test_order_and_limit(self):
+        """Test output is printed in job order and requests are limited."""
+        running = 0
+        max_running = 0
+
+        async def job(index, delay):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            print(f"start {index}")
+            await asyncio.sleep(delay)
+            running -= 1
+            print(f"end {index}")
+            return index
+
+        async def nested():
+            print("nested")
+            return await run_ordered([lambda: job(3, 0.01), lambda: job(4, 0)])
+
+        jobs = [lambda: job(0, 0.03), lambda: job(1, 0), lambda: job(2, 0.02)]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            with patch("aiomygas.cli._LIMIT") as limit:
+                limit.get.return_value = asyncio.Semaphore(2)
+                results = await run_ordered(jobs)
+            self.assertEqual(max_running, 2)
+            self.assertEqual(await run_ordered([nested, lambda: job(5, 0)], limit=False), [[3, 4], 5])
+        self.assertEqual(results, [0, 1, 2])
+        self.assertEqual(output.getvalue().split(), [
+            "start", "0", "end", "0", "start", "1", "end", "1", "start", "2", "end", "2",
+            "nested", "start", "3", "end", "3", "start", "4", "end", "4", "start", "5", "end", "5",
+        ])
+
+    async def test_interactive(self):
+        """Test interactive jobs run unbuffered after the output before them."""
+        async def job(index):
+            await asyncio.sleep(0.01 * (3 - index))
+            print(index)
+
+        async def interactive():
+            print(input("prompt"))
+
+        output = io.StringIO()
+        with redirect_stdout(output), patch("builtins.input", side_effect=lambda prompt: print(prompt) or "answer"):
+            await run_ordered([lambda: job(0), interactive, lambda: job(2)], interactive=[1])
+        self.assertEqual(output.getvalue().split(), ["0", "prompt", "answer", "2"])
+
 
 class TestGetClientInfo(IsolatedAsyncioTestCase):
     """Test get_client_info()."""
@@ -417,6 +490,8 @@ class TestCli(IsolatedAsyncioTestCase):
         args.receipt = False
         args.info = False
         args.send = False
+        args.concurrency = 4
+        args.batch = None
         mock_get_args.return_value = args
 
         mock_session = MagicMock()
@@ -445,6 +520,8 @@ class TestCli(IsolatedAsyncioTestCase):
         args.receipt = False
         args.info = False
         args.send = False
+        args.concurrency = 4
+        args.batch = None
         mock_get_args.return_value = args
 
         mock_session = MagicMock()
@@ -475,6 +552,8 @@ class TestCliDispatch(IsolatedAsyncioTestCase):
         args.receipt = False
         args.info = False
         args.send = False
+        args.concurrency = 4
+        args.batch = None
         for k, v in overrides.items():
             setattr(args, k, v)
         return args
@@ -571,6 +650,121 @@ class TestCliDispatch(IsolatedAsyncioTestCase):
             mock_fn.assert_awaited_once()
 
 
+class TestBatch(IsolatedAsyncioTestCase):
+    """Test batch mode."""
+
+    def test_read_credentials(self):
+        """Test credentials lines."""
+        lines = ["# comment\n", "a@test.com pass word\n", "\n", "b@test.com\tpass\n"]
+        self.assertEqual(read_credentials(lines), [("a@test.com", "pass word"), ("b@test.com", "pass")])
+        with self.assertRaisesRegex(ValueError, "Line 1"):
+            read_credentials(["a@test.com"])
+
+    def test_arguments(self):
+        """Test batch mode arguments."""
+        with patch("sys.argv", ["prog", "--batch", "-", "--charges"]):
+            args = get_arguments()
+        self.assertEqual(args.batch, "-")
+        self.assertIsNone(args.identifier)
+        for argv in (["prog"], ["prog", "--batch", "-", "--send"], ["prog", "user", "pass", "--batch", "-"]):
+            with patch("sys.argv", argv), patch("sys.stderr"), self.assertRaises(SystemExit):
+                get_arguments()
+
+    async def run_batch(self, make_api, credentials="good@test.com pass\nbad@test.com pass\n", **kwargs):
+        """Run a batch with fake APIs and return the JSON lines sorted by identifier and operation."""
+        args = MagicMock(**{"client": False, "charges": True, "payments": False, "info": False, "concurrency": 2,
+                            **kwargs})
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(credentials)
+        self.addCleanup(os.unlink, f.name)
+        args.batch = f.name
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        output = io.StringIO()
+        with patch("aiomygas.cli.ClientSession", return_value=session) as session_cls, \
+                patch("aiomygas.cli.MyGasApi", side_effect=make_api), redirect_stdout(output):
+            await run_batch(args)
+        session_cls.assert_called_once()
+        return sorted(
+            (json.loads(line) for line in output.getvalue().splitlines()),
+            key=lambda line: (line["identifier"], line["operation"]),
+        )
+
+    async def test_run_batch(self):
+        """Test a JSON line is printed per identity and operation."""
+        accounts = {"elsGroup": [], "lspu": [{"id": 20}, {"id": 21}]}
+
+        async def get_charges(lspu_id):
+            if lspu_id == 21:
+                raise MyGasAuthError("test_error")
+            return ["charge"]
+
+        def make_api(auth):
+            api = MagicMock()
+            if auth._identifier == "bad@test.com":
+                api.async_get_accounts = AsyncMock(side_effect=MyGasAuthError("invalid password"))
+            else:
+                api.async_get_accounts = AsyncMock(return_value=accounts)
+            api.async_get_charges = AsyncMock(side_effect=get_charges)
+            return api
+
+        lines = await self.run_batch(make_api)
+        self.assertEqual(lines, [
+            {"identifier": "bad@test.com", "operation": "accounts", "error": "invalid password"},
+            {"identifier": "good@test.com", "operation": "accounts", "data": accounts},
+            {"identifier": "good@test.com", "operation": "charges", "data": {"20": ["charge"]},
+             "errors": {"21": "test_error"}},
+        ])
+
+    async def test_run_batch_failures(self):
+        """Test timeouts and unexpected errors of one identity do not stop the others."""
+        def make_api(auth):
+            if auth._identifier == "broken@test.com":
+                raise RuntimeError("broken")
+            api = MagicMock()
+            if auth._identifier == "slow@test.com":
+                api.async_get_accounts = AsyncMock(side_effect=asyncio.TimeoutError)
+            else:
+                api.async_get_accounts = AsyncMock(return_value=ELS_ACCOUNTS)
+            api.async_get_charges = AsyncMock(return_value=["charge"])
+            return api
+
+        lines = await self.run_batch(make_api, "slow@test.com pass\nbroken@test.com pass\ngood@test.com pass\n")
+        self.assertEqual(lines, [
+            {"identifier": "broken@test.com", "operation": "batch", "error": "broken"},
+            {"identifier": "good@test.com", "operation": "accounts", "data": ELS_ACCOUNTS},
+            {"identifier": "good@test.com", "operation": "charges", "data": {"10": ["charge"]}},
+            {"identifier": "slow@test.com", "operation": "accounts", "error": "TimeoutError"},
+        ])
+
+    async def test_run_batch_concurrency(self):
+        """Test --concurrency limits the requests of all identities together."""
+        running = 0
+        max_running = 0
+
+        async def request(*_):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return LSPU_ACCOUNTS
+
+        def make_api(auth):
+            api = MagicMock()
+            api.async_get_client_info = AsyncMock(side_effect=request)
+            api.async_get_accounts = AsyncMock(side_effect=request)
+            api.async_get_charges = AsyncMock(side_effect=request)
+            api.async_get_payments = AsyncMock(side_effect=request)
+            return api
+
+        credentials = "".join(f"user{i}@test.com pass\n" for i in range(4))
+        lines = await self.run_batch(make_api, credentials, client=True, payments=True, concurrency=3)
+        self.assertEqual(len(lines), 4 * 4)
+        self.assertEqual(max_running, 3)
+
+
 class TestVersionFallback(unittest.TestCase):
     """Test __init__.py version fallback."""
 
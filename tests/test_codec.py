@@ -0,0 +1,59 @@
+"""Test codec module."""
+import json
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from aiomygas import codec
+from aiomygas.codec import MsgspecCodec, OrjsonCodec, StdlibJsonCodec, get_default_codec
+
+FIXTURES_PATH = Path(__file__).parent.absolute().joinpath("fixtures")
+
+
+def available_codecs() -> list:
+    """Return instances of the codecs that can be used here."""
+    codecs = [StdlibJsonCodec()]
+    for codec_class in (OrjsonCodec, MsgspecCodec):
+        try:
+            codecs.append(codec_class())
+        except RuntimeError:
+            pass
+    return codecs
+
+
+class TestCodecs(unittest.TestCase):
+    """Test JSON codecs."""
+
+    def test_loads_fixtures(self):
+        """Test every codec decodes the recorded responses like the json module."""
+        for fixture in sorted(FIXTURES_PATH.glob("*_response*.json")):
+            body = fixture.read_bytes()
+            expected = json.loads(body)
+            for json_codec in available_codecs():
+                with self.subTest(codec=json_codec.name, fixture=fixture.name):
+                    self.assertEqual(json_codec.loads(body), expected)
+
+    def test_dumps(self):
+        """Test every codec encodes valid JSON."""
+        obj = {"lspuId": 123456789, "value": 1.5, "name": "Газ", "items": [None, True]}
+        for json_codec in available_codecs():
+            with self.subTest(codec=json_codec.name):
+                self.assertEqual(json.loads(json_codec.dumps(obj)), obj)
+
+    def test_loads_invalid(self):
+        """Test every codec raises ValueError on invalid input."""
+        for json_codec in available_codecs():
+            with self.subTest(codec=json_codec.name):
+                with self.assertRaises(ValueError):
+                    json_codec.loads(b"{invalid")
+
+    def test_default_codec_fallback(self):
+        """Test the stdlib codec is used without optional dependencies."""
+        with mock.patch.object(codec, "orjson", None), mock.patch.object(codec, "msgspec", None):
+            self.assertIsInstance(get_default_codec(), StdlibJsonCodec)
+            with self.assertRaises(RuntimeError):
+                OrjsonCodec()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Test coordinator module."""
+import asyncio
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiomygas.coordinator import FileLockAuthCoordinator
+
+
+class TestFileLockAuthCoordinator(IsolatedAsyncioTestCase):
+    """Test FileLockAuthCoordinator class."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp_dir.cleanup()
+
+    async def test_lock_is_exclusive(self):
+        """Test only one holder per identifier at a time."""
+        # two coordinators stand in for two processes sharing the lock directory
+        coordinators = [FileLockAuthCoordinator(self.tmp_dir.name, poll_interval=0.01) for _ in range(2)]
+        holders = 0
+        max_holders = 0
+
+        async def hold(coordinator):
+            nonlocal holders, max_holders
+            async with coordinator.async_lock("test_user"):
+                holders += 1
+                max_holders = max(max_holders, holders)
+                await asyncio.sleep(0.05)
+                holders -= 1
+
+        await asyncio.gather(*(hold(c) for c in coordinators * 2))
+        self.assertEqual(max_holders, 1)
+
+    async def test_lock_per_identifier(self):
+        """Test different identifiers do not block each other."""
+        coordinator = FileLockAuthCoordinator(self.tmp_dir.name)
+        async with coordinator.async_lock("user_a"):
+            async with asyncio.timeout(1):
+                async with FileLockAuthCoordinator(self.tmp_dir.name).async_lock("user_b"):
+                    pass
+
+    async def test_lock_released_on_cancel(self):
+        """Test a cancelled waiter does not keep the lock."""
+        coordinator = FileLockAuthCoordinator(self.tmp_dir.name, poll_interval=0.01)
+        async with coordinator.async_lock("test_user"):
+            waiter = asyncio.create_task(self._acquire(coordinator))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+        async with asyncio.timeout(1):
+            await self._acquire(coordinator)
+
+    @staticmethod
+    async def _acquire(coordinator):
+        async with coordinator.async_lock("test_user"):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
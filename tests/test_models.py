@@ -0,0 +1,95 @@
+import json
+import unittest
+from pathlib import Path
+
+from aiomygas import StdlibJsonCodec, models
+from aiomygas.exceptions import MyGasApiParseError
+
+FIXTURES_PATH = Path(__file__).parent.absolute().joinpath("fixtures")
+
+
+def load_fixture(file_name: str, operation_name: str, data_name: str):
+    """Load the data of a fixture."""
+    with open(FIXTURES_PATH.joinpath(file_name), encoding='utf-8') as json_file:
+        return json.load(json_file)["data"][operation_name][data_name]
+
+
+class TestModels(unittest.TestCase):
+    """Test response models."""
+
+    def test_accounts(self):
+        """Test accounts model."""
+        data = load_fixture("AccountsN_response.json", "accountsN", "accounts")
+        accounts = models.Accounts.from_dict(data)
+        group = accounts.els_group[0]
+        self.assertEqual(group.els.id, data["elsGroup"][0]["els"]["id"])
+        self.assertEqual(group.els.jnt_account_num, data["elsGroup"][0]["els"]["jntAccountNum"])
+        self.assertEqual(group.lspu[0].provider.name, data["elsGroup"][0]["lspu"][0]["provider"]["name"])
+        self.assertIsInstance(group.lspu[0].provider.setup, dict)
+
+    def test_els_info(self):
+        """Test ELS info model."""
+        data = load_fixture("elsInfo_response.json", "elsInfo", "info")
+        info = models.ElsInfo.from_dict(data)
+        lspu_info = info.lspu_info_group[0]
+        raw = data["lspuInfoGroup"][0]
+        self.assertEqual(lspu_info.account, raw["account"])
+        counter = lspu_info.counters[0]
+        self.assertIsInstance(counter.values, models.LazyList)
+        self.assertEqual(len(counter.values), len(raw["counters"][0]["values"]))
+        self.assertEqual(counter.values[0].value_day, raw["counters"][0]["values"][0]["valueDay"])
+        self.assertEqual(counter.values[0].date_dt, raw["counters"][0]["values"][0]["dateDt"])
+
+    def test_lspu_info(self):
+        """Test LSPU info model."""
+        data = load_fixture("lspuInfo_response.json", "lspuInfo", "info")
+        info = models.LspuInfo.from_dict(data)
+        self.assertEqual(info.account_id, data["accountId"])
+        self.assertEqual(len(info.balances), len(data["balances"]))
+        self.assertEqual([balance.date for balance in info.balances], [b["date"] for b in data["balances"]])
+
+    def test_payments(self):
+        """Test payments model."""
+        data = load_fixture("paymentsByLspu_response.json", "paymentsByLspu", "data")
+        payments = models.Payment.from_list(data)
+        self.assertEqual(len(payments), len(data))
+        self.assertEqual(payments[0].amount_rub, data[0]["amountRub"])
+
+    def test_indication_send(self):
+        """Test indication send model."""
+        data = load_fixture("indicationSendV4_response.json", "indicationSendV4", "data")
+        results = models.IndicationSendResult.list_from_bytes(json.dumps(data).encode())
+        self.assertEqual(results[0].lspu_id, data[0]["lspuId"])
+        self.assertEqual(results[0].counters[0].sent, data[0]["counters"][0]["sent"])
+
+    def test_from_bytes(self):
+        """Test decoding from bytes."""
+        receipt = models.Receipt.from_bytes(b'{"content": "text", "url": null}', codec=StdlibJsonCodec())
+        self.assertEqual(receipt, models.Receipt(content="text", url=None))
+        with self.assertRaises(MyGasApiParseError):
+            models.Receipt.from_bytes(b"{")
+        with self.assertRaises(MyGasApiParseError):
+            models.Receipt.from_bytes(b"[]")
+
+    def test_nested_charges(self):
+        """Test recursive charge model."""
+        charge = models.Charge.from_dict({"serviceName": "gas", "children": [{"serviceName": "child"}]})
+        self.assertEqual(charge.children[0].service_name, "child")
+
+    def test_lazy_list(self):
+        """Test that lazy list converts items once and on demand."""
+        lazy = models.LazyList(models.Receipt, [{"content": "a"}, {"content": "b"}])
+        self.assertEqual(lazy._items, [None, None])
+        first = lazy[0]
+        self.assertIs(lazy[0], first)
+        self.assertIsNone(lazy._items[1])
+        self.assertEqual([item.content for item in lazy[-1:]], ["b"])
+        self.assertEqual(lazy, [models.Receipt(content="a"), models.Receipt(content="b")])
+
+    def test_slots(self):
+        """Test that models have no instance dict."""
+        self.assertFalse(hasattr(models.CounterValue(), "__dict__"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Test persisted query mode."""
+import json
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+from aiohttp import ClientResponseError, ClientSession
+
+from aiomygas import queries
+from aiomygas.auth import SimpleMyGasAuth
+from aiomygas.const import CLIENT_SESSION_LIFETIME
+from aiomygas.exceptions import MyGasTokenError
+from aiomygas.queries.base import minify_query, query_hash
+
+OK_RESPONSE = {"data": {"clientV2": {"ok": True, "error": None, "client": {"id": 1}}}}
+NOT_FOUND_RESPONSE = {"errors": [{"message": "PersistedQueryNotFound",
+                                  "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]}
+NOT_SUPPORTED_RESPONSE = {"errors": [{"message": "PersistedQueryNotSupported"}]}
+# a server without persisted queries rejects a hash-only request as a request without query
+MISSING_QUERY_RESPONSE = {"errors": [{"message": "Must provide query string."}], "data": None}
+UNAUTHORIZED_RESPONSE = {"errors": [{"message": "Unauthorized"}], "data": None}
+SIGN_IN_RESPONSE = {"data": {"signInN3": {"ok": True, "error": None, "token": "new_token", "hasAgreement": True}}}
+
+
+def encode(*responses) -> list:
+    """Return response bodies, exceptions are kept as is."""
+    return [r if isinstance(r, Exception) else json.dumps(r).encode() for r in responses]
+
+
+class TestPersistedQueries(IsolatedAsyncioTestCase):
+    """Test persisted queries in AbstractMyGasAuth."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.session = mock.MagicMock(spec=ClientSession)
+        self.auth = SimpleMyGasAuth("test_user", "test_password", self.session, persisted_queries=True)
+        self.auth._token = {"token": "test_token", "expires_at": time.time() + CLIENT_SESSION_LIFETIME}
+
+    def sent_payloads(self) -> list[dict]:
+        """Return the payloads posted so far."""
+        return [json.loads(call.kwargs["data"]) for call in self.session.post.call_args_list]
+
+    async def test_hash_registered_then_reused(self):
+        """Test the full query is sent once for an unknown hash, then only the hash."""
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = encode(
+            NOT_FOUND_RESPONSE, OK_RESPONSE, OK_RESPONSE
+        )
+        query = queries.ClientV2()
+        self.assertEqual(await self.auth.async_request(query), {"id": 1})
+        self.assertEqual(await self.auth.async_request(query), {"id": 1})
+
+        first, registration, second = self.sent_payloads()
+        expected_hash = query_hash(query.QUERY)
+        self.assertNotIn("query", first)
+        self.assertEqual(first["extensions"]["persistedQuery"]["sha256Hash"], expected_hash)
+        self.assertEqual(registration["query"], minify_query(query.QUERY))
+        self.assertEqual(registration["extensions"]["persistedQuery"]["sha256Hash"], expected_hash)
+        self.assertNotIn("query", second)
+        self.assertTrue(self.auth._persisted_queries_supported)
+
+    async def test_not_supported_falls_back(self):
+        """Test the full query is used after the server rejects persisted queries."""
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = encode(
+            NOT_SUPPORTED_RESPONSE, OK_RESPONSE, OK_RESPONSE
+        )
+        await self.auth.async_request(queries.ClientV2())
+        await self.auth.async_request(queries.ClientV2())
+
+        payloads = self.sent_payloads()
+        self.assertEqual(len(payloads), 3)
+        self.assertNotIn("query", payloads[0])
+        self.assertNotIn("extensions", payloads[1])
+        self.assertNotIn("extensions", payloads[2])
+        self.assertFalse(self.auth._persisted_queries_supported)
+
+    async def test_probe_bad_request_falls_back(self):
+        """Test an HTTP 400 on the probe disables persisted queries."""
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = encode(
+            ClientResponseError(mock.MagicMock(), (), status=400), OK_RESPONSE
+        )
+        self.assertEqual(await self.auth.async_request(queries.ClientV2()), {"id": 1})
+        self.assertFalse(self.auth._persisted_queries_supported)
+        self.assertEqual(self.sent_payloads()[1]["query"], minify_query(queries.ClientV2.QUERY))
+
+    async def test_probe_rejected_token_keeps_mode(self):
+        """Test a rejected token during the probe leaves the support unknown."""
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = encode(UNAUTHORIZED_RESPONSE)
+        with self.assertRaises(MyGasTokenError):
+            await self.auth._async_request_with_token(queries.ClientV2(), "test_token")
+        self.assertIsNone(self.auth._persisted_queries_supported)
+
+    async def test_probe_rejected_token_replay(self):
+        """Test the replay after a rejected token probes persisted queries again."""
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = encode(
+            UNAUTHORIZED_RESPONSE, SIGN_IN_RESPONSE, OK_RESPONSE,
+        )
+        self.assertEqual(await self.auth.async_request(queries.ClientV2()), {"id": 1})
+        self.assertTrue(self.auth._persisted_queries_supported)
+        self.assertNotIn("query", self.sent_payloads()[2])
+
+    async def test_probe_rejected_token_without_support(self):
+        """Test the replay after a rejected token falls back on a server without persisted queries."""
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = encode(
+            UNAUTHORIZED_RESPONSE, MISSING_QUERY_RESPONSE, SIGN_IN_RESPONSE, OK_RESPONSE,
+        )
+        self.assertEqual(await self.auth.async_request(queries.ClientV2()), {"id": 1})
+        self.assertFalse(self.auth._persisted_queries_supported)
+        payloads = self.sent_payloads()
+        self.assertEqual([(payload["operationName"], "query" in payload) for payload in payloads], [
+            ("clientV2", False), ("signInN3", False), ("signInN3", True), ("clientV2", True),
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
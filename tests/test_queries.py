@@ -1,8 +1,14 @@
 """Test queries."""
+import json
 from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
 
-from aiomygas.exceptions import MyGasApiError, MyGasApiParseError
-from aiomygas.queries.base import BaseQuery
+from aiomygas.exceptions import MyGasApiError, MyGasApiParseError, MyGasTokenError
+from aiomygas.queries import Accounts, BatchQuery, Charges, ClientV2, ElsInfo, Indication, IndicationBatchSend, \
+    IndicationSend, LspuInfo, Payments
+from aiomygas.queries.base import BaseQuery, minify_query, query_hash
+from aiomygas.queries.compiler import compile_query, field, fields, merge
+from aiomygas.queries.projection import parse_selection
 
 
 class TestBaseQuery(IsolatedAsyncioTestCase):
@@ -103,6 +109,48 @@ class TestBaseQuery(IsolatedAsyncioTestCase):
 
         self.assertEqual(str(error.exception), "Invalid API response")
 
+    def test_parse_token_error(self):
+        """Test parse method with a rejected token."""
+        self.query.OPERATION_NAME = "test"
+        self.query.DATA_NAME = "test_data"
+        responses = [
+            {"errors": [{"message": "Access denied", "extensions": {"code": "UNAUTHENTICATED"}}], "data": None},
+            {"errors": [{"message": "Unauthorized"}]},
+            {"data": {"test": {"ok": False, "error": "Необходима авторизация"}}},
+        ]
+        for response in responses:
+            with self.subTest(response=response):
+                with self.assertRaises(MyGasTokenError):
+                    self.query.parse(response)
+
+    def test_to_bytes(self):
+        """Test to_bytes encodes the same payload as to_json with the minified query."""
+        self.query.OPERATION_NAME = "test"
+        self.query.QUERY = "query test($id: Float!) {\n  test(id: $id) {\n    ok\n    error\n  }\n}"
+        self.query.variables = {"id": 1, "name": "Газ"}
+        expected = {**self.query.to_json(), "query": "query test($id:Float!){test(id:$id){ok error}}"}
+        self.assertEqual(json.loads(self.query.to_bytes()), expected)
+        persisted = {
+            "operationName": "test",
+            "variables": {"id": 1, "name": "Газ"},
+            "extensions": {"persistedQuery": {"version": 1, "sha256Hash": query_hash(self.query.QUERY)}},
+        }
+        self.assertEqual(json.loads(self.query.to_bytes(persisted=True)), {**persisted, "query": expected["query"]})
+        self.assertEqual(json.loads(self.query.to_bytes(persisted=True, include_query=False)), persisted)
+        # the static part is cached, the variables are not
+        self.query.variables = {"id": 2}
+        self.assertEqual(json.loads(self.query.to_bytes())["variables"], {"id": 2})
+
+    def test_cache_key(self):
+        """Test cache_key does not depend on variables order."""
+        self.query.OPERATION_NAME = "test"
+        self.query.variables = {"b": 2, "a": 1}
+        other = BaseQuery()
+        other.OPERATION_NAME = "test"
+        other.variables = {"a": 1, "b": 2}
+        self.assertEqual(self.query.cache_key, other.cache_key)
+        self.assertEqual(self.query.cache_key, ("test", '{"a":1,"b":2}'))
+
     def test_to_json(self):
         """Test to_json method."""
         self.query.OPERATION_NAME = "test"
@@ -114,3 +162,193 @@ class TestBaseQuery(IsolatedAsyncioTestCase):
             "query": "query test { test { ok } }",
             "variables": {"key": "value"},
         })
+
+
+class TestBatchQuery(IsolatedAsyncioTestCase):
+    """Test BatchQuery class."""
+
+    def test_document(self):
+        """Test queries are fused with aliases and prefixed variables."""
+        batch = BatchQuery([LspuInfo(1), Charges(2), ClientV2()])
+        self.assertTrue(batch.QUERY.startswith("query batch($q0_lspuId: Float!, $q1_lspuId: Float!) {"))
+        self.assertIn("q0: lspuInfo(lspuId: $q0_lspuId) {", batch.QUERY)
+        self.assertIn("q1: clientCharges(lspuId: $q1_lspuId) {", batch.QUERY)
+        self.assertIn("q2: clientV2 {", batch.QUERY)
+        self.assertEqual(batch.variables, {"q0_lspuId": 1, "q1_lspuId": 2})
+
+    def test_mutation_rejected(self):
+        """Test mutations can not be batched."""
+        with self.assertRaises(ValueError):
+            BatchQuery([IndicationSend(1, "uuid", 1)])
+        with self.assertRaises(ValueError):
+            BatchQuery([])
+
+    def test_cache_key(self):
+        """Test batches of different queries with equal variables have different keys."""
+        self.assertNotEqual(BatchQuery([LspuInfo(1)]).cache_key, BatchQuery([Charges(1)]).cache_key)
+
+    def test_parse(self):
+        """Test the response is split between queries."""
+        batch = BatchQuery([LspuInfo(1), Charges(2), Payments(3)])
+        response = {
+            "data": {
+                "q0": {"ok": True, "error": None, "info": {"accountId": 1}},
+                "q1": {"ok": False, "error": "test_error", "data": None},
+                "q2": None,
+            },
+            "errors": [{"message": "Internal error", "path": ["q2"]}],
+        }
+        info, charges_error, payments_error = batch.parse(response)
+        self.assertEqual(info, {"accountId": 1})
+        self.assertIsInstance(charges_error, MyGasApiError)
+        self.assertEqual(str(charges_error), "test_error")
+        self.assertIsInstance(payments_error, MyGasApiError)
+
+    def test_parse_token_error(self):
+        """Test a rejected token fails the whole batch."""
+        batch = BatchQuery([LspuInfo(1), Charges(2)])
+        with self.assertRaises(MyGasTokenError):
+            batch.parse({"errors": [{"message": "Unauthorized"}], "data": None})
+
+
+class TestIndicationBatchSend(IsolatedAsyncioTestCase):
+    """Test IndicationBatchSend class."""
+
+    def test_variables(self):
+        """Test counters are grouped by account."""
+        query = IndicationBatchSend([
+            Indication(1, "a", 10), Indication(2, "b", 20, 5, 7), Indication(1, "c", 30),
+        ])
+        groups = query.variables["input"]["lspuGroups"]
+        self.assertEqual([group["lspuId"] for group in groups], [1, 2])
+        self.assertEqual([counter["uuid"] for counter in groups[0]["counters"]], ["a", "c"])
+        self.assertEqual(groups[1]["counters"][0]["valueNight"], 5)
+        self.assertEqual(groups[1]["counters"][0]["valueMiddle"], 7)
+        self.assertNotIn("elsId", query.variables["input"])
+        self.assertEqual(IndicationBatchSend([Indication(1, "a", 10)]).variables,
+                         IndicationSend(1, "a", 10).variables)
+        self.assertEqual(IndicationBatchSend([Indication(1, "a", 10, els_id=3)]).variables["input"]["elsId"], 3)
+
+    def test_invalid(self):
+        """Test invalid batches are rejected."""
+        for indications in ([], [Indication(1, "a", 1), Indication(1, "a", 2)],
+                            [Indication(1, "a", 1, els_id=1), Indication(2, "b", 1)]):
+            with self.assertRaises(ValueError):
+                IndicationBatchSend(indications)
+
+    def test_parse(self):
+        """Test counter results are mapped to the indications."""
+        query = IndicationBatchSend([Indication(1, "a", 10), Indication(2, "a", 20), Indication(2, "b", 30)])
+        response = {"data": {"indicationSendV4": {"ok": True, "error": None, "data": [
+            {"lspuId": 2, "counters": [{"uuid": "a", "sent": False, "message": "error"}]},
+            {"lspuId": 1, "counters": [{"uuid": "a", "sent": True, "message": "ok"}]},
+        ]}}}
+        first, second, third = query.parse(response)
+        self.assertEqual(first, {"uuid": "a", "sent": True, "message": "ok"})
+        self.assertEqual(second, {"uuid": "a", "sent": False, "message": "error"})
+        self.assertIsInstance(third, MyGasApiParseError)
+
+
+class TestProjectedQuery(IsolatedAsyncioTestCase):
+    """Test field projection."""
+
+    def test_fields(self):
+        """Test the document contains only the selected fields."""
+        query = LspuInfo(1, fields=["balance", "counters.values.valueDay"])
+        info = parse_selection(query.QUERY)["query lspuInfo($lspuId: Float!)"]["lspuInfo(lspuId: $lspuId)"]
+        self.assertEqual(info, {
+            "ok": None,
+            "error": None,
+            "info": {"balance": None, "counters": {"values": {"valueDay": None}}},
+        })
+        self.assertEqual(query.variables, {"lspuId": 1})
+        self.assertIs(LspuInfo(2, fields=["counters.values.valueDay", "balance"]).QUERY, query.QUERY)
+
+    def test_presets(self):
+        """Test presets produce smaller documents."""
+        for query, full in (
+                (LspuInfo(1, "balances"), LspuInfo(1)),
+                (LspuInfo(1, "meters"), LspuInfo(1)),
+                (ElsInfo(1, "meters"), ElsInfo(1)),
+                (Accounts("brief"), Accounts()),
+        ):
+            self.assertLess(len(query.QUERY), len(full.QUERY) / 3)
+            self.assertNotEqual(query.cache_key, full.cache_key)
+        self.assertIn("balances {", LspuInfo(1, "balances").QUERY)
+        self.assertNotIn("setup", Accounts("brief").QUERY)
+
+    def test_invalid_fields(self):
+        """Test unknown fields and presets are rejected."""
+        with self.assertRaises(ValueError):
+            LspuInfo(1, "unknown")
+        with self.assertRaises(ValueError):
+            LspuInfo(1, ["unknown"])
+        with self.assertRaises(ValueError):
+            LspuInfo(1, ["balance.value"])
+        with self.assertRaises(ValueError):
+            LspuInfo(1, [])
+
+    def test_batch(self):
+        """Test projected queries can be batched."""
+        batch = BatchQuery([LspuInfo(1, "balances"), LspuInfo(2)])
+        self.assertIn("q0: lspuInfo(lspuId: $q0_lspuId) {", batch.QUERY)
+        self.assertLess(len(batch.QUERY), len(BatchQuery([LspuInfo(1), LspuInfo(2)]).QUERY))
+
+
+class TestCompiler(IsolatedAsyncioTestCase):
+    """Test the query compiler."""
+
+    def test_compile_query(self):
+        """Test the document is built from a field tree."""
+        compiled = compile_query("test", field("data", "id", field("child", "name")), {"id": "Float!"})
+        self.assertEqual(compiled.text, (
+            "\nquery test($id: Float!) {\n"
+            "  test(id: $id) {\n"
+            "    ok\n"
+            "    error\n"
+            "    data {\n"
+            "      id\n"
+            "      child {\n"
+            "        name\n"
+            "      }\n"
+            "    }\n"
+            "  }\n"
+            "}\n"
+        ))
+        self.assertEqual(compiled.minified, "query test($id:Float!){test(id:$id){ok error data{id child{name}}}}")
+        self.assertEqual(compiled.minified, minify_query(compiled.text))
+        self.assertEqual(compiled.hash, query_hash(compiled.text))
+        mutation = compile_query("send", field("data", "id"), {"input": "Input!"}, mutation=True)
+        self.assertTrue(mutation.text.startswith("\nmutation send($input: Input!) {"))
+
+    def test_compiled_queries(self):
+        """Test compiled documents are used as is and other documents are minified on demand."""
+        query = Charges(1)
+        self.assertIs(query.compiled, Charges.COMPILED)
+        with patch("aiomygas.queries.base.minify_query", side_effect=AssertionError), \
+                patch("aiomygas.queries.base.query_hash", side_effect=AssertionError):
+            payload = json.loads(query.to_bytes(persisted=True))
+        self.assertEqual(payload["query"], Charges.COMPILED.minified)
+        self.assertEqual(payload["extensions"]["persistedQuery"]["sha256Hash"], Charges.COMPILED.hash)
+        projected = Accounts(fields="brief")
+        self.assertIsNot(projected.compiled, Accounts.COMPILED)
+        self.assertEqual(projected.compiled.hash, query_hash(projected.QUERY))
+
+    def test_merge(self):
+        """Test shared trees are merged without duplicates."""
+        shared = fields("id", field("child", "name"))
+        self.assertEqual(fields(shared, "alias", field("child", "id")), {
+            "id": None,
+            "child": {"name": None, "id": None},
+            "alias": None,
+        })
+        with self.assertRaises(ValueError):
+            merge({"child": None}, {"child": {"id": None}})
+
+    def test_queries_share_fragments(self):
+        """Test duplicated selections are compiled from the same tree."""
+        accounts = parse_selection(Accounts.QUERY)["query accountsN"]["accountsN"]["accounts"]
+        self.assertEqual(accounts["lspu"], accounts["elsGroup"]["lspu"])
+        info = parse_selection(LspuInfo.QUERY)["query lspuInfo($lspuId: Float!)"]["lspuInfo(lspuId: $lspuId)"]
+        group = parse_selection(ElsInfo.QUERY)["query elsInfo($elsId: Float!)"]["elsInfo(elsId: $elsId)"]
+        self.assertLessEqual(set(info["info"]), set(group["info"]["lspuInfoGroup"]))
@@ -0,0 +1,72 @@
+"""Test rate_limit module."""
+import json
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+from aiohttp import ClientSession
+
+from aiomygas import queries
+from aiomygas.auth import SimpleMyGasAuth
+from aiomygas.const import CLIENT_SESSION_LIFETIME
+from aiomygas.rate_limit import RateLimit, RateLimiter, TokenBucket
+
+
+class TestTokenBucket(IsolatedAsyncioTestCase):
+    """Test TokenBucket class."""
+
+    async def test_burst_then_wait(self):
+        """Test the burst is free and the next token waits for the rate."""
+        bucket = TokenBucket(rate=20, burst=2)
+        started_at = time.monotonic()
+        await bucket.async_acquire()
+        await bucket.async_acquire()
+        self.assertLess(time.monotonic() - started_at, 0.04)
+        await bucket.async_acquire()
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.04)
+
+    def test_invalid(self):
+        """Test invalid parameters."""
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+    """Test RateLimiter class."""
+
+    async def test_buckets(self):
+        """Test which limits apply to a request."""
+        limiter = RateLimiter(
+            global_limit=RateLimit(100, 10),
+            identity_limit=RateLimit(10, 1),
+            operation_limits={"signInN3": RateLimit(1, 1)},
+        )
+        self.assertEqual(len(limiter._get_buckets("user_a", "signInN3")), 3)
+        self.assertEqual(len(limiter._get_buckets("user_a", "lspuInfo")), 2)
+        self.assertIs(limiter._get_buckets("user_a", "lspuInfo")[0], limiter._get_buckets("user_a", "x")[0])
+        self.assertIsNot(limiter._get_buckets("user_a", "lspuInfo")[0], limiter._get_buckets("user_b", "x")[0])
+
+    async def test_identity_limits_are_independent(self):
+        """Test one identity does not consume another identity's limit."""
+        limiter = RateLimiter(identity_limit=RateLimit(1, 1))
+        started_at = time.monotonic()
+        await limiter.async_acquire("user_a", "lspuInfo")
+        await limiter.async_acquire("user_b", "lspuInfo")
+        self.assertLess(time.monotonic() - started_at, 0.5)
+
+    async def test_auth_uses_rate_limiter(self):
+        """Test requests are passed through the rate limiter."""
+        session = mock.MagicMock(spec=ClientSession)
+        session.post.return_value.__aenter__.return_value.read.return_value = json.dumps({
+            "data": {"clientV2": {"ok": True, "error": None, "client": {"id": 1}}}
+        }).encode()
+        limiter = RateLimiter()
+        auth = SimpleMyGasAuth("test_user", "test_password", session, rate_limiter=limiter)
+        auth._token = {"token": "test_token", "expires_at": time.time() + CLIENT_SESSION_LIFETIME}
+        with mock.patch.object(limiter, "async_acquire") as mock_acquire:
+            await auth.async_request(queries.ClientV2())
+        mock_acquire.assert_awaited_once_with("test_user", "clientV2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Test readings module."""
+import json
+import math
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+
+from aiomygas.readings import MeterReadingStore, MeterReadings, readings_from_counter, to_float
+
+FIXTURES_PATH = Path(__file__).parent.absolute().joinpath("fixtures")
+
+
+def make_counter(uuid, values):
+    """Return a counter with readings given as (dateDt, valueDay)."""
+    return {"uuid": uuid, "values": [
+        {"valueDay": value, "valueNight": None, "valueMiddle": None, "dateDt": date_dt}
+        for date_dt, value in values
+    ]}
+
+
+class TestMeterReadings(unittest.TestCase):
+    """Test MeterReadings class."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.readings = readings_from_counter(make_counter("a", [
+            ("2024-03-01T00:00:00.000Z", 130),
+            ("2024-01-01T00:00:00.000Z", 100),
+            ("2024-02-01T00:00:00.000Z", 110),
+            ("2024-02-01T00:00:00.000Z", 999),
+            ("invalid", 1),
+        ]))
+
+    def test_from_counter(self):
+        """Test readings are sorted and deduplicated on dateDt."""
+        self.assertEqual(list(self.readings.value_day), [100, 110, 130])
+        self.assertEqual(self.readings.timestamps[0], datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.assertTrue(all(math.isnan(value) for value in self.readings.value_night))
+
+    def test_to_float(self):
+        """Test reading values are converted to float with NaN for missing values."""
+        self.assertEqual(to_float("12.5"), 12.5)
+        self.assertEqual(to_float(3), 3.0)
+        for value in (None, "", "n/a", {}):
+            with self.subTest(value=value):
+                self.assertTrue(math.isnan(to_float(value)))
+
+    def test_between_and_deltas(self):
+        """Test range queries and consumption deltas."""
+        readings = self.readings.between(datetime(2024, 1, 15, tzinfo=timezone.utc))
+        self.assertEqual(list(readings.value_day), [110, 130])
+        readings = self.readings.between(end=datetime(2024, 3, 1, tzinfo=timezone.utc))
+        self.assertEqual(list(readings.value_day), [100, 110])
+        self.assertEqual(list(self.readings.deltas().value_day), [10, 20])
+        self.assertEqual(list(self.readings.deltas().timestamps), list(self.readings.timestamps[1:]))
+        self.assertEqual(len(MeterReadings().deltas()), 0)
+
+    def test_bytes(self):
+        """Test the binary format."""
+        data = self.readings.to_bytes()
+        self.assertEqual(len(data), 3 * 4 * 8)
+        self.assertEqual(MeterReadings.from_bytes(data), self.readings)
+        with self.assertRaises(ValueError):
+            MeterReadings.from_bytes(data[:-8])
+
+    def test_merge(self):
+        """Test merging keeps the newest values and detects no-ops."""
+        self.assertIsNone(self.readings.merge(self.readings))
+        other = readings_from_counter(make_counter("a", [
+            ("2024-03-01T00:00:00.000Z", 131),
+            ("2024-04-01T00:00:00.000Z", 140),
+        ]))
+        self.assertEqual(list(self.readings.merge(other).value_day), [100, 110, 131, 140])
+
+
+class TestMeterReadingStore(IsolatedAsyncioTestCase):
+    """Test MeterReadingStore class."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "readings"
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp_dir.cleanup()
+
+    async def test_fixtures(self):
+        """Test readings are taken from lspuInfo and elsInfo."""
+        store = MeterReadingStore(self.path)
+        for file_name, operation_name in (("lspuInfo_response.json", "lspuInfo"),
+                                          ("elsInfo_response.json", "elsInfo")):
+            with open(FIXTURES_PATH.joinpath(file_name), encoding='utf-8') as json_file:
+                info = json.load(json_file)["data"][operation_name]["info"]
+            self.assertEqual(len(store.add_info(info)), 1)
+            self.assertEqual(store.add_info(info), [])
+        self.assertEqual(len(store.uuids), 2)
+
+    async def test_persistence(self):
+        """Test readings survive a new store and files have fixed-width rows."""
+        store = MeterReadingStore(self.path)
+        store.add_counters([make_counter("a", [("2024-01-01T00:00:00Z", 100), ("2024-02-01T00:00:00Z", 110)])])
+        await store.async_save()
+        self.assertEqual(store.get_path("a").stat().st_size, 2 * 4 * 8)
+
+        other = MeterReadingStore(self.path)
+        other.add_counters([make_counter("a", [("2024-03-01T00:00:00Z", 125)])])
+        await other.async_load()
+        self.assertEqual(list(other.get("a").value_day), [100, 110, 125])
+        self.assertEqual(list(other.deltas("a").value_day), [10, 15])
+        self.assertEqual(len(other.between("a", start=datetime(2024, 2, 1, tzinfo=timezone.utc))), 2)
+        self.assertEqual(len(other.get("unknown")), 0)
+
+    async def test_invalid_uuid(self):
+        """Test uuids can not escape the store directory."""
+        store = MeterReadingStore(self.path)
+        with self.assertRaises(ValueError):
+            store.add("../a", MeterReadings())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Test retry module."""
+import asyncio
+import json
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+from aiohttp import ClientConnectorError, ClientResponseError, ClientSession, ServerDisconnectedError
+
+from aiomygas import queries
+from aiomygas.auth import SimpleMyGasAuth
+from aiomygas.const import CLIENT_SESSION_LIFETIME
+from aiomygas.exceptions import MyGasApiError, MyGasCircuitOpenError
+from aiomygas.retry import CircuitBreaker, CircuitBreakerRegistry, RetryPolicy
+
+
+def response_error(status: int, headers=None) -> ClientResponseError:
+    """Return a ClientResponseError with status."""
+    return ClientResponseError(mock.MagicMock(), (), status=status, headers=headers)
+
+
+def connector_error() -> ClientConnectorError:
+    """Return a ClientConnectorError."""
+    return ClientConnectorError(mock.MagicMock(), OSError("connection refused"))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test RetryPolicy class."""
+
+    def test_is_retryable(self):
+        """Test is_retryable method."""
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable(response_error(503)))
+        self.assertTrue(policy.is_retryable(response_error(429)))
+        self.assertFalse(policy.is_retryable(response_error(400)))
+        self.assertTrue(policy.is_retryable(ServerDisconnectedError()))
+        self.assertTrue(policy.is_retryable(asyncio.TimeoutError()))
+        self.assertFalse(RetryPolicy(retry_timeouts=False).is_retryable(asyncio.TimeoutError()))
+
+    def test_is_retryable_mutation(self):
+        """Test mutations are retried only if the connection was not established."""
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable(connector_error(), is_mutation=True))
+        self.assertFalse(policy.is_retryable(response_error(503), is_mutation=True))
+        self.assertFalse(policy.is_retryable(ServerDisconnectedError(), is_mutation=True))
+
+    def test_get_delay(self):
+        """Test get_delay method."""
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+        self.assertEqual([policy.get_delay(attempt) for attempt in range(1, 6)], [1, 2, 4, 5, 5])
+        jittered = RetryPolicy(base_delay=1, max_delay=5)
+        for _ in range(100):
+            self.assertTrue(0 <= jittered.get_delay(3) <= 4)
+        self.assertEqual(policy.get_delay(1, response_error(429, {"Retry-After": "3"})), 3)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test CircuitBreaker class."""
+
+    def test_open_and_recover(self):
+        """Test the circuit opens after failures and closes after a successful trial."""
+        breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=10)
+        breaker.before_request()
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(MyGasCircuitOpenError):
+            breaker.before_request()
+
+        with mock.patch("aiomygas.retry.time.monotonic", return_value=time.monotonic() + 11):
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            breaker.before_request()
+            # only one trial request is allowed
+            with self.assertRaises(MyGasCircuitOpenError):
+                breaker.before_request()
+            breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        """Test a failed trial request opens the circuit again."""
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10)
+        breaker.record_failure()
+        with mock.patch("aiomygas.retry.time.monotonic", return_value=time.monotonic() + 11):
+            breaker.before_request()
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_registry(self):
+        """Test the registry returns one breaker per endpoint."""
+        registry = CircuitBreakerRegistry()
+        self.assertIs(registry.get("a"), registry.get("a"))
+        self.assertIsNot(registry.get("a"), registry.get("b"))
+
+
+class TestAuthRetry(IsolatedAsyncioTestCase):
+    """Test retries and circuit breaker in AbstractMyGasAuth."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.session = mock.MagicMock(spec=ClientSession)
+        self.ok_resp = {"data": {"clientV2": {"ok": True, "error": None, "client": {"id": 1}}}}
+
+    def make_auth(self, **kwargs) -> SimpleMyGasAuth:
+        """Return auth with a valid token."""
+        auth = SimpleMyGasAuth("test_user", "test_password", self.session, **kwargs)
+        auth._token = {"token": "test_token", "expires_at": time.time() + CLIENT_SESSION_LIFETIME}
+        return auth
+
+    @mock.patch("aiomygas.auth.asyncio.sleep")
+    async def test_retry_then_success(self, mock_sleep):
+        """Test a transient error is retried."""
+        auth = self.make_auth(retry_policy=RetryPolicy(max_attempts=3))
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = [
+            response_error(503), json.dumps(self.ok_resp).encode()
+        ]
+        self.assertEqual(await auth.async_request(queries.ClientV2()), {"id": 1})
+        self.assertEqual(self.session.post.call_count, 2)
+        mock_sleep.assert_called_once()
+
+    @mock.patch("aiomygas.auth.asyncio.sleep")
+    async def test_retry_exhausted(self, mock_sleep):
+        """Test the error is raised when all attempts fail."""
+        auth = self.make_auth(retry_policy=RetryPolicy(max_attempts=2))
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = response_error(503)
+        with self.assertRaises(MyGasApiError):
+            await auth.async_request(queries.ClientV2())
+        self.assertEqual(self.session.post.call_count, 2)
+
+    async def test_no_retry_by_default(self):
+        """Test requests are not retried without a retry policy."""
+        auth = self.make_auth()
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = response_error(503)
+        with self.assertRaises(MyGasApiError):
+            await auth.async_request(queries.ClientV2())
+        self.assertEqual(self.session.post.call_count, 1)
+
+    async def test_mutation_not_retried(self):
+        """Test a mutation is not retried after the server was reached."""
+        auth = self.make_auth(retry_policy=RetryPolicy(max_attempts=3))
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = response_error(503)
+        with self.assertRaises(MyGasApiError):
+            await auth.async_request(queries.IndicationSend(1, "uuid", 1))
+        self.assertEqual(self.session.post.call_count, 1)
+
+    async def test_circuit_breaker_fails_fast(self):
+        """Test an open circuit rejects requests without network calls."""
+        auth = self.make_auth(circuit_breakers=CircuitBreakerRegistry(failure_threshold=2))
+        self.session.post.return_value.__aenter__.return_value.read.side_effect = response_error(502)
+        for _ in range(2):
+            with self.assertRaises(MyGasApiError):
+                await auth.async_request(queries.ClientV2())
+        with self.assertRaises(MyGasCircuitOpenError):
+            await auth.async_request(queries.ClientV2())
+        self.assertEqual(self.session.post.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
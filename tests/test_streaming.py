@@ -0,0 +1,67 @@
+"""Test streaming module."""
+import json
+import unittest
+
+from aiomygas.exceptions import MyGasApiParseError
+from aiomygas.streaming import JsonStreamParser
+
+ITEMS_PATH = ("data", "elsInfo", "info", "lspuInfoGroup", None)
+OK_PATH = ("data", "elsInfo", "ok")
+
+
+class TestJsonStreamParser(unittest.TestCase):
+    """Test JsonStreamParser class."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.items = [{"a": [1, {"b": '}\\"]'}], "c": "é"}, {}, [], 5, "s\\\\", None]
+        self.document = {"data": {"elsInfo": {"ok": True, "error": None, "info": {
+            "els": {"id": 1, "alias": "{[,:"},
+            "lspuInfoGroup": self.items,
+        }}}}
+        self.data = json.dumps(self.document, ensure_ascii=False, indent=1).encode("utf-8")
+
+    def parse(self, data, chunk_size, paths=(ITEMS_PATH, OK_PATH)):
+        """Feed data in chunks and return the parsed values."""
+        parser = JsonStreamParser(paths)
+        results = []
+        for i in range(0, len(data), chunk_size):
+            results += parser.feed(data[i:i + chunk_size])
+        parser.close()
+        return results
+
+    def test_chunks(self):
+        """Test values are the same for any chunk boundaries."""
+        expected = [(OK_PATH, True)] + [(ITEMS_PATH[:-1] + (i,), item) for i, item in enumerate(self.items)]
+        for chunk_size in range(1, len(self.data) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.parse(self.data, chunk_size), expected)
+
+    def test_bounded_buffer(self):
+        """Test bytes outside the captured value are discarded."""
+        parser = JsonStreamParser([ITEMS_PATH])
+        data = json.dumps({"skip": ["x" * 1000] * 100, "data": None}).encode()
+        for i in range(0, len(data), 100):
+            parser.feed(data[i:i + 100])
+            self.assertLess(len(parser._buffer), 1100)
+        parser.close()
+
+    def test_empty_array(self):
+        """Test an empty array yields nothing."""
+        self.assertEqual(self.parse(b'{"data": {"elsInfo": {"info": {"lspuInfoGroup": [ ]}}}}', 7), [])
+
+    def test_invalid(self):
+        """Test incomplete and invalid documents."""
+        with self.assertRaises(MyGasApiParseError):
+            self.parse(self.data[:-1], 10)
+        with self.assertRaises(MyGasApiParseError):
+            self.parse(b"", 10)
+        with self.assertRaises(MyGasApiParseError):
+            self.parse(b'{"data": {"elsInfo": {"ok": tru}}}', 10)
+        for data in (b'}', b',', b':', b'{"a":1},', b'{"a":1}:', b'[1:2]'):
+            with self.subTest(data=data), self.assertRaises(MyGasApiParseError):
+                self.parse(data, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
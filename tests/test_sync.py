@@ -0,0 +1,91 @@
+"""Test sync module."""
+import copy
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+
+from aiomygas.api import MyGasApi
+from aiomygas.exceptions import MyGasApiError
+from aiomygas.sync import SyncEngine
+
+FIXTURES_PATH = Path(__file__).parent.absolute().joinpath("fixtures")
+
+
+class TestSyncEngine(IsolatedAsyncioTestCase):
+    """Test SyncEngine class."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "sync.db"
+        with open(FIXTURES_PATH.joinpath("paymentsByLspu_response.json"), encoding='utf-8') as json_file:
+            self.payments = json.load(json_file)["data"]["paymentsByLspu"]["data"]
+        self.charges = [
+            {"id": 1, "date": "2023-10-01", "serviceUuid": "gas", "volume": 10},
+            {"id": 2, "date": "2023-11-01", "serviceUuid": "gas", "volume": 12},
+        ]
+        self.api = MagicMock(spec=MyGasApi)
+        self.api.async_get_payments = AsyncMock(side_effect=lambda lspu_id: copy.deepcopy(self.payments))
+        self.api.async_get_charges = AsyncMock(side_effect=lambda lspu_id: copy.deepcopy(self.charges))
+        self.engine = SyncEngine(self.api, self.path)
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp_dir.cleanup()
+
+    async def test_sync_payments(self):
+        """Test only new and changed payments are returned."""
+        delta = await self.engine.async_sync_payments(1)
+        self.assertEqual(len(delta.added), len(self.payments))
+        self.assertEqual(delta.changed, [])
+
+        self.assertFalse(await self.engine.async_sync_payments(1))
+
+        self.payments[1]["fiscalized"] = False
+        self.payments.append({**self.payments[0], "paymentId": 5555555, "date": "2023-12-01T00:00:00.000Z"})
+        delta = await SyncEngine(self.api, self.path).async_sync_payments(1)
+        self.assertEqual([p["paymentId"] for p in delta.added], [5555555])
+        self.assertEqual(delta.changed, [self.payments[1]])
+
+    async def test_payments_without_id(self):
+        """Test equal payments without paymentId are kept apart."""
+        payment = {**self.payments[1], "paymentId": None}
+        self.payments = [payment, dict(payment)]
+        delta = await self.engine.async_sync_payments(1)
+        self.assertEqual(len(delta.added), 2)
+        self.assertEqual(len(await self.engine.async_get_records("payments", 1)), 2)
+
+    async def test_get_records(self):
+        """Test stored records are ordered by date and filtered."""
+        await self.engine.async_sync_charges(1)
+        self.assertEqual(await self.engine.async_get_records("charges", 1), self.charges)
+        self.assertEqual(await self.engine.async_get_records("charges", 1, since="2023-11-01"), self.charges[1:])
+        self.assertEqual(await self.engine.async_get_records("charges", 2), [])
+
+    async def test_resume(self):
+        """Test an interrupted backfill resumes with the remaining accounts."""
+        self.api.async_get_charges.side_effect = [copy.deepcopy(self.charges), MyGasApiError("test_error")]
+        with self.assertRaises(MyGasApiError):
+            await self.engine.async_sync([1, 2], kinds=["charges"], max_age=3600)
+
+        self.api.async_get_charges.side_effect = lambda lspu_id: copy.deepcopy(self.charges)
+        deltas = await self.engine.async_sync([1, 2], kinds=["charges"], max_age=3600)
+        self.assertEqual(list(deltas), [("charges", 2)])
+        self.assertEqual(len(deltas["charges", 2].added), 2)
+
+        deltas = await self.engine.async_sync([1, 2])
+        self.assertEqual(len(deltas), 4)
+        self.assertFalse(deltas["charges", 1])
+        self.assertTrue(deltas["payments", 1])
+
+    async def test_unknown_kind(self):
+        """Test unknown kinds are rejected."""
+        with self.assertRaises(ValueError):
+            await self.engine.async_sync_account("unknown", 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
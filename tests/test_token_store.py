@@ -0,0 +1,87 @@
+"""Test token_store module."""
+import asyncio
+import multiprocessing
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+
+from aiomygas import token_store
+from aiomygas.token_store import JsonFileTokenStore, MemoryTokenStore, SqliteTokenStore
+
+
+def save_tokens(path, prefix, count):
+    """Save count tokens to a JSON file store in a separate process."""
+    store = JsonFileTokenStore(path)
+    for i in range(count):
+        asyncio.run(store.async_save(f"{prefix}_{i}", {"token": f"{prefix}_{i}", "expires_at": 0}))
+
+
+class TestTokenStores(IsolatedAsyncioTestCase):
+    """Test token store backends."""
+
+    def setUp(self):
+        """Set up test variables."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+        self.token = {"token": "test_token", "expires_at": time.time() + 3600}
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp_dir.cleanup()
+
+    def make_stores(self):
+        """Return one instance of each store."""
+        return [
+            MemoryTokenStore(),
+            JsonFileTokenStore(self.path / "tokens.json"),
+            SqliteTokenStore(self.path / "tokens.db"),
+        ]
+
+    async def test_save_load_delete(self):
+        """Test save, load and delete for every store."""
+        for store in self.make_stores():
+            with self.subTest(store=type(store).__name__):
+                self.assertIsNone(await store.async_load("test_user"))
+                await store.async_save("test_user", self.token)
+                self.assertEqual(await store.async_load("test_user"), self.token)
+                self.assertIsNone(await store.async_load("other_user"))
+                await store.async_delete("test_user")
+                self.assertIsNone(await store.async_load("test_user"))
+
+    async def test_persistent_stores_survive_new_instance(self):
+        """Test file based stores share tokens between instances."""
+        for factory in (lambda: JsonFileTokenStore(self.path / "tokens.json"),
+                        lambda: SqliteTokenStore(self.path / "tokens.db")):
+            await factory().async_save("test_user", self.token)
+            self.assertEqual(await factory().async_load("test_user"), self.token)
+
+    async def test_json_store_corrupted_file(self):
+        """Test JSON store ignores a corrupted file."""
+        path = self.path / "tokens.json"
+        path.write_text("not json", encoding="utf-8")
+        store = JsonFileTokenStore(path)
+        self.assertIsNone(await store.async_load("test_user"))
+        await store.async_save("test_user", self.token)
+        self.assertEqual(await store.async_load("test_user"), self.token)
+
+    @unittest.skipIf(token_store.fcntl is None, "fcntl is not available")
+    async def test_json_store_concurrent_processes(self):
+        """Test processes saving different identifiers keep each other's tokens."""
+        path = self.path / "tokens.json"
+        processes = [
+            multiprocessing.Process(target=save_tokens, args=(path, f"user{n}", 20)) for n in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        store = JsonFileTokenStore(path)
+        for n in range(4):
+            for i in range(20):
+                self.assertIsNotNone(await store.async_load(f"user{n}_{i}"))
+
+
+if __name__ == "__main__":
+    unittest.main()